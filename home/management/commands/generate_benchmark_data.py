@@ -0,0 +1,450 @@
+import colorsys
+import random
+import string
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image as PILImage, ImageDraw
+from wagtail.images import get_image_model
+from wagtail.models import Locale, Page, Site
+
+from news import text, trending
+from news.caching import invalidate_tags
+from news.models import ArticleViewBucket, NewsCategory, NewsIndexPage, NewsPage, NewsTopic, VideoIndexPage, VideoPage
+from news.models.authors import Author
+
+User = get_user_model()
+
+PLACES = [
+    ('ಬೆಂಗಳೂರು', 'bengaluru'), ('ಮೈಸೂರು', 'mysuru'), ('ಹುಬ್ಬಳ್ಳಿ', 'hubballi'), ('ಮಂಗಳೂರು', 'mangaluru'),
+    ('ಬೆಳಗಾವಿ', 'belagavi'), ('ಶಿವಮೊಗ್ಗ', 'shivamogga'), ('ಕಲಬುರಗಿ', 'kalaburagi'), ('ಉಡುಪಿ', 'udupi'),
+    ('ಹಾಸನ', 'hassan'), ('ತುಮಕೂರು', 'tumakuru'), ('ದಾವಣಗೆರೆ', 'davanagere'), ('ಚಿಕ್ಕಮಗಳೂರು', 'chikkamagaluru'),
+    ('ಧಾರವಾಡ', 'dharwad'), ('ಬಳ್ಳಾರಿ', 'ballari'), ('ವಿಜಯಪುರ', 'vijayapura'), ('ಮಂಡ್ಯ', 'mandya'),
+    ('ಕೊಡಗು', 'kodagu'), ('ರಾಯಚೂರು', 'raichur'), ('ದೆಹಲಿ', 'delhi'), ('ಮುಂಬೈ', 'mumbai'),
+]
+
+CATEGORIES = [
+    ('ರಾಜ್ಯ', 'state'), ('ರಾಷ್ಟ್ರೀಯ', 'national'), ('ಅಂತರರಾಷ್ಟ್ರೀಯ', 'international'), ('ಕ್ರೀಡೆ', 'sports'),
+    ('ವಾಣಿಜ್ಯ', 'business'), ('ಸಿನಿಮಾ', 'entertainment'), ('ರಾಜಕೀಯ', 'politics'), ('ತಂತ್ರಜ್ಞಾನ', 'technology'),
+    ('ಆರೋಗ್ಯ', 'health'), ('ಶಿಕ್ಷಣ', 'education'),
+]
+
+THEMES = [
+    ('ಚುನಾವಣೆ', 'election'), ('ಮಳೆ', 'rain'), ('ಕ್ರಿಕೆಟ್', 'cricket'), ('ದಸರಾ', 'dasara'), ('ಮೆಟ್ರೋ', 'metro'),
+    ('ಕೃಷಿ', 'farming'), ('ಸಂಚಾರ', 'traffic'), ('ಬಜೆಟ್', 'budget'), ('ಪ್ರವಾಸೋದ್ಯಮ', 'tourism'),
+    ('ನೀರು', 'water'), ('ಶಾಲೆ', 'schools'), ('ಆಸ್ಪತ್ರೆ', 'hospitals'), ('ಉದ್ಯೋಗ', 'jobs'), ('ಅಪರಾಧ', 'crime'),
+    ('ಹವಾಮಾನ', 'weather'),
+]
+
+FIRST_NAMES = [
+    'ರಮೇಶ್', 'ಸುರೇಶ್', 'ಲಕ್ಷ್ಮಿ', 'ಅನಿತಾ', 'ಪ್ರಕಾಶ್', 'ಕಾವ್ಯ', 'ವಿನಯ್', 'ಶ್ರುತಿ', 'ಮಂಜುನಾಥ್', 'ದೀಪಾ',
+    'ರಾಘವೇಂದ್ರ', 'ಸೌಮ್ಯ', 'ಕಿರಣ್', 'ಪೂಜಾ', 'ನಾಗರಾಜ್', 'ರೇಖಾ',
+]
+SURNAMES = ['ಹೆಗಡೆ', 'ಭಟ್', 'ರಾವ್', 'ಗೌಡ', 'ಶೆಟ್ಟಿ', 'ನಾಯಕ್', 'ಕುಲಕರ್ಣಿ', 'ಜೋಶಿ', 'ಪಾಟೀಲ್', 'ಹಿರೇಮಠ']
+
+# Common words of news copy, for sentences that tokenise and wrap like real Kannada text
+WORDS = (
+    'ಸರ್ಕಾರ ಮುಖ್ಯಮಂತ್ರಿ ಸಚಿವ ಅಧಿಕಾರಿಗಳು ಜನರು ನಗರ ಗ್ರಾಮ ಜಿಲ್ಲೆ ರಾಜ್ಯ ದೇಶ ಯೋಜನೆ ಕಾಮಗಾರಿ ಅನುದಾನ '
+    'ಘೋಷಣೆ ಸಭೆ ಚರ್ಚೆ ನಿರ್ಧಾರ ಆದೇಶ ವರದಿ ಮಾಹಿತಿ ಪ್ರಕಾರ ಕುರಿತು ಬಗ್ಗೆ ಹಾಗೂ ಮತ್ತು ಆದರೆ ಈಗ ಶನಿವಾರ '
+    'ಭಾನುವಾರ ಸೋಮವಾರ ಇಂದು ನಿನ್ನೆ ನಾಳೆ ಬೆಳಿಗ್ಗೆ ಸಂಜೆ ಭಾರಿ ಹೊಸ ಹಳೆಯ ಪ್ರಮುಖ ವಿಶೇಷ ಸ್ಥಳೀಯ ಸಾರ್ವಜನಿಕ '
+    'ರೈತರು ವಿದ್ಯಾರ್ಥಿಗಳು ಶಿಕ್ಷಕರು ವೈದ್ಯರು ಪೊಲೀಸರು ನಾಗರಿಕರು ಕಾರ್ಮಿಕರು ಪ್ರತಿಭಟನೆ ಬೆಂಬಲ ವಿರೋಧ ಒತ್ತಾಯ '
+    'ಮನವಿ ಭರವಸೆ ಸಮಸ್ಯೆ ಪರಿಹಾರ ಕ್ರಮ ತನಿಖೆ ಪ್ರಕರಣ ನ್ಯಾಯಾಲಯ ತೀರ್ಪು ಚುನಾವಣೆ ಮತದಾನ ಅಭ್ಯರ್ಥಿ ಪಕ್ಷ '
+    'ಕಾಂಗ್ರೆಸ್ ಬಿಜೆಪಿ ಜೆಡಿಎಸ್ ಬಜೆಟ್ ತೆರಿಗೆ ಬೆಲೆ ಏರಿಕೆ ಇಳಿಕೆ ಮಾರುಕಟ್ಟೆ ಉದ್ಯಮ ಹೂಡಿಕೆ ಉದ್ಯೋಗ ಮಳೆ ಬರ '
+    'ನೀರು ವಿದ್ಯುತ್ ರಸ್ತೆ ಸಂಚಾರ ಮೆಟ್ರೋ ಬಸ್ ರೈಲು ಆಸ್ಪತ್ರೆ ಚಿಕಿತ್ಸೆ ಲಸಿಕೆ ಶಾಲೆ ಕಾಲೇಜು ಪರೀಕ್ಷೆ ಫಲಿತಾಂಶ '
+    'ಪಂದ್ಯ ತಂಡ ಗೆಲುವು ಸೋಲು ದಾಖಲೆ ಆಟಗಾರ ಚಿತ್ರ ನಟ ನಟಿ ಬಿಡುಗಡೆ ಪ್ರದರ್ಶನ ಹಬ್ಬ ಆಚರಣೆ ಸಂಭ್ರಮ ಜಾತ್ರೆ '
+    'ದೇವಸ್ಥಾನ ಪ್ರವಾಸಿಗರು ಅಭಿವೃದ್ಧಿ ಸುರಕ್ಷತೆ ಅಪಘಾತ ಗಾಯ ಸಾವು ನಷ್ಟ ಪರಿಹಾರಧನ ಮಂಜೂರು ಉದ್ಘಾಟನೆ ಶಂಕುಸ್ಥಾಪನೆ '
+    'ಆರಂಭ ಮುಕ್ತಾಯ ಮುಂದುವರಿಕೆ ಸ್ಥಗಿತ ಸಿದ್ಧತೆ ಸಜ್ಜು ಎಚ್ಚರಿಕೆ ಸೂಚನೆ ತಿಳಿಸಿದರು ಹೇಳಿದರು ನೀಡಿದರು '
+    'ಮಾಡಿದರು ಪಡೆದರು ಆಗಿದೆ ಮಾಡಲಾಗಿದೆ ನಡೆಯಿತು ನಡೆಯಲಿದೆ ಬಂದಿದೆ ಹೋಗಿದೆ ಇದೆ ಇಲ್ಲ ಎಂದು ಅವರು ಈ ಆ ಒಂದು '
+    'ಎರಡು ಹಲವು ಎಲ್ಲ ಕೆಲವು ಹೆಚ್ಚು ಕಡಿಮೆ ಕೋಟಿ ಲಕ್ಷ ಸಾವಿರ ರೂಪಾಯಿ ವರ್ಷ ತಿಂಗಳು ವಾರ ದಿನ'
+).split()
+
+SENTENCE_POOL_SIZE = 4000
+PARAGRAPH_POOL_SIZE = 2000
+# 80% of views on about 20% of the articles
+VIEW_SKEW = 1.16
+# Hourly views of an article halve every this many hours after publication
+VIEW_DECAY_HOURS = 24
+IMAGE_SIZE = (1200, 800)
+
+
+def _zipf_weights(count, exponent):
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+class TextPool:
+    """
+    Kannada sentences and paragraphs drawn once from the seeded generator.
+    Articles are assembled from the pools, so a million bodies cost a few
+    random picks each instead of thousands of word draws.
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.sentences = [self.sentence() for _ in range(SENTENCE_POOL_SIZE)]
+        self.paragraphs = []
+        for _ in range(PARAGRAPH_POOL_SIZE):
+            paragraph = ' '.join(rng.choices(self.sentences, k=rng.randint(3, 6)))
+            self.paragraphs.append((paragraph, text.count_words(paragraph)))
+
+    def sentence(self):
+        return ' '.join(self.rng.choices(WORDS, k=self.rng.randint(6, 14))) + '.'
+
+    def title(self):
+        place = self.rng.choice(PLACES)[0]
+        return f"{place}: {' '.join(self.rng.choices(WORDS, k=self.rng.randint(3, 6)))}"
+
+    def body(self, low=3, high=8):
+        """Return ``(raw stream data, BodyText)`` for a body of ``low`` to ``high`` paragraphs"""
+        chosen = self.rng.choices(self.paragraphs, k=self.rng.randint(low, high))
+        raw = [{'type': 'paragraph', 'value': f'<p>{paragraph}</p>', 'id': self.uuid()} for paragraph, _ in chosen]
+        # Same result as text.extract(raw): the paragraphs carry no markup or entities
+        body_text = '\n'.join(paragraph for paragraph, _ in chosen)
+        extracted = text.BodyText(
+            text=body_text,
+            word_count=sum(words for _, words in chosen),
+            excerpt=text.excerpt(body_text.replace('\n', ' ')),
+        )
+        return raw, extracted
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a large, reproducible set of live articles and videos for benchmarking. '
+        'Works offline: text is synthesised and images are drawn locally.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=100_000, help='Number of news articles to generate')
+        parser.add_argument('--videos', type=int, default=10_000, help='Number of videos to generate')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--days', type=int, default=730, help='Spread publication dates over this many days')
+        parser.add_argument(
+            '--until',
+            type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+            help='Date of the newest article as YYYY-MM-DD (defaults to today); fix it to reproduce a dataset',
+        )
+        parser.add_argument('--categories', type=int, default=30, help='Categories to make sure exist')
+        parser.add_argument('--topics', type=int, default=200, help='Topics to make sure exist')
+        parser.add_argument('--authors', type=int, default=60, help='Authors to make sure exist')
+        parser.add_argument('--images', type=int, default=40, help='Images to synthesise (0 reuses existing images)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Pages inserted per transaction')
+        parser.add_argument(
+            '--skip-derived',
+            action='store_true',
+            help='Do not rebuild closure, counters, archive facets, trending and sitemaps afterwards',
+        )
+        parser.add_argument(
+            '--indexes',
+            action='store_true',
+            help='Also rebuild the search index, suggestions and related articles (slow on large datasets)',
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.seed = options['seed']
+        until = options['until'] or timezone.localdate()
+        self.newest = datetime.combine(until, datetime.max.time(), tzinfo=dt_timezone.utc).replace(microsecond=0)
+        self.days = options['days']
+        self.batch_size = options['batch_size']
+        self.text = TextPool(self.rng)
+        self.locale = Locale.get_default()
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nGenerating benchmark data'))
+        self.stdout.write('=' * 50)
+        categories = self.ensure_categories(options['categories'])
+        topics = self.ensure_topics(options['topics'])
+        authors = self.ensure_authors(options['authors'])
+        images = self.ensure_images(options['images'])
+
+        self.category_weights = _zipf_weights(len(categories), 1.1)
+        self.topic_weights = _zipf_weights(len(topics), 1.3)
+        self.author_weights = _zipf_weights(len(authors), 0.8)
+        self.categories, self.topics, self.authors, self.images = categories, topics, authors, images
+
+        news_index, video_index = self.index_pages()
+        if options['articles']:
+            self.generate(news_index, NewsPage, 'article', options['articles'], self.build_article)
+            self.generate_view_buckets(news_index)
+        if options['videos']:
+            self.generate(video_index, VideoPage, 'video', options['videos'], self.build_video)
+
+        invalidate_tags('news', 'videos', 'breaking', 'featured', 'homepage', 'categories', 'topics', 'authors')
+        if not options['skip_derived']:
+            self.rebuild_derived(options['indexes'])
+        self.stdout.write(self.style.SUCCESS('Benchmark data generated'))
+
+    # Taxonomy, authors and images are small, so they go through the ORM and its signals
+
+    def ensure_categories(self, count):
+        parents = {}
+        for name, slug in CATEGORIES[:count]:
+            parents[slug], _ = NewsCategory.objects.get_or_create(slug=slug, defaults={'name': name})
+        # The rest are districts under the state category, giving the tree some depth
+        for name, slug in PLACES[:max(0, count - len(CATEGORIES))]:
+            NewsCategory.objects.get_or_create(slug=slug, defaults={'name': name, 'parent': parents.get('state')})
+        categories = list(NewsCategory.objects.order_by('pk'))
+        self.rng.shuffle(categories)
+        self.stdout.write(f'Categories: {len(categories)}')
+        return categories
+
+    def ensure_topics(self, count):
+        existing = set(NewsTopic.objects.values_list('slug', flat=True))
+        combinations = [(place, theme) for theme in THEMES for place in PLACES][:count]
+        NewsTopic.objects.bulk_create([
+            NewsTopic(name=f'{place[0]} {theme[0]}', slug=f'{place[1]}-{theme[1]}')
+            for place, theme in combinations
+            if f'{place[1]}-{theme[1]}' not in existing
+        ])
+        topics = list(NewsTopic.objects.order_by('pk'))
+        self.rng.shuffle(topics)
+        self.stdout.write(f'Topics: {len(topics)}')
+        return topics
+
+    def ensure_authors(self, count):
+        for index in range(Author.objects.filter(slug__startswith='bench-').count(), count):
+            name = f'{FIRST_NAMES[index % len(FIRST_NAMES)]} {SURNAMES[index // len(FIRST_NAMES) % len(SURNAMES)]}'
+            user, _ = User.objects.get_or_create(username=f'bench-author-{index}')
+            Author.objects.get_or_create(
+                user=user,
+                defaults={'name': name, 'slug': f'bench-{index}', 'designation': 'Staff Writer'},
+            )
+        authors = list(Author.objects.order_by('pk'))
+        self.rng.shuffle(authors)
+        self.stdout.write(f'Authors: {len(authors)}')
+        return authors
+
+    def ensure_images(self, count):
+        Image = get_image_model()
+        for index in range(count):
+            title = f'bench-{self.seed}-{index}'
+            if not Image.objects.filter(title=title).exists():
+                image = Image(title=title)
+                image.file.save(f'{title}.jpg', ContentFile(self.draw_image()), save=False)
+                image.width, image.height = IMAGE_SIZE
+                image._set_image_file_metadata()
+                image.save()
+        images = list(Image.objects.order_by('pk').values_list('pk', flat=True))
+        self.stdout.write(f'Images: {len(images)}')
+        return images
+
+    def draw_image(self):
+        """A JPEG with a two-colour gradient and a few shapes, so renditions have real work to do"""
+        width, height = IMAGE_SIZE
+        hue = self.rng.random()
+        top = tuple(int(channel * 255) for channel in colorsys.hsv_to_rgb(hue, 0.6, 0.9))
+        bottom = tuple(int(channel * 255) for channel in colorsys.hsv_to_rgb((hue + 0.15) % 1, 0.8, 0.4))
+        gradient = PILImage.linear_gradient('L').resize((width, height))
+        picture = PILImage.composite(PILImage.new('RGB', (width, height), bottom),
+                                     PILImage.new('RGB', (width, height), top), gradient)
+        draw = ImageDraw.Draw(picture)
+        for _ in range(self.rng.randint(3, 8)):
+            x, y = self.rng.randrange(width), self.rng.randrange(height)
+            radius = self.rng.randint(40, 240)
+            colour = tuple(self.rng.randrange(256) for _ in range(3))
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=colour)
+        output = BytesIO()
+        picture.save(output, 'JPEG', quality=85)
+        return output.getvalue()
+
+    def index_pages(self):
+        news_index = NewsIndexPage.objects.first()
+        video_index = VideoIndexPage.objects.first()
+        if news_index and video_index:
+            return news_index, video_index
+        site = Site.objects.filter(is_default_site=True).select_related('root_page').first()
+        if site is None:
+            raise CommandError('No default site; create one before generating data')
+        root = site.root_page
+        if news_index is None:
+            news_index = root.add_child(instance=NewsIndexPage(title='News', slug='news'))
+        if video_index is None:
+            video_index = root.add_child(instance=VideoIndexPage(title='Videos', slug='videos'))
+        return news_index, video_index
+
+    # Pages are inserted in bulk. Wagtail pages use multi-table inheritance and
+    # bulk_create cannot write both tables, so the wagtailcore_page rows are
+    # bulk-created and the subclass rows, like the M2M links, inserted with
+    # executemany. Treebeard paths are allocated after the parent's last
+    # child, as add_child would.
+
+    def generate(self, parent, model, kind, count, build):
+        parent.refresh_from_db()
+        prefix = f'{kind}-{self.seed}-'
+        if Page.objects.child_of(parent).filter(slug=f'{prefix}0').exists():
+            raise CommandError(f'{model.__name__} pages from seed {self.seed} already exist; pick another --seed')
+
+        last_child = parent.get_last_child()
+        next_step = Page._str2int(last_child.path[-Page.steplen:]) + 1 if last_child else 1
+        if next_step + count > len(Page.alphabet) ** Page.steplen:
+            raise CommandError(f'{parent.title} has no room in its tree path for {count} more children')
+        content_type = ContentType.objects.get_for_model(model)
+        page_fields = [field for field in Page._meta.concrete_fields if not field.primary_key]
+        own_fields = model._meta.local_concrete_fields
+        links = [(model.categories, '_category_ids'), (model.topics, '_topic_ids')]
+
+        started = time.monotonic()
+        for offset in range(0, count, self.batch_size):
+            pages = []
+            for index in range(offset, min(count, offset + self.batch_size)):
+                page = build(f'{prefix}{index}')
+                page.content_type = content_type
+                page.locale = self.locale
+                page.translation_key = self.text.uuid()
+                page.path = Page._get_path(parent.path, parent.depth + 1, next_step + index)
+                page.depth = parent.depth + 1
+                page.numchild = 0
+                page.url_path = f'{parent.url_path}{page.slug}/'
+                page.draft_title = page.title
+                page.live = True
+                page.has_unpublished_changes = False
+                page.last_published_at = page.latest_revision_created_at = page.first_published_at
+                pages.append(page)
+
+            with transaction.atomic():
+                base_rows = Page.objects.bulk_create([
+                    Page(**{field.attname: getattr(page, field.attname) for field in page_fields}) for page in pages
+                ])
+                for page, row in zip(pages, base_rows):
+                    page.pk = page.page_ptr_id = row.pk
+                self.insert_rows(model._meta.db_table, [field.column for field in own_fields], [
+                    [field.get_db_prep_save(field.pre_save(page, True), connection) for field in own_fields]
+                    for page in pages
+                ])
+                for descriptor, attribute in links:
+                    field = descriptor.field
+                    self.insert_rows(
+                        field.remote_field.through._meta.db_table,
+                        [field.m2m_column_name(), field.m2m_reverse_name()],
+                        [(page.pk, pk) for page in pages for pk in getattr(page, attribute)],
+                    )
+                Page.objects.filter(pk=parent.pk).update(numchild=F('numchild') + len(pages))
+
+            done = offset + len(pages)
+            rate = done / max(time.monotonic() - started, 0.001)
+            self.stdout.write(f'{model.__name__}: {done}/{count} ({rate:.0f}/s)')
+
+    def insert_rows(self, table, columns, rows):
+        quote = connection.ops.quote_name
+        placeholders = ', '.join(['%s'] * len(columns))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {quote(table)} ({', '.join(map(quote, columns))}) VALUES ({placeholders})", rows
+            )
+
+    def generate_view_buckets(self, parent):
+        """Hourly view buckets for articles inside the trending windows, so the leaderboards have data
+
+        Each article's lifetime view_count is spread over the hours since publication with an
+        exponential decay, so the buckets keep the Pareto skew of the counts. A separate random
+        stream leaves the pages of a seed unchanged.
+        """
+        rng = random.Random(f'{self.seed}-buckets')
+        now = trending.current_hour(min(timezone.now(), self.newest))
+        longest = max(hours for hours, _ in trending.WINDOWS.values())
+        articles = NewsPage.objects.child_of(parent).filter(
+            slug__startswith=f'article-{self.seed}-',
+            first_published_at__gt=now - timedelta(hours=longest),
+            first_published_at__lte=now + timedelta(hours=1),
+        ).order_by('pk').values_list('pk', 'first_published_at', 'view_count')
+
+        decay = 0.5 ** (1 / VIEW_DECAY_HOURS)
+        hour_field = ArticleViewBucket._meta.get_field('hour')
+        rows = []
+        for pk, published, view_count in articles:
+            hour = trending.current_hour(published)
+            age = 0
+            while hour <= now:
+                # Rounded up with probability equal to the fraction, so the total stays unbiased
+                views = int(view_count * (1 - decay) * decay ** age + rng.random())
+                if views:
+                    rows.append((pk, hour_field.get_db_prep_save(hour, connection), views))
+                hour += timedelta(hours=1)
+                age += 1
+
+        with transaction.atomic():
+            for offset in range(0, len(rows), self.batch_size):
+                self.insert_rows(
+                    ArticleViewBucket._meta.db_table, ['article_id', 'hour', 'views'],
+                    rows[offset:offset + self.batch_size],
+                )
+        self.stdout.write(f'View buckets: {len(rows)} for {len(articles)} recent articles')
+
+    def published_at(self):
+        # Triangular towards the newest date: recent months are busier, as on a growing site
+        return self.newest - timedelta(seconds=int(self.rng.triangular(0, self.days * 86400, 0)))
+
+    def view_count(self):
+        return min(int(10 * self.rng.paretovariate(VIEW_SKEW)), 10_000_000)
+
+    def pick(self, population, weights, low, high):
+        if not population:
+            return set()
+        return {item.pk for item in self.rng.choices(population, weights, k=self.rng.randint(low, high))}
+
+    def build_article(self, slug):
+        raw_body, extracted = self.text.body()
+        article = NewsPage(
+            title=self.text.title(),
+            slug=slug,
+            intro=self.rng.choice(self.text.sentences),
+            body=raw_body,
+            author_id=self.rng.choices(self.authors, self.author_weights)[0].pk,
+            featured_image_id=self.rng.choice(self.images) if self.images else None,
+            is_breaking_news=self.rng.random() < 0.02,
+            is_featured=self.rng.random() < 0.05,
+            is_premium=self.rng.random() < 0.03,
+            view_count=self.view_count(),
+            body_text=extracted.text,
+            word_count=extracted.word_count,
+            excerpt=extracted.excerpt,
+            read_time=text.read_time(extracted.word_count),
+            first_published_at=self.published_at(),
+        )
+        article._category_ids = self.pick(self.categories, self.category_weights, 1, 3)
+        article._topic_ids = self.pick(self.topics, self.topic_weights, 0, 4)
+        return article
+
+    def build_video(self, slug):
+        video_type = 'short' if self.rng.random() < 0.3 else 'full'
+        youtube_id = ''.join(self.rng.choices(string.ascii_letters + string.digits + '-_', k=11))
+        video = VideoPage(
+            title=self.text.title(),
+            slug=slug,
+            video_type=video_type,
+            youtube_url=f'https://www.youtube.com/watch?v={youtube_id}',
+            duration=self.rng.randint(15, 60) if video_type == 'short' else self.rng.randint(120, 3600),
+            description=f'<p>{self.rng.choice(self.text.paragraphs)[0]}</p>',
+            thumbnail_id=self.rng.choice(self.images) if self.images else None,
+            view_count=self.view_count(),
+            is_featured=self.rng.random() < 0.05,
+            first_published_at=self.published_at(),
+        )
+        video._category_ids = self.pick(self.categories, self.category_weights, 0, 2)
+        video._topic_ids = self.pick(self.topics, self.topic_weights, 0, 3)
+        return video
+
+    def rebuild_derived(self, indexes):
+        """Bulk inserts skip the signal handlers, so rebuild what they would have maintained"""
+        commands = [
+            ('rebuild_category_closure',), ('reconcile_counters',), ('rebuild_archive_facets',),
+            ('refresh_trending',), ('build_sitemaps', '--all'),
+        ]
+        if indexes:
+            commands += [('rebuild_search_index',), ('rebuild_suggestions',), ('rebuild_related_articles',)]
+        for name, *arguments in commands:
+            started = time.monotonic()
+            call_command(name, *arguments, stdout=self.stdout)
+            self.stdout.write(f'{name}: {time.monotonic() - started:.1f}s')
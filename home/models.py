@@ -19,6 +19,9 @@ class FeaturedNewsBlock(blocks.StructBlock):
         ('featured', 'Featured with Sidebar')
     ], default='slider')
 
+    def get_cache_tags(self, value):
+        return {'featured'} | {f'page:{page.pk}' for page in value['categories'] if page}
+
     class Meta:
         template = 'blocks/featured_news.html'
         icon = 'pick'
@@ -33,6 +36,10 @@ class CategoryNewsBlock(blocks.StructBlock):
         ('compact', 'Compact Layout')
     ], default='grid')
 
+    def get_cache_tags(self, value):
+        category = value.get('category')
+        return {f'category:{category.pk}'} if category else {'news'}
+
     class Meta:
         template = 'blocks/category_news.html'
         icon = 'folder-open-inverse'
@@ -46,6 +53,9 @@ class VideoNewsBlock(blocks.StructBlock):
         ('carousel', 'Carousel')
     ], default='carousel')
 
+    def get_cache_tags(self, value):
+        return {'videos'}
+
     class Meta:
         template = 'blocks/video_news.html'
         icon = 'media'
@@ -59,6 +69,9 @@ class AuthorShowcaseBlock(blocks.StructBlock):
         ('carousel', 'Carousel')
     ], default='carousel')
 
+    def get_cache_tags(self, value):
+        return {'authors'}
+
     class Meta:
         template = 'blocks/author_showcase.html'
         icon = 'user'
@@ -154,7 +167,7 @@ class HomePage(Page):
         # Add breaking news if enabled
         if self.show_breaking_news:
             from news.models import NewsPage  # Import here to avoid circular import
-            context['breaking_news'] = NewsPage.objects.live().filter(
+            context['breaking_news'] = NewsPage.objects.listing().filter(
                 is_breaking_news=True
             ).order_by('-first_published_at')[:self.breaking_news_count]
 
@@ -167,23 +180,23 @@ class HomePage(Page):
         return context
 
     def get_state_news(self):
-        return NewsPage.objects.live().filter(
+        return NewsPage.objects.listing().filter(
             categories__slug='state'
         ).order_by('-first_published_at')
 
     def get_national_news(self):
-        return NewsPage.objects.live().filter(
+        return NewsPage.objects.listing().filter(
             categories__slug='national'
         ).order_by('-first_published_at')
 
     def get_international_news(self):
-        return NewsPage.objects.live().filter(
+        return NewsPage.objects.listing().filter(
             categories__slug='international'
         ).order_by('-first_published_at')
 
     @property
     def featured_news(self):
-        return NewsPage.objects.live().filter(
+        return NewsPage.objects.listing().filter(
             is_featured=True
         ).order_by('-first_published_at')[:5]
 
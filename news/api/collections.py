@@ -0,0 +1,236 @@
+"""
+Collections exposed by the read-only API.
+
+Each collection declares its fields, the default list fieldset, the filters
+it accepts and the cache tags its content depends on. Lists are read with a
+single ``values()`` projection of just the requested fields. Articles and
+videos are paged with the keyset ``CursorPaginator``. Snippets are paged by
+id.
+"""
+import base64
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+from .. import closure
+from ..models import NewsCategory, NewsPage, NewsTopic, VideoPage
+from ..models.authors import Author
+from ..pagination import CursorPaginator
+from .fields import Column, Embedded, PageURL, RelatedIds, Renditions, RichText, StreamBody
+
+MAX_LIMIT = 100
+
+
+def encode_id_cursor(pk):
+    return base64.urlsafe_b64encode(f'n|{pk}'.encode()).decode().rstrip('=')
+
+
+def decode_id_cursor(token):
+    try:
+        direction, pk = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode().split('|')
+        return int(pk) if direction == 'n' else None
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class Collection:
+    name = None
+    model = None
+    fields = {}
+    tags = set()
+    filters = {}
+    order_columns = ()
+
+    def queryset(self):
+        return self.model.objects.all()
+
+    def list_fields(self):
+        return [name for name, field in self.fields.items() if not field.detail_only]
+
+    def parse_fields(self, value, detail=False):
+        """The fields requested with ``?fields=a,b``, defaulting to the full list fieldset"""
+        if not value:
+            return list(self.fields) if detail else self.list_fields()
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValidationError({'fields': f"Unknown fields: {', '.join(unknown)}"})
+        return list(dict.fromkeys(['id', *names]))
+
+    def filter(self, queryset, params):
+        for param, apply in self.filters.items():
+            if params.get(param):
+                queryset = apply(queryset, params[param])
+        return queryset
+
+    def project(self, queryset, names):
+        columns = {'pk', *self.order_columns}
+        for name in names:
+            columns.update(self.fields[name].columns())
+        return queryset.values(*sorted(columns))
+
+    def serialize(self, rows, names):
+        rows = list(rows)
+        if rows:
+            for name in names:
+                self.fields[name].resolve(rows, name)
+        return [{name: row[name] for name in names} for row in rows]
+
+    def page(self, queryset, cursor, limit):
+        """Return ``(rows, next_cursor, previous_cursor)``"""
+        after = decode_id_cursor(cursor) if cursor else None
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+        rows = list(queryset.order_by('pk')[:limit + 1])
+        next_cursor = encode_id_cursor(rows[limit - 1]['pk']) if len(rows) > limit else None
+        return rows[:limit], next_cursor, None
+
+
+class PageCollection(Collection):
+    order_columns = ('first_published_at',)
+
+    def queryset(self):
+        return self.model.objects.live().public()
+
+    def page(self, queryset, cursor, limit):
+        page = CursorPaginator(queryset, per_page=limit).get_page(cursor)
+        return page.object_list, page.next_cursor, page.previous_cursor
+
+
+def _by_slug(relation):
+    return lambda queryset, slug: queryset.filter(**{f'{relation}__slug': slug})
+
+
+def _by_category_subtree(queryset, slug):
+    if closure.is_populated():
+        return queryset.filter(category_closure__category__slug=slug)
+    category = NewsCategory.objects.filter(slug=slug).first()
+    return queryset.in_category(category, include_descendants=True) if category else queryset.none()
+
+
+class Articles(PageCollection):
+    name = 'articles'
+    model = NewsPage
+    tags = {'news', 'authors'}
+    fields = {
+        'id': Column('pk'),
+        'title': Column('title'),
+        'slug': Column('slug'),
+        'url': PageURL(),
+        'subtitle': Column('subtitle'),
+        'intro': Column('intro'),
+        'excerpt': Column('excerpt'),
+        'published_at': Column('first_published_at'),
+        'updated_at': Column('last_published_at'),
+        'read_time': Column('read_time'),
+        'word_count': Column('word_count'),
+        'view_count': Column('view_count'),
+        'is_breaking_news': Column('is_breaking_news'),
+        'is_featured': Column('is_featured'),
+        'is_premium': Column('is_premium'),
+        'author': Embedded('author', ['name', 'slug']),
+        'image': Renditions('featured_image'),
+        'image_caption': Column('image_caption'),
+        'categories': RelatedIds(NewsPage, 'categories'),
+        'topics': RelatedIds(NewsPage, 'topics'),
+        'body': StreamBody('body'),
+        'body_text': Column('body_text', detail_only=True),
+    }
+    filters = {
+        'category': _by_category_subtree,
+        'topic': _by_slug('topics'),
+        'author': _by_slug('author'),
+        'breaking': lambda queryset, value: queryset.filter(is_breaking_news=value not in ('0', 'false')),
+    }
+
+
+class Videos(PageCollection):
+    name = 'videos'
+    model = VideoPage
+    tags = {'videos'}
+    fields = {
+        'id': Column('pk'),
+        'title': Column('title'),
+        'slug': Column('slug'),
+        'url': PageURL(),
+        'published_at': Column('first_published_at'),
+        'updated_at': Column('last_published_at'),
+        'video_type': Column('video_type'),
+        'youtube_url': Column('youtube_url'),
+        'duration': Column('duration'),
+        'view_count': Column('view_count'),
+        'is_featured': Column('is_featured'),
+        'is_trending': Column('is_trending'),
+        'thumbnail': Renditions('thumbnail'),
+        'categories': RelatedIds(VideoPage, 'categories'),
+        'topics': RelatedIds(VideoPage, 'topics'),
+        'description': RichText('description', detail_only=True),
+        'transcript': Column('transcript', detail_only=True),
+    }
+    filters = {
+        'category': _by_slug('categories'),
+        'topic': _by_slug('topics'),
+    }
+
+
+class Categories(Collection):
+    name = 'categories'
+    model = NewsCategory
+    # Article counts move with every publish
+    tags = {'categories', 'news'}
+    fields = {
+        'id': Column('pk'),
+        'name': Column('name'),
+        'slug': Column('slug'),
+        'description': Column('description'),
+        'parent': Column('parent_id'),
+        'order': Column('order'),
+        'show_in_menu': Column('show_in_menu'),
+        'featured': Column('featured'),
+        'article_count': Column('article_count'),
+        'icon': Renditions('icon'),
+    }
+
+
+class Topics(Collection):
+    name = 'topics'
+    model = NewsTopic
+    tags = {'topics', 'news'}
+    fields = {
+        'id': Column('pk'),
+        'name': Column('name'),
+        'slug': Column('slug'),
+        'description': Column('description'),
+        'is_featured': Column('is_featured'),
+        'is_trending': Column('is_trending'),
+        'article_count': Column('article_count'),
+        'follower_count': Column('follower_count'),
+        'image': Renditions('featured_image'),
+    }
+
+
+class Authors(Collection):
+    name = 'authors'
+    model = Author
+    tags = {'authors', 'news'}
+    fields = {
+        'id': Column('pk'),
+        'name': Column('name'),
+        'slug': Column('slug'),
+        'designation': Column('designation'),
+        'bio': Column('bio'),
+        'is_featured': Column('is_featured'),
+        'article_count': Column('article_count'),
+        'image': Renditions('profile_image'),
+    }
+
+
+COLLECTIONS = {collection.name: collection() for collection in (Articles, Videos, Categories, Topics, Authors)}
+
+
+def page_size(value):
+    default = getattr(settings, 'NEWS_API_PAGE_SIZE', 20)
+    try:
+        return max(1, min(int(value), MAX_LIMIT)) if value else default
+    except ValueError:
+        return default
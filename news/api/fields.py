@@ -0,0 +1,140 @@
+"""
+Fields of the read-only API.
+
+A field names the columns it needs from a ``values()`` projection and fills
+in its value for a whole batch of rows at once. Related ids and rendition
+URLs therefore take one query per field however many rows there are, and
+no model instance is created.
+"""
+from collections import defaultdict
+
+from wagtail.images import get_image_model
+from wagtail.rich_text import expand_db_html
+
+from .. import renditions
+from ..feeds import page_url
+
+
+class Field:
+    detail_only = False
+
+    def columns(self):
+        return []
+
+    def resolve(self, rows, name):
+        raise NotImplementedError
+
+
+class Column(Field):
+    def __init__(self, lookup, detail_only=False):
+        self.lookup = lookup
+        self.detail_only = detail_only
+
+    def columns(self):
+        return [self.lookup]
+
+    def resolve(self, rows, name):
+        for row in rows:
+            row[name] = row[self.lookup]
+
+
+class RichText(Column):
+    def resolve(self, rows, name):
+        for row in rows:
+            row[name] = expand_db_html(row[self.lookup]) if row[self.lookup] else ''
+
+
+class PageURL(Field):
+    def columns(self):
+        return ['url_path']
+
+    def resolve(self, rows, name):
+        for row in rows:
+            row[name] = page_url(row['url_path'])
+
+
+class Embedded(Field):
+    """A foreign key rendered as a small object, e.g. ``author`` as id, name and slug"""
+
+    def __init__(self, field, attributes):
+        self.field = field
+        self.attributes = attributes
+
+    def columns(self):
+        return [f'{self.field}_id', *(f'{self.field}__{attribute}' for attribute in self.attributes)]
+
+    def resolve(self, rows, name):
+        for row in rows:
+            pk = row[f'{self.field}_id']
+            row[name] = {
+                'id': pk, **{attribute: row[f'{self.field}__{attribute}'] for attribute in self.attributes}
+            } if pk else None
+
+
+class RelatedIds(Field):
+    """Ids across a many-to-many field, loaded from the through table"""
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+
+    def resolve(self, rows, name):
+        m2m = self.model._meta.get_field(self.field)
+        source, target = m2m.m2m_column_name(), m2m.m2m_reverse_name()
+        related = defaultdict(list)
+        links = m2m.remote_field.through.objects.filter(
+            **{f'{source}__in': [row['pk'] for row in rows]}
+        ).order_by(target).values_list(source, target)
+        for pk, related_pk in links:
+            related[pk].append(related_pk)
+        for row in rows:
+            row[name] = related[row['pk']]
+
+
+class Renditions(Field):
+    """
+    ``{filter_spec: url}`` for the pre-generated renditions of an image
+    foreign key. Only the specs the templates use are exposed, since those
+    are the ones generated ahead of time.
+    """
+
+    def __init__(self, field):
+        self.field = field
+
+    def columns(self):
+        return [f'{self.field}_id']
+
+    def resolve(self, rows, name):
+        specs = renditions.specs_by_field().get(self.field, ())
+        image_ids = {row[f'{self.field}_id'] for row in rows} - {None}
+        urls = defaultdict(dict)
+        if image_ids and specs:
+            Rendition = get_image_model().get_rendition_model()
+            storage = Rendition._meta.get_field('file').storage
+            for image_id, spec, file in Rendition.objects.filter(
+                    image_id__in=image_ids, filter_spec__in=specs).values_list('image_id', 'filter_spec', 'file'):
+                urls[image_id][spec] = storage.url(file)
+        for row in rows:
+            image_id = row[f'{self.field}_id']
+            row[name] = {'id': image_id, 'renditions': urls[image_id]} if image_id else None
+
+
+class StreamBody(Field):
+    """A StreamField as its raw blocks, with rich text links expanded"""
+    detail_only = True
+
+    def __init__(self, field):
+        self.field = field
+
+    def columns(self):
+        return [self.field]
+
+    def resolve(self, rows, name):
+        for row in rows:
+            blocks = []
+            for block in row[self.field].raw_data if row[self.field] else []:
+                value = block['value']
+                if block['type'] == 'paragraph':
+                    value = expand_db_html(value)
+                blocks.append({'type': block['type'], 'value': value, 'id': block.get('id')})
+            row[name] = blocks
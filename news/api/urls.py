@@ -0,0 +1,13 @@
+from django.urls import path
+
+from .views import collection_views
+
+app_name = 'news_api'
+
+urlpatterns = []
+for name in ('articles', 'videos', 'categories', 'topics', 'authors'):
+    list_view, detail_view = collection_views(name)
+    urlpatterns += [
+        path(f'{name}/', list_view, name=f'{name}_list'),
+        path(f'{name}/<int:pk>/', detail_view, name=f'{name}_detail'),
+    ]
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+from ..caching import get_tagged, make_key, set_tagged
+from ..feeds import freshness
+from .collections import COLLECTIONS, page_size
+
+
+class CollectionView(APIView):
+    """
+    Base view for a collection. Responses carry an ETag and Last-Modified
+    taken from the collection's cache tags. A matching conditional request
+    gets a 304 without touching the database, and otherwise the serialised
+    data is cached until those tags change.
+    """
+    collection = None
+
+    def get(self, request, *args, **kwargs):
+        collection = COLLECTIONS[self.collection]
+        etag, last_modified = freshness(collection.tags)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            key = make_key('news:api', request.get_full_path())
+            data = get_tagged(key, collection.tags)
+            if data is None:
+                data = self.get_data(request, collection, *args, **kwargs)
+                set_tagged(key, data, collection.tags, getattr(settings, 'NEWS_API_CACHE_TIMEOUT', 300))
+            response = Response(data)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'NEWS_API_MAX_AGE', 60))
+        return response
+
+    def get_data(self, request, collection, *args, **kwargs):
+        raise NotImplementedError
+
+
+class ListView(CollectionView):
+    def get_data(self, request, collection):
+        names = collection.parse_fields(request.query_params.get('fields'))
+        queryset = collection.project(collection.filter(collection.queryset(), request.query_params), names)
+        rows, next_cursor, previous_cursor = collection.page(
+            queryset, request.query_params.get('cursor'), page_size(request.query_params.get('limit'))
+        )
+        url = request.build_absolute_uri()
+        return {
+            'next': replace_query_param(url, 'cursor', next_cursor) if next_cursor else None,
+            'previous': replace_query_param(url, 'cursor', previous_cursor) if previous_cursor else None,
+            'results': collection.serialize(rows, names),
+        }
+
+
+class DetailView(CollectionView):
+    def get_data(self, request, collection, pk):
+        names = collection.parse_fields(request.query_params.get('fields'), detail=True)
+        rows = list(collection.project(collection.queryset().filter(pk=pk), names))
+        if not rows:
+            raise Http404
+        return collection.serialize(rows, names)[0]
+
+
+def collection_views(name):
+    return (
+        ListView.as_view(collection=name),
+        DetailView.as_view(collection=name),
+    )
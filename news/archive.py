@@ -0,0 +1,129 @@
+"""
+Materialised archive facets.
+
+``ArchiveFacet`` holds live article counts per month, overall and per
+category. Publishing, unpublishing and retagging recompute only the months
+they touch, with a range query on the indexed ``first_published_at``, so
+archive navigation never aggregates the article table.
+"""
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+from django.utils.dates import MONTHS
+
+
+def month_range(year, month):
+    """Aware ``[start, end)`` bounds of a month in the current time zone"""
+    tz = timezone.get_current_timezone()
+    start = datetime(year, month, 1, tzinfo=tz)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=tz)
+    return start, end
+
+
+def year_range(year):
+    tz = timezone.get_current_timezone()
+    return datetime(year, 1, 1, tzinfo=tz), datetime(year + 1, 1, 1, tzinfo=tz)
+
+
+def month_of(value):
+    if value is None:
+        return None
+    value = timezone.localtime(value)
+    return value.year, value.month
+
+
+def filter_published(queryset, year=None, month=None):
+    """Restrict to a year or month with a range on first_published_at instead of date extracts"""
+    if year and month:
+        start, end = month_range(year, month)
+    elif year:
+        start, end = year_range(year)
+    else:
+        return queryset
+    return queryset.filter(first_published_at__gte=start, first_published_at__lt=end)
+
+
+def recompute_month(year, month):
+    from .models import ArchiveFacet, NewsPage
+
+    articles = filter_published(NewsPage.objects.live(), year, month)
+    total = articles.count()
+    per_category = NewsPage.categories.through.objects.filter(
+        newspage__in=articles.values('pk')
+    ).values('newscategory_id').annotate(articles=Count('newspage_id', distinct=True))
+
+    facets = [ArchiveFacet(year=year, month=month, count=total)] if total else []
+    facets += [
+        ArchiveFacet(year=year, month=month, category_id=row['newscategory_id'], count=row['articles'])
+        for row in per_category
+    ]
+    with transaction.atomic():
+        ArchiveFacet.objects.filter(year=year, month=month).delete()
+        ArchiveFacet.objects.bulk_create(facets)
+
+
+def schedule_recompute(*dates):
+    """Recompute the months of the given datetimes once the current transaction commits"""
+    months = {month_of(value) for value in dates} - {None}
+
+    def recompute():
+        for year, month in months:
+            recompute_month(year, month)
+
+    if months:
+        transaction.on_commit(recompute)
+
+
+def rebuild():
+    """Recompute every month that has live articles, returning the number of months"""
+    from .models import ArchiveFacet, NewsPage
+
+    months = NewsPage.objects.live().exclude(first_published_at=None).annotate(
+        year=ExtractYear('first_published_at'), month=ExtractMonth('first_published_at')
+    ).values_list('year', 'month').distinct()
+    months = set(months)
+    with transaction.atomic():
+        ArchiveFacet.objects.all().delete()
+        for year, month in months:
+            recompute_month(year, month)
+    return len(months)
+
+
+def available_years():
+    from .models import ArchiveFacet
+
+    return [
+        {'number': row['year'], 'count': row['articles']}
+        for row in ArchiveFacet.objects.filter(category=None).values('year').annotate(
+            articles=Sum('count')
+        ).order_by('-year')
+    ]
+
+
+def available_months(year=None):
+    from .models import ArchiveFacet
+
+    facets = ArchiveFacet.objects.filter(category=None)
+    if year:
+        facets = facets.filter(year=year)
+    return [
+        {'number': row['month'], 'name': MONTHS[row['month']], 'count': row['articles']}
+        for row in facets.values('month').annotate(articles=Sum('count')).order_by('month')
+    ]
+
+
+def available_categories(year=None, month=None):
+    """Categories with live articles in the selection, each annotated with ``archive_count``"""
+    from .models import NewsCategory
+
+    filters = {'archive_facets__count__gt': 0}
+    if year:
+        filters['archive_facets__year'] = year
+    if month:
+        filters['archive_facets__month'] = month
+    return NewsCategory.objects.filter(**filters).annotate(
+        archive_count=Sum('archive_facets__count')
+    ).order_by('name')
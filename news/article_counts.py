@@ -0,0 +1,114 @@
+"""
+Denormalised article counters.
+
+``Author.article_count``, ``NewsCategory.article_count`` and
+``NewsTopic.article_count`` count live articles. The handlers adjust them
+with +/- deltas as articles are published, unpublished, deleted or retagged,
+and ``Author.total_views`` accumulates the flushed view deltas of an
+author's articles. ``reconcile`` recomputes them all in bulk and fixes any
+drift.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def apply_deltas(model, deltas, field='article_count'):
+    """Add ``{pk: delta}`` to a counter field with one UPDATE per distinct delta"""
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if pk and delta:
+            by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        model.objects.filter(pk__in=pks).update(**{field: Greatest(F(field) + delta, Value(0))})
+
+
+def article_links(article):
+    """The ``(category_ids, topic_ids)`` currently stored for an article"""
+    from .models import NewsPage
+
+    categories = list(NewsPage.categories.through.objects.filter(
+        newspage_id=article.pk).values_list('newscategory_id', flat=True))
+    topics = list(NewsPage.topics.through.objects.filter(
+        newspage_id=article.pk).values_list('newstopic_id', flat=True))
+    return categories, topics
+
+
+def schedule(authors=None, categories=None, topics=None):
+    """Apply ``Counter`` deltas per model once the current transaction commits"""
+    from .models import NewsCategory, NewsTopic
+    from .models.authors import Author
+
+    def apply():
+        apply_deltas(Author, authors or {})
+        apply_deltas(NewsCategory, categories or {})
+        apply_deltas(NewsTopic, topics or {})
+
+    if authors or categories or topics:
+        transaction.on_commit(apply)
+
+
+def article_went_live(article, sign=1, links=None):
+    categories, topics = links or article_links(article)
+    schedule(
+        authors=Counter({article.author_id: sign}),
+        categories=Counter({pk: sign for pk in categories}),
+        topics=Counter({pk: sign for pk in topics}),
+    )
+
+
+def roll_up_views(deltas):
+    """Add flushed ``{article_id: views}`` to the authors' ``total_views``"""
+    from .models import NewsPage
+    from .models.authors import Author
+
+    authors = Counter()
+    for article_id, author_id in NewsPage.objects.filter(pk__in=deltas).values_list('pk', 'author_id'):
+        authors[author_id] += deltas[article_id]
+    apply_deltas(Author, authors, field='total_views')
+
+
+def _drifted(queryset, field, actual):
+    return queryset.annotate(actual=Coalesce(actual, 0)).filter(~Q(**{field: F('actual')}))
+
+
+def reconcile(dry_run=False):
+    """Recompute every counter, returning ``{label: number of rows that had drifted}``"""
+    from .models import NewsCategory, NewsPage, NewsTopic
+    from .models.authors import Author
+
+    live = NewsPage.objects.live()
+    by_author = live.filter(author=OuterRef('pk')).order_by().values('author')
+    through = {
+        NewsCategory: NewsPage.categories.through.objects.filter(
+            newscategory=OuterRef('pk'), newspage__live=True
+        ).order_by().values('newscategory'),
+        NewsTopic: NewsPage.topics.through.objects.filter(
+            newstopic=OuterRef('pk'), newspage__live=True
+        ).order_by().values('newstopic'),
+    }
+    counters = [
+        ('authors.article_count', Author, 'article_count',
+         Subquery(by_author.annotate(total=Count('pk')).values('total'))),
+        ('authors.total_views', Author, 'total_views',
+         Subquery(by_author.annotate(total=Sum('view_count')).values('total'))),
+    ] + [
+        (f'{model._meta.verbose_name_plural.lower()}.article_count', model, 'article_count',
+         Subquery(links.annotate(total=Count('newspage')).values('total')))
+        for model, links in through.items()
+    ]
+
+    drift = {}
+    with transaction.atomic():
+        for label, model, field, actual in counters:
+            rows = list(_drifted(model.objects.all(), field, actual).values_list('pk', 'actual'))
+            drift[label] = len(rows)
+            if rows and not dry_run:
+                by_value = defaultdict(list)
+                for pk, value in rows:
+                    by_value[value].append(pk)
+                for value, pks in by_value.items():
+                    model.objects.filter(pk__in=pks).update(**{field: value})
+    return drift
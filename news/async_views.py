@@ -0,0 +1,161 @@
+"""
+Async versions of the listing views, used when NEWS_ASYNC_VIEWS is on (the
+ASGI deployment). Lookups use the async ORM. Independent queries are
+gathered concurrently, and template rendering runs in the request's sync
+thread because template tags still query synchronously. A slow client
+therefore holds an idle coroutine instead of a whole worker.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404, render
+from django.utils.cache import patch_cache_control
+
+from search.results import paginate_results
+from search.suggest import suggester
+
+from . import archive
+from .concurrency import gather
+from .models import NewsCategory, NewsTopic, NewsPage, VideoPage
+from .models.authors import Author
+from .pagination import PER_PAGE, paginate_listing
+from .trending import trending_articles
+from .views import _archive_period
+
+arender = sync_to_async(render)
+apaginate_listing = sync_to_async(paginate_listing)
+
+
+def _category_listing(request, category, include_descendants):
+    # in_category may look up the closure state and the category tree, which only the sync ORM can do
+    news_list = NewsPage.objects.listing().in_category(category, include_descendants)
+    return paginate_listing(
+        request, news_list, count_key=f"category:{category.pk}:{'tree' if include_descendants else 'exact'}"
+    )
+
+
+async def category_view(request, category_slug):
+    category = await aget_object_or_404(NewsCategory, slug=category_slug)
+    include_descendants = request.GET.get(
+        'descendants', '1' if getattr(settings, 'NEWS_CATEGORY_INCLUDE_DESCENDANTS', True) else '0'
+    ) != '0'
+    news_items = await sync_to_async(_category_listing)(request, category, include_descendants)
+
+    return await arender(request, 'news/category_page.html', {
+        'category': category,
+        'news_items': news_items,
+    })
+
+
+async def topic_view(request, topic_slug):
+    topic = await aget_object_or_404(NewsTopic, slug=topic_slug)
+    news_list = NewsPage.objects.listing().filter(topics=topic)
+    news_items = await apaginate_listing(request, news_list, count_key=f'topic:{topic.pk}')
+
+    return await arender(request, 'news/topic_page.html', {
+        'topic': topic,
+        'news_items': news_items,
+    })
+
+
+async def author_view(request, author_slug):
+    author = await aget_object_or_404(Author, slug=author_slug)
+    news_list = NewsPage.objects.listing().filter(author=author)
+    news_items = await apaginate_listing(request, news_list, count_key=f'author:{author.pk}')
+
+    return await arender(request, 'news/author_page.html', {
+        'author': author,
+        'news_items': news_items,
+    })
+
+
+async def archive_view(request):
+    year, month = _archive_period(request)
+    category = request.GET.get('category')
+
+    news_list = archive.filter_published(NewsPage.objects.listing(), year, month)
+    if category:
+        news_list = news_list.filter(categories__slug=category)
+
+    news_items, years, months, categories = await gather(
+        lambda: paginate_listing(request, news_list, count_key=f'archive:{year}:{month}:{category}'),
+        archive.available_years,
+        lambda: archive.available_months(year),
+        lambda: list(archive.available_categories(year, month)),
+    )
+
+    return await arender(request, 'news/archive_page.html', {
+        'news_items': news_items,
+        'selected_year': year,
+        'selected_month': month,
+        'selected_category': category,
+        'available_years': years,
+        'available_months': months,
+        'available_categories': categories,
+    })
+
+
+async def search_view(request):
+    query = request.GET.get('q', '')
+    news_items = []
+
+    if query:
+        news_items = await sync_to_async(paginate_results)(
+            query, request.GET.get('page'), PER_PAGE, models=[NewsPage]
+        )
+
+    return await arender(request, 'news/search_results.html', {
+        'query': query,
+        'news_items': news_items,
+    })
+
+
+async def search_suggest_view(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 8)), 20))
+    except ValueError:
+        limit = 8
+
+    suggestions = []
+    if len(query) >= 2:
+        # Reading the snapshot and delta log touches files, so it stays off the event loop
+        suggestions = await sync_to_async(suggester.suggest)(query, limit=limit)
+    response = JsonResponse({'query': query, 'suggestions': suggestions})
+    patch_cache_control(response, public=True, max_age=60)
+    return response
+
+
+async def breaking_news_view(request):
+    news_list = NewsPage.objects.listing().filter(is_breaking_news=True)
+    news_items = await apaginate_listing(request, news_list, count_key='breaking')
+
+    return await arender(request, 'news/breaking_news_page.html', {
+        'news_items': news_items,
+    })
+
+
+async def trending_news_view(request):
+    news_items = await sync_to_async(trending_articles)('24h', limit=30)
+
+    return await arender(request, 'news/trending_news_page.html', {
+        'news_items': news_items,
+    })
+
+
+async def news_index(request):
+    news_list = NewsPage.objects.listing()
+    news_items = await apaginate_listing(request, news_list, count_key='all')
+
+    return await arender(request, 'news/news_index_page.html', {
+        'news_items': news_items,
+    })
+
+
+async def video_index(request):
+    videos = VideoPage.objects.listing()
+    video_items = await apaginate_listing(request, videos, count_key='videos')
+
+    return await arender(request, 'news/video_index_page.html', {
+        'video_items': video_items,
+    })
@@ -0,0 +1,44 @@
+"""
+Breadcrumbs resolved from treebeard paths.
+
+A page's ancestors are exactly the pages whose ``path`` is a prefix of its
+own, one step length at a time, so they load with a single ``path__in``
+query. Titles and URLs are cached per page path and site, and tagged with
+``pagetree:<path>`` for every ancestor. Renaming, unpublishing or moving a
+page then expires the breadcrumbs of its whole subtree.
+"""
+from wagtail.models import Page, Site
+
+from .caching import get_tagged, invalidate_tags, make_key, set_tagged
+
+
+def ancestor_paths(path):
+    """Paths of the page and its ancestors, root excluded, shallowest first"""
+    step = Page.steplen
+    return [path[:end] for end in range(2 * step, len(path) + 1, step)]
+
+
+def tree_tags(path):
+    return {f'pagetree:{ancestor}' for ancestor in ancestor_paths(path)}
+
+
+def get_breadcrumbs(page, request=None):
+    """Return ``[{'title', 'url', 'pk'}, ...]`` from the site root down to ``page``"""
+    site = Site.find_for_request(request) if request is not None else None
+    key = make_key('news:breadcrumbs', page.path, site.pk if site else None)
+    tags = tree_tags(page.path)
+    crumbs = get_tagged(key, tags)
+    if crumbs is not None:
+        return crumbs
+
+    ancestors = Page.objects.filter(path__in=ancestor_paths(page.path)).order_by('path')
+    crumbs = [
+        {'title': ancestor.title, 'url': ancestor.get_url(request), 'pk': ancestor.pk}
+        for ancestor in ancestors
+    ]
+    set_tagged(key, crumbs, tags)
+    return crumbs
+
+
+def invalidate_subtree(page):
+    invalidate_tags(f'pagetree:{page.path}')
@@ -0,0 +1,158 @@
+"""
+Tag-based cache invalidation.
+
+Every tag has a version stamp in the cache. Entries stored with
+``set_tagged`` remember the stamps of their tags, and ``get_tagged`` only
+returns an entry while all of those stamps are unchanged. Invalidating a tag
+therefore expires exactly the entries that depend on it without having to
+track or delete them. Stamps are microsecond timestamps, so the newest stamp
+of a set of tags doubles as a last-modified time.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+TAG_PREFIX = 'news:tag'
+STATS_PREFIX = 'news:fragment-stats'
+SECTIONS_KEY = f'{STATS_PREFIX}:sections'
+
+
+def _tag_key(tag):
+    return f'{TAG_PREFIX}:{tag}'
+
+
+def _new_stamp():
+    return time.time_ns() // 1000
+
+
+def tag_versions(tags):
+    """Return ``{tag: stamp}``, stamping tags that have never been seen or were evicted"""
+    tags = sorted(set(tags))
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+    versions = {keys[key]: stamp for key, stamp in found.items()}
+    missing = [tag for tag in tags if tag not in versions]
+    if missing:
+        stamp = _new_stamp()
+        for tag in missing:
+            # add() so that a concurrent invalidation is not overwritten
+            cache.add(_tag_key(tag), stamp, timeout=None)
+        versions.update({
+            keys[key]: value for key, value in cache.get_many([_tag_key(tag) for tag in missing]).items()
+        })
+    return versions
+
+
+def invalidate_tags(*tags):
+    """
+    Expire every entry tagged with any of ``tags``.
+    If NEWS_CACHE_PURGE_HANDLER names a callable, it is called with the tags
+    so that a CDN can purge the matching surrogate keys as well.
+    """
+    tags = {tag for tag in tags if tag}
+    if not tags:
+        return
+    stamp = _new_stamp()
+    cache.set_many({_tag_key(tag): stamp for tag in tags}, timeout=None)
+
+    handler = getattr(settings, 'NEWS_CACHE_PURGE_HANDLER', None)
+    if handler:
+        import_string(handler)(sorted(tags))
+
+
+def last_modified(tags):
+    """Time of the most recent invalidation of any of ``tags``, as a POSIX timestamp"""
+    versions = tag_versions(tags)
+    return max(versions.values()) / 1_000_000 if versions else None
+
+
+def get_tagged(key, tags=None):
+    """
+    Return the cached value for ``key`` if none of its tags were invalidated, else None.
+    When ``tags`` is omitted, the tags the entry was stored with are checked.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    versions, value = entry
+    if versions != tag_versions(versions if tags is None else tags):
+        return None
+    return value
+
+
+def set_tagged(key, value, tags, timeout=None):
+    cache.set(key, (tag_versions(tags), value), timeout)
+
+
+def make_key(prefix, *parts):
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'{prefix}:{digest}'
+
+
+def _record(section, outcome):
+    key = f'{STATS_PREFIX}:{section}:{outcome}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def cached_fragment(section, tags, render, vary=()):
+    """
+    Return rendered HTML for a named section, calling ``render`` on a miss.
+    Hits and misses are counted per section for ``fragment_cache_report``.
+    """
+    key = make_key(f'news:fragment:{section}', *vary, *sorted(tags))
+    html = get_tagged(key, tags)
+    if html is not None:
+        _record(section, 'hit')
+        return html
+
+    _record(section, 'miss')
+    sections = cache.get(SECTIONS_KEY) or set()
+    if section not in sections:
+        cache.set(SECTIONS_KEY, sections | {section}, timeout=None)
+
+    html = render()
+    set_tagged(key, html, tags, getattr(settings, 'NEWS_FRAGMENT_CACHE_TIMEOUT', 300))
+    return html
+
+
+def fragment_stats():
+    """Return ``{section: (hits, misses)}`` for every section rendered so far"""
+    sections = sorted(cache.get(SECTIONS_KEY) or ())
+    keys = [f'{STATS_PREFIX}:{section}:{outcome}' for section in sections for outcome in ('hit', 'miss')]
+    counts = cache.get_many(keys)
+    return {
+        section: (counts.get(f'{STATS_PREFIX}:{section}:hit', 0), counts.get(f'{STATS_PREFIX}:{section}:miss', 0))
+        for section in sections
+    }
+
+
+def page_cache_tags(page, previous=None):
+    """
+    Dependency tags for a NewsPage or VideoPage.
+    ``previous`` is the pre-save state stashed by the handlers, so that
+    a story that stops being breaking or featured expires those sections too.
+    """
+    from .models import NewsPage, VideoPage
+
+    tags = {f'page:{page.pk}'}
+    tags.update(f'category:{pk}' for pk in page.categories.values_list('pk', flat=True))
+    tags.update(f'topic:{pk}' for pk in page.topics.values_list('pk', flat=True))
+    previous = previous or {}
+
+    if isinstance(page, NewsPage):
+        tags.add('news')
+        tags.update(f'author:{pk}' for pk in {page.author_id, previous.get('author_id')} if pk)
+        if page.is_breaking_news or previous.get('is_breaking_news'):
+            tags.add('breaking')
+        if page.is_featured or previous.get('is_featured'):
+            tags.add('featured')
+    elif isinstance(page, VideoPage):
+        tags.add('videos')
+    return tags
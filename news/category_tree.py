@@ -0,0 +1,111 @@
+"""
+Process-wide category tree.
+
+All categories are loaded with one query. Ancestry, descendants, full names
+and menu order are precomputed, so the model methods can answer without
+touching the database. The tree is keyed on the version of the
+``categories`` cache tag, which lives in the shared cache. Category saves and
+deletes already invalidate that tag, so every worker rebuilds its copy on its
+next lookup after an edit; an evicted tag gets a new stamp, which also makes
+every worker rebuild. Background jobs that write derived data, such as the
+closure syncs, use ``load()`` instead so that they never act on a copy that
+is up to VERSION_CHECK_INTERVAL seconds old.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from .caching import tag_versions
+
+# Seconds a worker trusts its tree before checking the shared version again
+VERSION_CHECK_INTERVAL = 1
+
+
+class CategoryTree:
+    def __init__(self, categories):
+        self.nodes = {category.pk: category for category in categories}
+        self.children = defaultdict(list)
+        for category in sorted(self.nodes.values(), key=lambda category: (category.order, category.name)):
+            # Categories whose parent was deleted are treated as roots
+            parent_id = category.parent_id if category.parent_id in self.nodes else None
+            self.children[parent_id].append(category.pk)
+
+        self.ancestors = {}
+        for pk in self.nodes:
+            path, current, seen = [], pk, set()
+            while current is not None and current not in seen:
+                seen.add(current)
+                path.append(current)
+                current = self.nodes[current].parent_id if self.nodes[current].parent_id in self.nodes else None
+            self.ancestors[pk] = tuple(reversed(path))
+
+        self.menu_descendants = {}
+        for pk in self.nodes:
+            self.menu_descendants[pk] = tuple(self._walk(pk, menu_only=True))
+
+    def _walk(self, pk, menu_only=False):
+        stack = list(reversed(self.children[pk]))
+        seen = set()
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            if menu_only and not self.nodes[current].show_in_menu:
+                continue
+            yield current
+            stack.extend(reversed(self.children[current]))
+
+    def hierarchy(self, pk):
+        """Root-first list of the category and its ancestors"""
+        return [self.nodes[ancestor] for ancestor in self.ancestors.get(pk, ())]
+
+    def full_name(self, pk):
+        return ' > '.join(category.name for category in self.hierarchy(pk))
+
+    def menu_children(self, pk):
+        return [self.nodes[child] for child in self.children[pk] if self.nodes[child].show_in_menu]
+
+    def descendants(self, pk, menu_only=True):
+        if menu_only:
+            return [self.nodes[descendant] for descendant in self.menu_descendants.get(pk, ())]
+        return [self.nodes[descendant] for descendant in self._walk(pk)]
+
+    def descendant_ids(self, pk):
+        """Ids of every descendant, including those hidden from menus"""
+        return [descendant for descendant in self._walk(pk)]
+
+    def menu(self):
+        """Top-level menu categories in display order"""
+        return self.menu_children(None)
+
+
+_lock = threading.Lock()
+_state = {'tree': None, 'version': None, 'checked': 0.0}
+
+
+def load():
+    """A tree read straight from the database, bypassing this worker's copy"""
+    from .models import NewsCategory
+
+    return CategoryTree(NewsCategory.objects.all())
+
+
+def get_tree():
+    now = time.monotonic()
+    if _state['tree'] is not None and now - _state['checked'] < VERSION_CHECK_INTERVAL:
+        return _state['tree']
+
+    version = tag_versions(['categories'])['categories']
+    with _lock:
+        if _state['tree'] is None or _state['version'] != version:
+            _state['tree'] = load()
+            _state['version'] = version
+        _state['checked'] = now
+        return _state['tree']
+
+
+def clear():
+    """Drop this worker's copy, e.g. right after a local category edit"""
+    with _lock:
+        _state['tree'] = None
@@ -0,0 +1,120 @@
+"""
+Article to category-subtree mapping.
+
+``ArticleCategoryClosure`` pairs every article with its categories and all of
+their ancestors, taken from a category tree loaded when the sync runs. A
+parent category page is then one join on ``(category, article)``, exactly as
+fast as a leaf. The rows of an article are resynced after it is retagged, and
+the articles under a category are resynced after it moves in the tree.
+
+Articles that predate the table are backfilled after every ``migrate``.
+Until the table has any rows at all, subtree queries fall back to filtering
+on the category ids of the subtree, so they are never silently empty.
+"""
+from django.db import transaction
+
+from . import category_tree
+from .category_tree import get_tree
+
+CHUNK_SIZE = 2000
+
+_state = {'populated': False}
+
+
+def closure_for(category_ids, tree=None):
+    tree = tree or get_tree()
+    closure = set()
+    for category_id in category_ids:
+        closure.update(tree.ancestors.get(category_id, (category_id,)))
+    return closure
+
+
+def sync_articles(article_ids):
+    """Bring the closure rows of the given articles in line with their categories"""
+    from .models import ArticleCategoryClosure, NewsPage
+
+    article_ids = list(article_ids)
+    tree = category_tree.load()
+    for start in range(0, len(article_ids), CHUNK_SIZE):
+        chunk = article_ids[start:start + CHUNK_SIZE]
+        direct = {article_id: set() for article_id in chunk}
+        for article_id, category_id in NewsPage.categories.through.objects.filter(
+                newspage_id__in=chunk).values_list('newspage_id', 'newscategory_id'):
+            direct[article_id].add(category_id)
+        stored = {article_id: set() for article_id in chunk}
+        for article_id, category_id in ArticleCategoryClosure.objects.filter(
+                article_id__in=chunk).values_list('article_id', 'category_id'):
+            stored[article_id].add(category_id)
+
+        additions, removals = [], {}
+        for article_id in chunk:
+            wanted = closure_for(direct[article_id], tree)
+            additions += [
+                ArticleCategoryClosure(article_id=article_id, category_id=category_id)
+                for category_id in wanted - stored[article_id]
+            ]
+            if stored[article_id] - wanted:
+                removals[article_id] = stored[article_id] - wanted
+
+        with transaction.atomic():
+            for article_id, category_ids in removals.items():
+                ArticleCategoryClosure.objects.filter(article_id=article_id, category_id__in=category_ids).delete()
+            ArticleCategoryClosure.objects.bulk_create(additions, ignore_conflicts=True)
+
+
+def articles_under(category_id):
+    """Ids of the articles tagged with a category or any of its descendants"""
+    from .models import NewsPage
+
+    category_ids = [category_id, *category_tree.load().descendant_ids(category_id)]
+    return NewsPage.categories.through.objects.filter(
+        newscategory_id__in=category_ids
+    ).values_list('newspage_id', flat=True).distinct()
+
+
+def is_populated():
+    """Whether the closure has rows yet; once it has, it is kept in step with every retag"""
+    if not _state['populated']:
+        from .models import ArticleCategoryClosure
+
+        _state['populated'] = ArticleCategoryClosure.objects.exists()
+    return _state['populated']
+
+
+def subtree_ids(category_id):
+    """The category and all of its descendants, for filtering while the closure is empty"""
+    return [category_id, *get_tree().descendant_ids(category_id)]
+
+
+def schedule_sync(article_ids):
+    article_ids = set(article_ids)
+    if article_ids:
+        transaction.on_commit(lambda: sync_articles(article_ids))
+
+
+def schedule_category_move(category_id):
+    """Resync the subtree of a category whose parent changed, once the new tree is visible"""
+    def sync():
+        sync_articles(list(articles_under(category_id)))
+
+    transaction.on_commit(sync)
+
+
+def rebuild():
+    """Resync every article, returning how many were processed"""
+    from .models import NewsPage
+
+    article_ids = list(NewsPage.objects.values_list('pk', flat=True))
+    sync_articles(article_ids)
+    return len(article_ids)
+
+
+def backfill():
+    """Sync the articles that have categories but no closure rows, returning how many there were"""
+    from .models import NewsPage
+
+    article_ids = list(NewsPage.objects.filter(
+        categories__isnull=False, category_closure__isnull=True
+    ).values_list('pk', flat=True).distinct())
+    sync_articles(article_ids)
+    return len(article_ids)
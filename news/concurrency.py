@@ -0,0 +1,70 @@
+"""
+Concurrent evaluation of independent queries.
+
+A view that needs several unrelated result sets, such as a listing page
+with its featured, breaking and trending boxes, can run them side by side
+instead of one after another. Each query runs in a bounded thread pool on
+that thread's own database connection, so the request waits only as long
+as its slowest query. Connections in the pool follow CONN_MAX_AGE like any
+request thread. Inside a transaction the queries run in order on the
+caller's connection, because other connections would not see its writes.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+THREAD_NAME_PREFIX = 'news-query'
+
+_lock = threading.Lock()
+_executor = None
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'NEWS_QUERY_THREADS', 8),
+                thread_name_prefix=THREAD_NAME_PREFIX,
+            )
+        return _executor
+
+
+def _concurrent(thunks):
+    return (
+        len(thunks) > 1
+        and getattr(settings, 'NEWS_CONCURRENT_QUERIES', True)
+        and not connection.in_atomic_block
+    )
+
+
+def _evaluate(thunk):
+    try:
+        return thunk()
+    finally:
+        close_old_connections()
+
+
+def run_concurrently(*thunks):
+    """Call each of ``thunks`` (which should fully evaluate its query) and return their results in order"""
+    if not _concurrent(thunks):
+        return [thunk() for thunk in thunks]
+    # Each query runs in a copy of the caller's context, so context-based
+    # state such as replica routing carries over to the pool threads
+    executor = get_executor()
+    futures = [executor.submit(contextvars.copy_context().run, _evaluate, thunk) for thunk in thunks]
+    return [future.result() for future in futures]
+
+
+async def gather(*thunks):
+    """Async counterpart of ``run_concurrently`` for use in async views"""
+    if not await sync_to_async(_concurrent)(thunks):
+        return [await sync_to_async(thunk)() for thunk in thunks]
+    return list(await asyncio.gather(*(
+        sync_to_async(_evaluate, thread_sensitive=False, executor=get_executor())(thunk) for thunk in thunks
+    )))
@@ -0,0 +1,202 @@
+import atexit
+import logging
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .signals import view_counts_flushed
+from .write_queue import write_queue
+
+logger = logging.getLogger(__name__)
+
+STATS_CACHE_PREFIX = 'news:view-counter'
+WORKERS_KEY = f'{STATS_CACHE_PREFIX}:workers'
+# Seconds between buffer snapshots a worker publishes while recording views
+PUBLISH_INTERVAL = 1
+
+
+class ViewCounter:
+    """
+    Write-behind buffer for ``view_count`` increments.
+
+    Views are accumulated per (model, pk) in process memory and written back
+    as one ``UPDATE ... SET view_count = view_count + n`` per distinct delta,
+    instead of a read-modify-write on every request. A background thread
+    flushes at least every ``flush_interval`` seconds, and a flush is queued
+    once ``max_pending`` rows are waiting, so the write latency is bounded.
+    Flushes go through the single-writer queue, never the request thread.
+
+    A buffer is drained atomically before it is written and merged back only
+    if the write fails, so an increment is applied at most once. Buffers are
+    flushed on interpreter exit, and a forked worker discards the buffer it
+    inherited so that a parent's pending views are never counted twice.
+    """
+
+    def __init__(self, flush_interval=None, max_pending=None):
+        self.flush_interval = flush_interval or getattr(settings, 'NEWS_VIEW_COUNT_FLUSH_INTERVAL', 10)
+        self.max_pending = max_pending or getattr(settings, 'NEWS_VIEW_COUNT_MAX_PENDING', 1000)
+        self._lock = threading.Lock()
+        self._reset()
+        atexit.register(self.flush)
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._worker = f'{socket.gethostname()}:{self._pid}'
+        self._pending = defaultdict(int)
+        self._thread = None
+        self._published_at = 0.0
+        self._stats = {
+            'recorded': 0,
+            'flushed': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'last_flush_at': None,
+            'last_flush_duration': None,
+        }
+
+    def _ensure_worker(self):
+        if self._pid != os.getpid():
+            # Forked after views were buffered: the parent owns those views
+            self._reset()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='view-counter-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                write_queue.submit(self.flush).result()
+            except Exception:
+                logger.exception('Periodic view count flush failed')
+
+    def record(self, model, pk, amount=1):
+        """Buffer ``amount`` views for the given model instance"""
+        with self._lock:
+            self._ensure_worker()
+            self._pending[(model._meta.label, pk)] += amount
+            self._stats['recorded'] += amount
+            should_flush = len(self._pending) >= self.max_pending
+            should_publish = time.monotonic() - self._published_at >= PUBLISH_INTERVAL
+            if should_publish:
+                self._published_at = time.monotonic()
+
+        if should_flush:
+            # Hand the write to the writer thread rather than making this request wait on it
+            write_queue.submit(self.flush)
+        elif should_publish:
+            self._publish_stats()
+
+    def flush(self):
+        """Write all buffered deltas to the database, returning the number of views flushed"""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            pending, self._pending = self._pending, defaultdict(int)
+
+        if not pending:
+            self._publish_stats()
+            return 0
+
+        # Group as {model: {delta: [pk, ...]}} so each distinct delta is a single UPDATE
+        grouped = defaultdict(lambda: defaultdict(list))
+        for (label, pk), delta in pending.items():
+            grouped[label][delta].append(pk)
+
+        started = time.monotonic()
+        try:
+            with transaction.atomic():
+                for label, by_delta in grouped.items():
+                    model = apps.get_model(label)
+                    for delta, pks in by_delta.items():
+                        model._default_manager.filter(pk__in=pks).update(view_count=F('view_count') + delta)
+        except Exception:
+            with self._lock:
+                for key, delta in pending.items():
+                    self._pending[key] += delta
+                self._stats['failed_flushes'] += 1
+            raise
+
+        total = sum(pending.values())
+        with self._lock:
+            self._stats['flushed'] += total
+            self._stats['flushes'] += 1
+            self._stats['last_flush_at'] = time.time()
+            self._stats['last_flush_duration'] = time.monotonic() - started
+        self._publish_stats(total)
+
+        for label, by_delta in grouped.items():
+            deltas = {pk: delta for delta, pks in by_delta.items() for pk in pks}
+            view_counts_flushed.send(sender=apps.get_model(label), deltas=deltas)
+
+        logger.debug('Flushed %d views for %d rows', total, len(pending))
+        return total
+
+    def _publish_stats(self, flushed=0):
+        """
+        Accumulate flush totals in the shared cache and publish this worker's
+        buffer, so that all workers can be reported together. A worker's
+        snapshot expires when it stops publishing, e.g. after it exits.
+        """
+        if flushed:
+            try:
+                cache.add(f'{STATS_CACHE_PREFIX}:flushed', 0, timeout=None)
+                cache.incr(f'{STATS_CACHE_PREFIX}:flushed', flushed)
+                cache.add(f'{STATS_CACHE_PREFIX}:flushes', 0, timeout=None)
+                cache.incr(f'{STATS_CACHE_PREFIX}:flushes')
+            except ValueError:
+                pass
+
+        stats = self.stats()
+        cache.set(f'{STATS_CACHE_PREFIX}:worker:{self._worker}', {
+            'pending': stats['pending'],
+            'pending_rows': stats['pending_rows'],
+            'recorded': stats['recorded'],
+            'flushed': stats['flushed'],
+            'published_at': time.time(),
+        }, timeout=max(60, 3 * self.flush_interval))
+        workers = cache.get(WORKERS_KEY) or set()
+        if self._worker not in workers:
+            cache.set(WORKERS_KEY, workers | {self._worker}, timeout=None)
+
+    def stats(self):
+        """Counters for this process: views recorded, flushed and still buffered"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = sum(self._pending.values())
+            stats['pending_rows'] = len(self._pending)
+        return stats
+
+
+view_counter = ViewCounter()
+
+
+def shared_stats():
+    """
+    Flush totals across all workers and the views each live worker still has
+    buffered, as published to the shared cache
+    """
+    names = sorted(cache.get(WORKERS_KEY) or ())
+    found = cache.get_many([f'{STATS_CACHE_PREFIX}:worker:{name}' for name in names])
+    workers = {
+        name: found[f'{STATS_CACHE_PREFIX}:worker:{name}']
+        for name in names if f'{STATS_CACHE_PREFIX}:worker:{name}' in found
+    }
+    if len(workers) < len(names):
+        # Forget workers whose snapshots expired
+        cache.set(WORKERS_KEY, set(workers), timeout=None)
+    return {
+        'flushed': cache.get(f'{STATS_CACHE_PREFIX}:flushed', 0),
+        'flushes': cache.get(f'{STATS_CACHE_PREFIX}:flushes', 0),
+        'pending': sum(worker['pending'] for worker in workers.values()),
+        'pending_rows': sum(worker['pending_rows'] for worker in workers.values()),
+        'workers': workers,
+    }
@@ -0,0 +1,106 @@
+"""
+RSS and Atom feeds for topics, categories, authors and breaking news.
+
+Items come from a ``values()`` projection of the article columns a feed
+needs, and links are built from ``url_path`` and the site root paths, so no
+page objects are created. Each feed depends on a small set of cache tags
+that publishing already invalidates. The newest tag stamp is the feed's
+Last-Modified time and the stamps hashed together are its ETag, so a
+conditional request is answered with a 304 after one cache lookup. The
+feed XML is cached until one of those tags changes.
+"""
+import hashlib
+import io
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import http_date, quote_etag
+from wagtail.models import Site
+
+from .caching import get_tagged, make_key, set_tagged, tag_versions
+
+FORMATS = {'rss': Rss201rev2Feed, 'atom': Atom1Feed}
+
+ITEM_FIELDS = [
+    'pk', 'title', 'url_path', 'intro', 'excerpt',
+    'first_published_at', 'last_published_at', 'author__name',
+]
+
+
+@dataclass
+class FeedSpec:
+    """What a feed contains and which cache tags it depends on"""
+    key: str
+    title: str
+    link: str
+    description: str
+    articles: object
+    tags: set = field(default_factory=set)
+
+
+def feed_size():
+    return getattr(settings, 'NEWS_FEED_ITEMS', 30)
+
+
+def page_url(url_path, request=None):
+    """Absolute URL of a page from its url_path, without instantiating it"""
+    for root in Site.get_site_root_paths():
+        if url_path.startswith(root.root_path):
+            return root.root_url + reverse('wagtail_serve', args=(url_path[len(root.root_path):],))
+    return None
+
+
+def freshness(tags):
+    """Return ``(etag, last_modified)`` for a set of tags"""
+    versions = tag_versions(tags)
+    digest = hashlib.md5(repr(sorted(versions.items())).encode(), usedforsecurity=False).hexdigest()
+    return quote_etag(digest), max(versions.values()) // 1_000_000
+
+
+def render_feed(spec, feed_format, request):
+    generator = FORMATS[feed_format](
+        title=spec.title,
+        link=request.build_absolute_uri(spec.link),
+        description=spec.description or spec.title,
+        feed_url=request.build_absolute_uri(),
+        language=settings.LANGUAGE_CODE,
+    )
+    rows = spec.articles.order_by('-first_published_at').values(*ITEM_FIELDS)[:feed_size()]
+    for row in rows:
+        link = page_url(row['url_path'], request)
+        if link is None:
+            continue
+        generator.add_item(
+            title=row['title'],
+            link=link,
+            description=row['intro'] or row['excerpt'],
+            unique_id=link,
+            author_name=row['author__name'],
+            pubdate=row['first_published_at'],
+            updateddate=row['last_published_at'],
+        )
+    output = io.StringIO()
+    generator.write(output, 'utf-8')
+    return output.getvalue().encode('utf-8'), generator.content_type
+
+
+def feed_response(request, spec, feed_format='rss'):
+    etag, last_modified = freshness(spec.tags)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        key = make_key('news:feed', spec.key, feed_format, request.get_host())
+        cached = get_tagged(key, spec.tags)
+        if cached is None:
+            cached = render_feed(spec, feed_format, request)
+            set_tagged(key, cached, spec.tags)
+        body, content_type = cached
+        response = HttpResponse(body, content_type=content_type)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'NEWS_FEED_MAX_AGE', 60))
+    return response
@@ -0,0 +1,304 @@
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from wagtail.images import get_image_model
+from wagtail.signals import page_published, page_unpublished, post_page_move, pre_page_move
+
+from .caching import invalidate_tags, page_cache_tags
+from .models import ArticleCategoryClosure, NewsCategory, NewsPage, NewsTopic, VideoPage
+from .models.authors import Author
+from .signals import view_counts_flushed
+from . import (
+    archive, article_counts, breadcrumbs, category_tree, closure, related, renditions, routers, sitemaps, trending,
+)
+
+PREVIOUS_STATE_FIELDS = ('live', 'author_id', 'is_breaking_news', 'is_featured', 'first_published_at')
+
+
+@receiver(pre_save, sender=NewsPage)
+def stash_previous_state(sender, instance, **kwargs):
+    """Remember the stored state so post-save handlers can compute what changed"""
+    instance._previous_state = None
+    if instance.pk:
+        instance._previous_state = NewsPage.objects.filter(
+            pk=instance.pk
+        ).values(*PREVIOUS_STATE_FIELDS).first()
+
+
+@receiver(view_counts_flushed, sender=NewsPage)
+def record_trending_views(sender, deltas, **kwargs):
+    trending.record_views(deltas)
+
+
+@receiver(view_counts_flushed, sender=NewsPage)
+def roll_up_author_views(sender, deltas, **kwargs):
+    article_counts.roll_up_views(deltas)
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def invalidate_page_caches(sender, instance, **kwargs):
+    tags = {f'page:{instance.pk}'}
+    if isinstance(instance, (NewsPage, VideoPage)):
+        tags |= page_cache_tags(instance, getattr(instance, '_previous_state', None))
+        tags.add('homepage')
+    invalidate_tags(*tags)
+
+
+@receiver(page_published, sender=NewsPage)
+def index_related_on_publish(sender, instance, **kwargs):
+    related.schedule_update(instance.pk)
+
+
+@receiver(page_unpublished, sender=NewsPage)
+def remove_related_on_unpublish(sender, instance, **kwargs):
+    related.remove_article(instance.pk)
+
+
+@receiver(m2m_changed, sender=NewsPage.categories.through)
+@receiver(m2m_changed, sender=NewsPage.topics.through)
+def index_related_on_retag(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        if instance.live:
+            related.schedule_update(instance.pk)
+    elif pk_set:
+        for article_id in NewsPage.objects.live().filter(pk__in=pk_set).values_list('pk', flat=True):
+            related.schedule_update(article_id)
+
+
+def _taxonomy_tag(model, pk):
+    return f"{'category' if model is NewsCategory else 'topic'}:{pk}"
+
+
+@receiver(m2m_changed, sender=NewsPage.categories.through)
+@receiver(m2m_changed, sender=NewsPage.topics.through)
+@receiver(m2m_changed, sender=VideoPage.categories.through)
+@receiver(m2m_changed, sender=VideoPage.topics.through)
+def invalidate_on_retag(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if reverse:
+        # e.g. category.articles.add(...): the instance is the category or topic
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_tags(
+                _taxonomy_tag(type(instance), instance.pk),
+                'news' if model is NewsPage else 'videos',
+                'homepage',
+                *(f'page:{pk}' for pk in pk_set or ()),
+            )
+        return
+
+    if not instance.live:
+        return
+    if action == 'pre_clear':
+        # post_clear does not say which categories or topics were removed
+        instance._cleared_tags = page_cache_tags(instance)
+    elif action in ('post_add', 'post_remove'):
+        invalidate_tags(
+            'homepage', *page_cache_tags(instance), *(_taxonomy_tag(model, pk) for pk in pk_set)
+        )
+    elif action == 'post_clear':
+        invalidate_tags('homepage', *getattr(instance, '_cleared_tags', ()))
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_author_caches(sender, instance, **kwargs):
+    invalidate_tags('authors', f'author:{instance.pk}', 'homepage')
+
+
+@receiver(post_save, sender=NewsCategory)
+@receiver(post_delete, sender=NewsCategory)
+def invalidate_category_caches(sender, instance, **kwargs):
+    invalidate_tags('categories', f'category:{instance.pk}', 'homepage')
+    transaction.on_commit(_refresh_category_tree)
+
+
+def _refresh_category_tree():
+    # Bumped again after commit, so that no worker keeps a tree rebuilt from the uncommitted state
+    invalidate_tags('categories')
+    category_tree.clear()
+
+
+@receiver(post_save, sender=NewsTopic)
+@receiver(post_delete, sender=NewsTopic)
+def invalidate_topic_caches(sender, instance, **kwargs):
+    invalidate_tags('topics', f'topic:{instance.pk}', 'homepage')
+
+
+@receiver(post_save, sender=get_image_model())
+def generate_renditions_on_upload(sender, instance, created, update_fields=None, **kwargs):
+    # Wagtail saves file_size and file_hash with update_fields; those are not new uploads
+    if created or update_fields is None:
+        renditions.schedule(instance.pk, renditions.all_specs())
+
+
+@receiver(page_published)
+def generate_renditions_on_publish(sender, instance, **kwargs):
+    renditions.schedule_for_instance(instance)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=NewsCategory)
+@receiver(post_save, sender=NewsTopic)
+def generate_snippet_renditions(sender, instance, **kwargs):
+    renditions.schedule_for_instance(instance)
+
+
+@receiver(page_published, sender=NewsPage)
+def update_archive_on_publish(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None) or {}
+    archive.schedule_recompute(instance.first_published_at, previous.get('first_published_at'))
+
+
+@receiver(page_unpublished, sender=NewsPage)
+@receiver(post_delete, sender=NewsPage)
+def update_archive_on_unpublish(sender, instance, **kwargs):
+    archive.schedule_recompute(instance.first_published_at)
+
+
+@receiver(m2m_changed, sender=NewsPage.categories.through)
+def update_archive_on_retag(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if instance.live and action in ('post_add', 'post_remove', 'post_clear'):
+            archive.schedule_recompute(instance.first_published_at)
+        return
+
+    # category.articles.add(...) and friends: the affected articles are in pk_set
+    if action == 'pre_clear':
+        instance._cleared_dates = list(instance.articles.live().values_list('first_published_at', flat=True))
+    elif action == 'post_clear':
+        archive.schedule_recompute(*getattr(instance, '_cleared_dates', ()))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        archive.schedule_recompute(
+            *NewsPage.objects.live().filter(pk__in=pk_set).values_list('first_published_at', flat=True)
+        )
+
+
+
+@receiver(post_save, sender=NewsPage)
+def count_live_transitions(sender, instance, created, **kwargs):
+    # Saves rather than page_published, so that pages created live (e.g. by add_child) are counted too
+    previous = getattr(instance, '_previous_state', None) or {}
+    was_live = bool(previous.get('live'))
+    if instance.live and not was_live:
+        article_counts.article_went_live(instance, 1)
+    elif was_live and not instance.live:
+        article_counts.article_went_live(instance, -1)
+    elif instance.live and previous.get('author_id') != instance.author_id:
+        article_counts.schedule(authors=Counter({previous.get('author_id'): -1, instance.author_id: 1}))
+
+
+@receiver(pre_delete, sender=NewsPage)
+def stash_links_before_delete(sender, instance, **kwargs):
+    # The m2m rows are deleted along with the page without m2m_changed signals
+    if instance.live:
+        instance._deleted_links = article_counts.article_links(instance)
+
+
+@receiver(post_delete, sender=NewsPage)
+def count_deleted_article(sender, instance, **kwargs):
+    if instance.live:
+        article_counts.article_went_live(instance, -1, links=getattr(instance, '_deleted_links', None))
+
+
+@receiver(m2m_changed, sender=NewsPage.categories.through)
+@receiver(m2m_changed, sender=NewsPage.topics.through)
+def count_on_retag(sender, instance, action, reverse, model, pk_set, **kwargs):
+    kind = 'categories' if sender is NewsPage.categories.through else 'topics'
+    if reverse:
+        # category.articles.add(...): pk_set holds articles, only live ones count
+        if action == 'pre_clear':
+            instance._cleared_count = instance.articles.live().count()
+            return
+        if action == 'post_clear':
+            delta = -getattr(instance, '_cleared_count', 0)
+        elif action in ('post_add', 'post_remove'):
+            delta = NewsPage.objects.live().filter(pk__in=pk_set).count()
+            delta = delta if action == 'post_add' else -delta
+        else:
+            return
+        article_counts.schedule(**{kind: Counter({instance.pk: delta})})
+        return
+
+    if not instance.live:
+        return
+    if action == 'pre_clear':
+        instance._cleared_links = list(getattr(instance, kind).values_list('pk', flat=True))
+    elif action == 'post_clear':
+        article_counts.schedule(**{kind: Counter({pk: -1 for pk in getattr(instance, '_cleared_links', ())})})
+    elif action in ('post_add', 'post_remove'):
+        sign = 1 if action == 'post_add' else -1
+        article_counts.schedule(**{kind: Counter({pk: sign for pk in pk_set})})
+
+
+@receiver(m2m_changed, sender=NewsPage.categories.through)
+def sync_closure_on_retag(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            closure.schedule_sync([instance.pk])
+    elif action == 'pre_clear':
+        instance._cleared_articles = list(instance.articles.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        closure.schedule_sync(getattr(instance, '_cleared_articles', ()))
+    elif action in ('post_add', 'post_remove'):
+        closure.schedule_sync(pk_set or ())
+
+
+@receiver(pre_save, sender=NewsCategory)
+def stash_previous_parent(sender, instance, **kwargs):
+    instance._previous_parent_id = None
+    if instance.pk:
+        instance._previous_parent_id = NewsCategory.objects.filter(
+            pk=instance.pk
+        ).values_list('parent_id', flat=True).first()
+
+
+@receiver(post_save, sender=NewsCategory)
+def sync_closure_on_move(sender, instance, created, **kwargs):
+    if not created and instance.parent_id != getattr(instance, '_previous_parent_id', None):
+        closure.schedule_category_move(instance.pk)
+
+
+@receiver(post_migrate)
+def backfill_category_closure(sender, app_config, using=DEFAULT_DB_ALIAS, **kwargs):
+    # Articles that existed before the closure table, e.g. on the first deploy with it
+    if app_config.label != 'news' or using != DEFAULT_DB_ALIAS:
+        return
+    if ArticleCategoryClosure._meta.db_table in connections[using].introspection.table_names():
+        closure.backfill()
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(pre_page_move)
+@receiver(post_page_move)
+def invalidate_breadcrumbs(sender, instance, **kwargs):
+    # Before a move for the subtree at the old path, after it for the new one
+    breadcrumbs.invalidate_subtree(instance)
+
+
+@receiver(page_published, sender=NewsPage)
+@receiver(page_published, sender=VideoPage)
+@receiver(page_unpublished, sender=NewsPage)
+@receiver(page_unpublished, sender=VideoPage)
+@receiver(post_delete, sender=NewsPage)
+@receiver(post_delete, sender=VideoPage)
+def update_sitemap(sender, instance, **kwargs):
+    sitemaps.schedule_build(instance.first_published_at)
+
+
+@receiver(post_page_move)
+def update_sitemap_on_move(sender, instance, **kwargs):
+    # The URLs of every article under the moved page changed
+    sitemaps.schedule_subtree(instance)
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def stamp_replica_heartbeat(sender, instance, **kwargs):
+    # Lets the router measure how long replicas take to receive the change
+    if routers.replica_aliases():
+        transaction.on_commit(routers.beat)
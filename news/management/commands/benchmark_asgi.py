@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from news.models import NewsCategory, NewsPage
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0
+
+
+class Command(BaseCommand):
+    help = 'Compare sync and async throughput and peak memory of the listing views at the same concurrency'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode',
+            choices=['compare', 'sync', 'async'],
+            default='compare',
+            help='Run both modes in fresh processes (default), or only the mode this process is configured for',
+        )
+        parser.add_argument('--requests', type=int, default=300, help='Requests per mode')
+        parser.add_argument('--concurrency', type=int, default=16, help='Requests in flight at once')
+        parser.add_argument(
+            '--url',
+            action='append',
+            dest='urls',
+            help='URL to request, may be repeated (defaults to the main listing views)',
+        )
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+
+    def handle(self, *args, **options):
+        if options['mode'] == 'compare':
+            results = [self.run_child(mode, options) for mode in ('sync', 'async')]
+        else:
+            if settings.NEWS_ASYNC_VIEWS != (options['mode'] == 'async'):
+                raise CommandError(
+                    f"--mode {options['mode']} needs NEWS_ASYNC_VIEWS={options['mode'] == 'async'} in the environment"
+                )
+            results = [self.measure(options['mode'], options)]
+
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+        else:
+            self.report(results, options)
+
+    def default_urls(self):
+        urls = [reverse('news:news_index'), reverse('news:archive'), reverse('news:trending_news')]
+        category = NewsCategory.objects.order_by('-article_count').first()
+        if category:
+            urls.append(reverse('news:category_view', args=[category.slug]))
+        title = NewsPage.objects.live().values_list('title', flat=True).first()
+        if title:
+            urls.append(f"{reverse('news:search')}?q={title.split()[0]}")
+        return urls
+
+    def run_child(self, mode, options):
+        command = [
+            sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'benchmark_asgi', '--mode', mode,
+            '--requests', str(options['requests']), '--concurrency', str(options['concurrency']), '--json',
+        ]
+        for url in options['urls'] or []:
+            command += ['--url', url]
+        env = {**os.environ, 'NEWS_ASYNC_VIEWS': str(mode == 'async')}
+        completed = subprocess.run(command, env=env, capture_output=True, text=True, cwd=settings.BASE_DIR)
+        if completed.returncode:
+            raise CommandError(f'{mode} run failed:\n{completed.stderr}')
+        return json.loads(completed.stdout.strip().splitlines()[-1])[0]
+
+    def measure(self, mode, options):
+        urls = options['urls'] or self.default_urls()
+        plan = [urls[index % len(urls)] for index in range(options['requests'])]
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '')), 'localhost').lstrip('.')
+        latencies, errors = [], []
+
+        if mode == 'sync':
+            local = threading.local()
+
+            def fetch(url):
+                client = getattr(local, 'client', None) or Client(SERVER_NAME=host)
+                local.client = client
+                start = time.perf_counter()
+                response = client.get(url)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors.append(url)
+
+            for url in urls:
+                fetch(url)
+            latencies.clear()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                list(executor.map(fetch, plan))
+            elapsed = time.perf_counter() - started
+        else:
+            async def run():
+                client = AsyncClient(SERVER_NAME=host)
+                slots = asyncio.Semaphore(options['concurrency'])
+
+                async def fetch(url):
+                    async with slots:
+                        start = time.perf_counter()
+                        response = await client.get(url)
+                        latencies.append(time.perf_counter() - start)
+                        if response.status_code >= 400:
+                            errors.append(url)
+
+                for url in urls:
+                    await fetch(url)
+                latencies.clear()
+                started = time.perf_counter()
+                await asyncio.gather(*(fetch(url) for url in plan))
+                return time.perf_counter() - started
+
+            elapsed = asyncio.run(run())
+
+        return {
+            'mode': mode,
+            'requests': len(plan),
+            'concurrency': options['concurrency'],
+            'seconds': round(elapsed, 3),
+            'requests_per_second': round(len(plan) / elapsed, 1),
+            'p50_ms': round(_percentile(latencies, 0.5) * 1000, 1),
+            'p95_ms': round(_percentile(latencies, 0.95) * 1000, 1),
+            'p99_ms': round(_percentile(latencies, 0.99) * 1000, 1),
+            'errors': len(errors),
+            # ru_maxrss is in kilobytes on Linux
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
+
+    def report(self, results, options):
+        self.stdout.write(self.style.MIGRATE_HEADING('\nSync vs Async Listing Views'))
+        self.stdout.write('=' * 50)
+        self.stdout.write(f"{options['requests']} requests per mode, {options['concurrency']} in flight")
+        self.stdout.write(
+            f"{'Mode':<8}{'Req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'RSS MB':>9}{'Req/s/100MB':>13}{'Errors':>8}"
+        )
+        for result in results:
+            # Throughput per memory is what decides how many workers fit on a host
+            per_memory = result['requests_per_second'] / result['peak_rss_mb'] * 100
+            self.stdout.write(
+                f"{result['mode']:<8}{result['requests_per_second']:>9}{result['p50_ms']:>9}{result['p95_ms']:>9}"
+                f"{result['p99_ms']:>9}{result['peak_rss_mb']:>9}{per_memory:>13.1f}{result['errors']:>8}"
+            )
@@ -0,0 +1,389 @@
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from django.urls import NoReverseMatch, get_resolver, reverse
+from wagtail.models import Page, Site
+
+from home.models import HomePage
+from news import trending
+from news.concurrency import THREAD_NAME_PREFIX
+from news.models import NewsCategory, NewsIndexPage, NewsPage, NewsTopic, VideoIndexPage
+from news.models.authors import Author
+from search.index import search_index
+
+DEFAULT_THRESHOLDS = {
+    # A route regresses when its warm p95 grows by more than this ratio and the slack
+    'p95_ratio': 1.25,
+    'p95_slack_ms': 2.0,
+    # ...or it makes more queries than before, cold or warm
+    'queries': 0,
+    # ...or its cold-request allocation peak grows by more than this ratio and the slack
+    'memory_ratio': 1.25,
+    'memory_slack_kb': 256,
+}
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class QueryCounter:
+    """
+    Counts the queries made for requests: those on the thread that created
+    the counter and those in the concurrency pool, whose threads use their
+    own connections and so are invisible to CaptureQueriesContext. Queries
+    of the writer thread, such as view count flushes, are left out, since
+    they run whenever the flush interval happens to elapse.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._request_thread = threading.current_thread()
+        connection_created.connect(self.install, weak=False)
+
+    def install(self, sender, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def counts(self, thread):
+        return thread is self._request_thread or thread.name.startswith(THREAD_NAME_PREFIX)
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.counts(threading.current_thread()):
+            with self._lock:
+                self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every public listing route and Wagtail page type against generated datasets of several '
+        'sizes, writing latency percentiles, query counts and peak memory to JSON and flagging regressions'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=lambda value: [int(size) for size in value.split(',')],
+            help='Comma-separated dataset sizes in articles (defaults to NEWS_BENCHMARK_SIZES)',
+        )
+        parser.add_argument('--size', type=int, help='Benchmark a single size in this process; used by --sizes runs')
+        parser.add_argument('--iterations', type=int, default=30, help='Timed warm requests per route')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per route before timing')
+        parser.add_argument('--seed', type=int, default=1, help='Seed the datasets are generated from')
+        parser.add_argument(
+            '--data-dir',
+            default=os.path.join(settings.BASE_DIR, '.benchmarks'),
+            help='Where generated datasets are kept between runs',
+        )
+        parser.add_argument('--rebuild', action='store_true', help='Regenerate the datasets even if they exist')
+        parser.add_argument('--output', default='benchmark-results.json', help='JSON file to write the results to')
+        parser.add_argument('--compare', help='Earlier results file to check for regressions against')
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Exit with an error when --compare finds a regression',
+        )
+        parser.add_argument('--json', action='store_true', help='Print the results of a --size run as JSON')
+
+    def handle(self, *args, **options):
+        if options['size']:
+            result = self.run_size(options['size'], options)
+            if options['json']:
+                self.stdout.write(json.dumps(result))
+            else:
+                self.report({'sizes': {str(options['size']): result}})
+            return
+
+        results = {
+            'meta': self.meta(options),
+            'sizes': {
+                str(size): self.run_child(size, options)
+                for size in options['sizes'] or getattr(settings, 'NEWS_BENCHMARK_SIZES', [1000, 50000, 500000])
+            },
+        }
+        with open(options['output'], 'w') as output:
+            # Stable key order and one value per line keep the files diffable between commits
+            json.dump(results, output, indent=2, sort_keys=True, ensure_ascii=False)
+            output.write('\n')
+        self.report(results)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if options['compare']:
+            with open(options['compare']) as baseline:
+                regressions = self.regressions(json.load(baseline), results)
+            self.report_regressions(regressions)
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f'{len(regressions)} regressions against {options["compare"]}')
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip() or None
+        except OSError:
+            commit = None
+        return {
+            'commit': commit,
+            'generated_at': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'async_views': settings.NEWS_ASYNC_VIEWS,
+            'iterations': options['iterations'],
+            'seed': options['seed'],
+        }
+
+    def run_child(self, size, options):
+        """Each size runs in a fresh process so that memory and module state do not carry over"""
+        command = [
+            sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'benchmark_urls', '--size', str(size),
+            '--iterations', str(options['iterations']), '--warmup', str(options['warmup']),
+            '--seed', str(options['seed']), '--data-dir', options['data_dir'], '--json',
+        ]
+        if options['rebuild']:
+            command.append('--rebuild')
+        self.stdout.write(f'Benchmarking {size} articles...')
+        completed = subprocess.run(command, capture_output=True, text=True, cwd=settings.BASE_DIR)
+        if completed.returncode:
+            raise CommandError(f'Run with {size} articles failed:\n{completed.stderr}')
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    # A single size, in this process
+
+    def run_size(self, size, options):
+        directory = os.path.join(options['data_dir'], f"articles-{size}-seed-{options['seed']}")
+        self.use_dataset(directory)
+        if options['rebuild'] or not os.path.exists(os.path.join(directory, 'ready')):
+            self.build_dataset(directory, size, options['seed'])
+        else:
+            call_command('migrate', interactive=False, verbosity=0)
+
+        self.trending_boards = self.compute_trending()
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '')), 'localhost').lstrip('.')
+        # A broken route is recorded with its status rather than ending the run
+        client = Client(SERVER_NAME=host, raise_request_exception=False)
+        queries = QueryCounter()
+        connections.close_all()
+        routes = {}
+        for name, url in self.routes().items():
+            routes[name] = self.measure(client, queries, url, options)
+        return {
+            'articles': NewsPage.objects.live().count(),
+            'routes': routes,
+        }
+
+    def compute_trending(self):
+        """
+        The trending boards, which the scheduled refresh_trending command keeps
+        in the shared cache. Requests only read them, so they are put back
+        after every cache clear rather than recomputed by a request.
+        """
+        trending.refresh_leaderboards()
+        keys = cache.get(f'{trending.CACHE_PREFIX}:keys') or []
+        return cache.get_many([*keys, f'{trending.CACHE_PREFIX}:keys', trending.REFRESHED_KEY])
+
+    def clear_cache(self):
+        cache.clear()
+        cache.set_many(self.trending_boards, None)
+
+    def use_dataset(self, directory):
+        """Point the database, media, search files and caches at the dataset so nothing else is touched"""
+        os.makedirs(directory, exist_ok=True)
+        connections[DEFAULT_DB_ALIAS].close()
+        settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'] = os.path.join(directory, 'db.sqlite3')
+        override_settings(
+            STORAGES={
+                **settings.STORAGES,
+                'default': {
+                    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                    'OPTIONS': {'location': os.path.join(directory, 'media')},
+                },
+            },
+            MEDIA_ROOT=os.path.join(directory, 'media'),
+            # Cold requests clear the cache, which must not be a shared one
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'}},
+            SEARCH_INDEX_PATH=os.path.join(directory, 'search_index.sqlite3'),
+            SEARCH_SUGGEST_PATH=os.path.join(directory, 'search_suggest.bin'),
+            NEWS_WRITE_LOCK_FILE=os.path.join(directory, 'db.sqlite3.write-lock'),
+            NEWS_DATABASE_REPLICAS=[],
+            # Spawned rendition workers would read the real settings
+            NEWS_RENDITION_WORKERS=0,
+        ).enable()
+        search_index.close()
+        search_index.path = settings.SEARCH_INDEX_PATH
+
+    def build_dataset(self, directory, size, seed):
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+        self.stderr.write(f'Generating a dataset of {size} articles in {directory}')
+        call_command('migrate', interactive=False, verbosity=0)
+        self.ensure_home_page()
+        call_command(
+            'generate_benchmark_data', articles=size, videos=max(1, size // 10), seed=seed, stdout=self.stderr,
+        )
+        call_command('rebuild_search_index', stdout=self.stderr)
+        call_command('rebuild_suggestions', stdout=self.stderr)
+        open(os.path.join(directory, 'ready'), 'w').close()
+
+    def ensure_home_page(self):
+        site = Site.objects.filter(is_default_site=True).first()
+        if site and isinstance(site.root_page.specific, HomePage):
+            return
+        home = Page.get_first_root_node().add_child(instance=HomePage(title='Home', slug='benchmark-home'))
+        if site is None:
+            Site.objects.create(hostname='localhost', root_page=home, is_default_site=True)
+        else:
+            site.root_page = home
+            site.save()
+
+    def routes(self):
+        """One concrete URL per route in news/urls.py, per Wagtail page type and for site search"""
+        samples = {
+            'category_slug': NewsCategory.objects.order_by('-article_count').values_list('slug', flat=True).first(),
+            'topic_slug': NewsTopic.objects.order_by('-article_count').values_list('slug', flat=True).first(),
+            'author_slug': Author.objects.order_by('-article_count').values_list('slug', flat=True).first(),
+        }
+        latest = NewsPage.objects.live().order_by('-first_published_at').first()
+        query = latest.title.split()[0].strip(':') if latest else 'news'
+
+        routes = {}
+        for pattern in get_resolver('news.urls').url_patterns:
+            arguments = {name: samples.get(name) for name in pattern.pattern.converters}
+            try:
+                if None in arguments.values():
+                    raise NoReverseMatch
+                url = reverse(f'news:{pattern.name}', kwargs=arguments)
+            except NoReverseMatch:
+                self.stderr.write(f'Skipping news:{pattern.name}, no sample for {sorted(arguments)}')
+                continue
+            if pattern.name in ('search', 'search_suggest'):
+                url += f'?q={query}'
+            routes[f'news:{pattern.name}'] = url
+        routes['search'] = f"{reverse('search')}?query={query}"
+
+        for model, page in (
+            (HomePage, HomePage.objects.live().first()),
+            (NewsIndexPage, NewsIndexPage.objects.live().first()),
+            (NewsPage, latest),
+            (VideoIndexPage, VideoIndexPage.objects.live().first()),
+        ):
+            if page is not None:
+                routes[f'page:{model.__name__}'] = page.get_url()
+        return routes
+
+    def measure(self, client, queries, url, options):
+        # Cold: an empty cache, as after a deploy or an invalidation
+        self.clear_cache()
+        before = queries.count
+        start = time.perf_counter()
+        response = client.get(url)
+        cold = time.perf_counter() - start
+        cold_queries = queries.count - before
+
+        # Allocation peak of a cold request, measured apart since tracing slows it down
+        self.clear_cache()
+        tracemalloc.start()
+        try:
+            client.get(url)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        for _ in range(options['warmup']):
+            client.get(url)
+        latencies, warm_queries = [], 0
+        for _ in range(options['iterations']):
+            before = queries.count
+            start = time.perf_counter()
+            client.get(url)
+            latencies.append(time.perf_counter() - start)
+            warm_queries = max(warm_queries, queries.count - before)
+
+        return {
+            'url': url,
+            'status': response.status_code,
+            'cold_ms': _ms(cold),
+            'cold_queries': cold_queries,
+            'peak_kb': round(peak / 1024),
+            'p50_ms': _ms(_percentile(latencies, 0.5)),
+            'p95_ms': _ms(_percentile(latencies, 0.95)),
+            'p99_ms': _ms(_percentile(latencies, 0.99)),
+            'warm_queries': warm_queries,
+        }
+
+    # Reporting
+
+    def report(self, results):
+        self.stdout.write(self.style.MIGRATE_HEADING('\nURL Benchmarks'))
+        self.stdout.write('=' * 50)
+        for size, result in results['sizes'].items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{result['articles']} articles (dataset {size})"))
+            self.stdout.write(
+                f"{'Route':<32}{'Status':>7}{'Cold ms':>9}{'Cold Q':>8}{'Peak KB':>9}"
+                f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'Warm Q':>8}"
+            )
+            for name, route in sorted(result['routes'].items()):
+                line = (
+                    f"{name:<32}{route['status']:>7}{route['cold_ms']:>9}{route['cold_queries']:>8}"
+                    f"{route['peak_kb']:>9}{route['p50_ms']:>9}{route['p95_ms']:>9}{route['p99_ms']:>9}"
+                    f"{route['warm_queries']:>8}"
+                )
+                self.stdout.write(self.style.ERROR(line) if route['status'] >= 400 else line)
+
+    def regressions(self, baseline, results):
+        thresholds = {**DEFAULT_THRESHOLDS, **getattr(settings, 'NEWS_BENCHMARK_THRESHOLDS', {})}
+        found = []
+        for size, result in results['sizes'].items():
+            before_routes = baseline.get('sizes', {}).get(size, {}).get('routes', {})
+            for name, after in result['routes'].items():
+                before = before_routes.get(name)
+                if before is None:
+                    continue
+                label = f'{name} @ {size}'
+                if after['status'] >= 400 > before['status']:
+                    found.append(f"{label}: status {before['status']} -> {after['status']}")
+                if (
+                    after['p95_ms'] > before['p95_ms'] * thresholds['p95_ratio']
+                    and after['p95_ms'] - before['p95_ms'] > thresholds['p95_slack_ms']
+                ):
+                    found.append(f"{label}: p95 {before['p95_ms']}ms -> {after['p95_ms']}ms")
+                for key in ('cold_queries', 'warm_queries'):
+                    if after[key] > before[key] + thresholds['queries']:
+                        found.append(f"{label}: {key.replace('_', ' ')} {before[key]} -> {after[key]}")
+                if (
+                    after['peak_kb'] > before['peak_kb'] * thresholds['memory_ratio']
+                    and after['peak_kb'] - before['peak_kb'] > thresholds['memory_slack_kb']
+                ):
+                    found.append(f"{label}: peak memory {before['peak_kb']}KB -> {after['peak_kb']}KB")
+        return found
+
+    def report_regressions(self, regressions):
+        self.stdout.write(self.style.MIGRATE_HEADING('\nRegressions'))
+        self.stdout.write('=' * 50)
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('None'))
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(regression))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from news.sitemaps import build
+
+
+class Command(BaseCommand):
+    help = 'Build missing sitemap shards and the current month, or every month with --all'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Regenerate the shards of every month, including closed ones',
+        )
+
+    def handle(self, *args, **options):
+        months = build(rebuild_all=options['all'])
+        self.stdout.write(self.style.SUCCESS(f'Built sitemap shards for {months} months'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from news.text import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Re-extract the plain text, word count, excerpt and read time of every article'
+
+    def handle(self, *args, **options):
+        changed = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Updated body text for {changed} articles'))
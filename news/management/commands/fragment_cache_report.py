@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from news.caching import fragment_stats
+
+
+class Command(BaseCommand):
+    help = 'Report fragment cache hits and misses per homepage section'
+
+    def handle(self, *args, **options):
+        stats = fragment_stats()
+        self.stdout.write(self.style.MIGRATE_HEADING('\nFragment Cache'))
+        self.stdout.write('=' * 50)
+        if not stats:
+            self.stdout.write('No cached sections have been rendered yet')
+            return
+
+        self.stdout.write(f"{'Section':<24}{'Hits':>8}{'Misses':>8}{'Hit rate':>10}")
+        for section, (hits, misses) in stats.items():
+            total = hits + misses
+            rate = f'{hits / total:.1%}' if total else '-'
+            self.stdout.write(f'{section:<24}{hits:>8}{misses:>8}{rate:>10}')
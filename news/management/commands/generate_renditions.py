@@ -0,0 +1,57 @@
+from collections import defaultdict
+from concurrent.futures import as_completed
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from wagtail.images import get_image_model
+
+from news.renditions import _generate, all_specs, get_executor, image_fields, pending_for_model
+
+
+class Command(BaseCommand):
+    help = 'Generate the renditions used by the templates for existing images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+        parser.add_argument(
+            '--all-images', action='store_true',
+            help='Also generate every spec for images that are not attached to any model'
+        )
+        parser.add_argument('--list', action='store_true', help='Only list the discovered specs')
+
+    def handle(self, *args, **options):
+        models = [model for model in apps.get_models() if image_fields(model)]
+
+        if options['list']:
+            for model in models:
+                for field, specs in image_fields(model).items():
+                    self.stdout.write(f"{model._meta.label}.{field}: {', '.join(sorted(specs))}")
+            return
+
+        pending = defaultdict(set)
+        for model in models:
+            for image_id, specs in pending_for_model(model).items():
+                pending[image_id].update(specs)
+        if options['all_images']:
+            for image_id in get_image_model().objects.values_list('pk', flat=True):
+                pending[image_id].update(all_specs())
+
+        self.stdout.write(f'Generating renditions for {len(pending)} images')
+        executor = get_executor(options['workers'])
+        futures = [executor.submit(_generate, image_id, frozenset(specs)) for image_id, specs in pending.items()]
+
+        done = failed = renditions = 0
+        for future in as_completed(futures):
+            try:
+                renditions += future.result()[1]
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'Failed: {e}')
+            done += 1
+            if done % 100 == 0:
+                self.stdout.write(f'Processed {done} images')
+        executor.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {done} images ({renditions} renditions, {failed} failures)'
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from news.archive import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the archive facet counts for every month with live articles'
+
+    def handle(self, *args, **options):
+        months = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt archive facets for {months} months'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from news.closure import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Resync the article to category-subtree mapping for every article'
+
+    def handle(self, *args, **options):
+        total = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Synced category closure for {total} articles'))
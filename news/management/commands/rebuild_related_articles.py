@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from news.related import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed related-articles index for all live articles'
+
+    def handle(self, *args, **options):
+        total = rebuild_all(progress=lambda done: self.stdout.write(f'Indexed {done} articles'))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt related articles for {total} articles'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from news.article_counts import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalised article and view counters and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the drifted rows')
+
+    def handle(self, *args, **options):
+        drift = reconcile(dry_run=options['dry_run'])
+        self.stdout.write(self.style.MIGRATE_HEADING('\nCounter Drift'))
+        self.stdout.write('=' * 50)
+        for label, rows in drift.items():
+            self.stdout.write(f'{label}: {rows} rows')
+        if options['dry_run']:
+            self.stdout.write('Dry run, nothing was changed')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Fixed {sum(drift.values())} rows'))
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from news.trending import refresh_leaderboards
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the time-decayed trending leaderboards. Readers only see what this '
+        'command last stored, so schedule it every NEWS_TRENDING_REFRESH_INTERVAL seconds '
+        'or keep it running with --loop'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep refreshing every NEWS_TRENDING_REFRESH_INTERVAL seconds',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            count = refresh_leaderboards()
+            self.stdout.write(self.style.SUCCESS(f'Refreshed {count} trending leaderboards'))
+            if not options['loop']:
+                return
+            close_old_connections()
+            time.sleep(max(0, settings.NEWS_TRENDING_REFRESH_INTERVAL - (time.monotonic() - started)))
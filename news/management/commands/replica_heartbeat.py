@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+
+from news.routers import beat, replica_lag
+
+
+class Command(BaseCommand):
+    help = 'Stamp the replication heartbeat on the primary and report how far behind each replica is'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-beat',
+            action='store_true',
+            help='Only report, without stamping a new heartbeat',
+        )
+
+    def handle(self, *args, **options):
+        if not options['no_beat']:
+            beat()
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nReplica Lag'))
+        self.stdout.write('=' * 50)
+        if not settings.NEWS_DATABASE_REPLICAS:
+            self.stdout.write('No replicas are configured')
+            return
+
+        max_lag = settings.NEWS_REPLICA_MAX_LAG
+        for alias in settings.NEWS_DATABASE_REPLICAS:
+            try:
+                lag = replica_lag(alias)
+            except DatabaseError as error:
+                self.stdout.write(f'{alias:<20}{"unreachable":>12}  {error}')
+                continue
+            if not lag:
+                status = 'ok'
+            elif lag <= max_lag:
+                status = 'catching up, reads on primary'
+            else:
+                status = 'fallback to primary'
+            self.stdout.write(f'{alias:<20}{lag:>11.1f}s  {status}')
@@ -0,0 +1,223 @@
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections
+from django.test import Client
+from django.urls import reverse
+from wagtail.models import Site
+
+from news import related
+from news.counters import view_counter
+from news.models import NewsPage
+from news.write_queue import write_queue
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test article reads against concurrent background writes, '
+        'with and without the SQLite production profile and write queue'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode',
+            choices=['compare', 'baseline', 'tuned'],
+            default='compare',
+            help='Run both profiles on a copy of the database (default), or only the one this process is configured for',
+        )
+        parser.add_argument('--seconds', type=float, default=10, help='Duration of each run')
+        parser.add_argument('--readers', type=int, default=8, help='Threads requesting article pages')
+        parser.add_argument('--writers', type=int, default=4, help='Threads issuing background writes')
+        parser.add_argument('--write-rate', type=float, default=20, help='Background writes per second per writer')
+        parser.add_argument('--database', help='SQLite file to run against instead of the configured database')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+
+    def handle(self, *args, **options):
+        if 'sqlite3' not in settings.DATABASES[DEFAULT_DB_ALIAS]['ENGINE']:
+            raise CommandError('The load test only applies to SQLite databases')
+
+        if options['mode'] == 'compare':
+            with tempfile.TemporaryDirectory() as directory:
+                results = [
+                    self.run_child(mode, self.copy_database(directory, mode), options)
+                    for mode in ('baseline', 'tuned')
+                ]
+        else:
+            tuned = 'init_command' in settings.DATABASES[DEFAULT_DB_ALIAS].get('OPTIONS', {})
+            if tuned != (options['mode'] == 'tuned') or settings.NEWS_WRITE_QUEUE != tuned:
+                flag = options['mode'] == 'tuned'
+                raise CommandError(
+                    f"--mode {options['mode']} needs NEWS_SQLITE_TUNED={flag} and NEWS_WRITE_QUEUE={flag} "
+                    'in the environment'
+                )
+            if options['database']:
+                self.use_database(options['database'], options['mode'])
+            results = [self.measure(options['mode'], options)]
+
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+        else:
+            self.report(results, options)
+
+    def copy_database(self, directory, mode):
+        """Each run gets a fresh copy, so the live database is neither modified nor left in another journal mode"""
+        path = os.path.join(directory, f'{mode}.sqlite3')
+        source = sqlite3.connect(settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'])
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        return path
+
+    def use_database(self, path, mode):
+        connections[DEFAULT_DB_ALIAS].close()
+        settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'] = path
+        if settings.NEWS_WRITE_LOCK_FILE:
+            settings.NEWS_WRITE_LOCK_FILE = f'{path}.write-lock'
+        if mode == 'baseline':
+            # The journal mode is stored in the file, so undo any earlier WAL switch
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode=DELETE')
+
+    def run_child(self, mode, database, options):
+        command = [
+            sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'sqlite_load_test', '--mode', mode,
+            '--database', database, '--seconds', str(options['seconds']), '--readers', str(options['readers']),
+            '--writers', str(options['writers']), '--write-rate', str(options['write_rate']), '--json',
+        ]
+        tuned = str(mode == 'tuned')
+        env = {**os.environ, 'NEWS_SQLITE_TUNED': tuned, 'NEWS_WRITE_QUEUE': tuned}
+        completed = subprocess.run(command, env=env, capture_output=True, text=True, cwd=settings.BASE_DIR)
+        if completed.returncode:
+            raise CommandError(f'{mode} run failed:\n{completed.stderr}')
+        return json.loads(completed.stdout.strip().splitlines()[-1])[0]
+
+    def measure(self, mode, options):
+        articles = list(NewsPage.objects.live().values_list('pk', 'url_path'))
+        if not articles:
+            raise CommandError('There are no live articles to load-test with')
+        urls = [self.page_url(url_path) for _, url_path in articles]
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '')), 'localhost').lstrip('.')
+
+        lock = threading.Lock()
+        reads, writes = [], []
+        errors = {'read': 0, 'write': 0, 'locked': 0}
+        deadline = time.monotonic() + options['seconds']
+
+        def failed(kind, exc):
+            with lock:
+                errors[kind] += 1
+                if isinstance(exc, OperationalError) and 'locked' in str(exc):
+                    errors['locked'] += 1
+
+        def reader():
+            client = Client(SERVER_NAME=host)
+            try:
+                while time.monotonic() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        response = client.get(random.choice(urls))
+                    except Exception as exc:
+                        failed('read', exc)
+                        continue
+                    with lock:
+                        reads.append(time.perf_counter() - start)
+                        if response.status_code >= 500:
+                            errors['read'] += 1
+            finally:
+                connections.close_all()
+
+        def write_job():
+            # The two kinds of background write: a view count flush and a related-articles index update
+            if random.random() < 0.5:
+                view_counter.record(NewsPage, random.choice(articles)[0])
+                view_counter.flush()
+            else:
+                related.rebuild_article(random.choice(articles)[0])
+
+        def writer():
+            interval = 1 / options['write_rate']
+            try:
+                while time.monotonic() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        write_queue.submit(write_job).result()
+                    except Exception as exc:
+                        failed('write', exc)
+                    else:
+                        with lock:
+                            writes.append(time.perf_counter() - start)
+                    time.sleep(max(0, interval - (time.perf_counter() - start)))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=writer) for _ in range(options['writers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        write_queue.drain()
+        elapsed = time.perf_counter() - started
+
+        return {
+            'mode': mode,
+            'journal_mode': self.journal_mode(),
+            'seconds': round(elapsed, 2),
+            'reads_per_second': round(len(reads) / elapsed, 1),
+            'read_p50_ms': round(_percentile(reads, 0.5) * 1000, 1),
+            'read_p95_ms': round(_percentile(reads, 0.95) * 1000, 1),
+            'read_p99_ms': round(_percentile(reads, 0.99) * 1000, 1),
+            'writes_per_second': round(len(writes) / elapsed, 1),
+            'write_p95_ms': round(_percentile(writes, 0.95) * 1000, 1),
+            'read_errors': errors['read'],
+            'write_errors': errors['write'],
+            'locked_errors': errors['locked'],
+        }
+
+    def page_url(self, url_path):
+        for root in Site.get_site_root_paths():
+            if url_path.startswith(root.root_path):
+                return reverse('wagtail_serve', args=(url_path[len(root.root_path):],))
+        raise CommandError(f'{url_path} is not under any site root')
+
+    def journal_mode(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            return cursor.fetchone()[0]
+
+    def report(self, results, options):
+        self.stdout.write(self.style.MIGRATE_HEADING('\nSQLite Load Test'))
+        self.stdout.write('=' * 50)
+        self.stdout.write(
+            f"{options['seconds']:g}s per run, {options['readers']} readers, "
+            f"{options['writers']} writers at {options['write_rate']:g} writes/s each"
+        )
+        self.stdout.write(
+            f"{'Mode':<10}{'Journal':>9}{'Reads/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'Writes/s':>10}{'W p95 ms':>10}{'Errors':>8}{'Locked':>8}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:<10}{result['journal_mode']:>9}{result['reads_per_second']:>9}"
+                f"{result['read_p50_ms']:>9}{result['read_p95_ms']:>9}{result['read_p99_ms']:>9}"
+                f"{result['writes_per_second']:>10}{result['write_p95_ms']:>10}"
+                f"{result['read_errors'] + result['write_errors']:>8}{result['locked_errors']:>8}"
+            )
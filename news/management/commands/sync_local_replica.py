@@ -0,0 +1,33 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into the local replica files, standing in for replication'
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if 'sqlite3' not in primary['ENGINE']:
+            raise CommandError('Only SQLite databases can be copied locally')
+        replicas = [
+            alias for alias in settings.NEWS_DATABASE_REPLICAS
+            if 'sqlite3' in settings.DATABASES[alias]['ENGINE']
+        ]
+        if not replicas:
+            raise CommandError('No SQLite replicas are configured; set NEWS_LOCAL_REPLICA=True')
+
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias in replicas:
+                connections[alias].close()
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(self.style.SUCCESS(f'Copied the primary into {alias}'))
+        finally:
+            source.close()
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from news.counters import shared_stats
+
+
+class Command(BaseCommand):
+    help = 'Report view counts buffered in each worker and flushed to the database by all workers'
+
+    def handle(self, *args, **options):
+        stats = shared_stats()
+        self.stdout.write(self.style.MIGRATE_HEADING('\nView Counter'))
+        self.stdout.write('=' * 50)
+        self.stdout.write(f"Views flushed: {stats['flushed']}")
+        self.stdout.write(f"Flushes: {stats['flushes']}")
+        if stats['flushes']:
+            self.stdout.write(f"Average views per flush: {stats['flushed'] / stats['flushes']:.1f}")
+        self.stdout.write(
+            f"Views buffered: {stats['pending']} in {stats['pending_rows']} rows "
+            f"across {len(stats['workers'])} workers"
+        )
+
+        if stats['workers']:
+            self.stdout.write(self.style.MIGRATE_HEADING('\nWorkers'))
+            self.stdout.write(f"{'Worker':<30}{'Buffered':>10}{'Rows':>8}{'Recorded':>10}{'Flushed':>10}{'Age':>7}")
+            now = time.time()
+            for name, worker in stats['workers'].items():
+                self.stdout.write(
+                    f"{name:<30}{worker['pending']:>10}{worker['pending_rows']:>8}"
+                    f"{worker['recorded']:>10}{worker['flushed']:>10}{now - worker['published_at']:>6.0f}s"
+                )
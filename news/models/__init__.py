@@ -4,6 +4,12 @@ from .base import SEOFields, TimestampedModel
 from .blocks import QuoteBlock, ContentBlock
 from .pages import NewsPage, NewsIndexPage
 from .video import VideoPage, VideoIndexPage
+from .trending import ArticleViewBucket
+from .related import RelatedArticle
+from .archive import ArchiveFacet
+from .closure import ArticleCategoryClosure
+from .sitemaps import SitemapShard
+from .replication import ReplicaHeartbeat
 
 __all__ = [
     'NewsCategory',
@@ -14,6 +20,12 @@ __all__ = [
     'ContentBlock',
     'VideoPage',
     'VideoIndexPage',
+    'ArticleViewBucket',
+    'RelatedArticle',
+    'ArchiveFacet',
+    'ArticleCategoryClosure',
+    'SitemapShard',
+    'ReplicaHeartbeat',
     'SEOFields',
     'TimestampedModel'
 ]
\ No newline at end of file
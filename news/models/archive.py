@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class ArchiveFacet(models.Model):
+    """
+    Number of live articles published in a month, overall when ``category``
+    is empty and otherwise within that category.
+    """
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    category = models.ForeignKey(
+        'news.NewsCategory',
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='archive_facets'
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Archive Facet"
+        verbose_name_plural = "Archive Facets"
+        ordering = ['-year', '-month']
+        indexes = [
+            models.Index(fields=['year', 'month', 'category']),
+            models.Index(fields=['category', 'year', 'month']),
+        ]
+
+    def __str__(self):
+        scope = self.category_id or 'all'
+        return f"{self.year}-{self.month:02d} ({scope}): {self.count}"
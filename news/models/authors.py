@@ -91,7 +91,7 @@ class Author(models.Model):
     def get_recent_articles(self, limit=5):
         """Get recent articles by this author"""
         from .pages import NewsPage
-        return NewsPage.objects.live().filter(author=self).order_by('-first_published_at')[:limit]
+        return NewsPage.objects.listing().filter(author=self).order_by('-first_published_at')[:limit]
 
     def __str__(self):
         return self.name
@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import Prefetch
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
+from wagtail.images import get_image_model
 
 class TimestampedModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -38,4 +40,13 @@ class SEOFields(models.Model):
     ]
 
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+
+def rendition_prefetch(image_field, filter_specs):
+    """Prefetch the given renditions of an image foreign key in one query"""
+    Rendition = get_image_model().get_rendition_model()
+    return Prefetch(
+        f'{image_field}__renditions',
+        queryset=Rendition.objects.filter(filter_spec__in=filter_specs)
+    )
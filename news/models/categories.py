@@ -3,6 +3,7 @@ from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from django.utils.text import slugify
 from wagtail.snippets.models import register_snippet
 from .base import TimestampedModel, SEOFields
+from ..category_tree import get_tree
 
 
 @register_snippet
@@ -58,6 +59,10 @@ class NewsCategory(TimestampedModel, SEOFields):
         default='grid',
         help_text="Default layout for category pages"
     )
+    article_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of live articles in this category"
+    )
 
     panels = [
         MultiFieldPanel([
@@ -74,6 +79,10 @@ class NewsCategory(TimestampedModel, SEOFields):
             FieldPanel('show_in_menu'),
             FieldPanel('layout'),
         ], heading="Display Options"),
+
+        MultiFieldPanel([
+            FieldPanel('article_count', read_only=True),
+        ], heading="Analytics", classname="collapsed"),
     ]
 
     panels.extend(SEOFields.seo_panels)  # Add SEO panels to the end
@@ -85,12 +94,17 @@ class NewsCategory(TimestampedModel, SEOFields):
 
     def get_hierarchy(self):
         """Returns list of parent categories plus current category"""
+        tree = get_tree()
+        if self.pk in tree.nodes and self.parent_id == tree.nodes[self.pk].parent_id:
+            return tree.hierarchy(self.pk)[:-1] + [self]
+
+        # Unsaved or re-parented in memory: walk the parents instead
         hierarchy = []
         current = self
         while current is not None:
             hierarchy.append(current)
             current = current.parent
-        return reversed(hierarchy)
+        return list(reversed(hierarchy))
 
     @property
     def full_name(self):
@@ -99,15 +113,11 @@ class NewsCategory(TimestampedModel, SEOFields):
 
     def get_children(self):
         """Returns all immediate child categories"""
-        return self.children.filter(show_in_menu=True).order_by('order')
+        return get_tree().menu_children(self.pk)
 
     def get_descendants(self):
         """Returns all descendant categories (recursive)"""
-        descendants = []
-        for child in self.get_children():
-            descendants.append(child)
-            descendants.extend(child.get_descendants())
-        return descendants
+        return get_tree().descendants(self.pk)
 
     class Meta:
         verbose_name = "News Category"
@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class ArticleCategoryClosure(models.Model):
+    """
+    An article paired with one of its categories or any ancestor of them, so that
+    a parent category lists its whole subtree with a single join and no DISTINCT.
+    """
+    article = models.ForeignKey(
+        'news.NewsPage',
+        on_delete=models.CASCADE,
+        related_name='category_closure'
+    )
+    category = models.ForeignKey(
+        'news.NewsCategory',
+        on_delete=models.CASCADE,
+        related_name='closure_articles'
+    )
+
+    class Meta:
+        verbose_name = "Article Category Closure"
+        verbose_name_plural = "Article Category Closure"
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'article'], name='unique_article_category_closure'),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} in {self.category_id}"
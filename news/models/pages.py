@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.db import models
-from wagtail.models import Page
+from wagtail.models import Page, PageManager, PageQuerySet
 from wagtail.fields import StreamField, RichTextField
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.search import index
@@ -9,10 +9,51 @@ from django.utils import timezone
 from datetime import timedelta
 
 from .blocks import ContentBlock
-from .base import SEOFields
+from .base import SEOFields, rendition_prefetch
 from .categories import NewsCategory
 from .topics import NewsTopic
 from .authors import Author
+from .. import closure, text
+from ..concurrency import run_concurrently
+from ..counters import view_counter
+from ..pagination import paginate_listing
+from ..trending import trending_articles
+
+
+# Renditions used by the article cards in listing templates
+LISTING_RENDITIONS = ['fill-400x300', 'fill-150x150', 'fill-800x500']
+
+
+class NewsPageQuerySet(PageQuerySet):
+    def listing(self):
+        """
+        Live articles with everything the listing cards need loaded up front:
+        author and featured image joined, categories, topics and the card
+        renditions prefetched, and the StreamField body left unloaded.
+        """
+        return self.live().defer_streamfields().defer('body_text').select_related(
+            'author', 'featured_image'
+        ).prefetch_related(
+            'categories',
+            'topics',
+            rendition_prefetch('featured_image', LISTING_RENDITIONS),
+        )
+
+    def in_category(self, category, include_descendants=False):
+        """
+        Articles in a category, optionally including its whole subtree through
+        the closure table, which has one row per (category, article) and so
+        needs no DISTINCT. Before the closure is first filled the subtree's
+        category ids are used instead.
+        """
+        if include_descendants:
+            if closure.is_populated():
+                return self.filter(category_closure__category=category)
+            return self.filter(categories__in=closure.subtree_ids(category.pk)).distinct()
+        return self.filter(categories=category)
+
+
+NewsPageManager = PageManager.from_queryset(NewsPageQuerySet)
 
 
 class NewsIndexPage(Page):
@@ -38,7 +79,7 @@ class NewsIndexPage(Page):
         context = super().get_context(request, *args, **kwargs)
 
         # Get published news articles
-        news_items = NewsPage.objects.child_of(self).live()
+        news_items = NewsPage.objects.listing().child_of(self)
 
         # Filter by category if specified
         category_slug = request.GET.get('category')
@@ -65,12 +106,18 @@ class NewsIndexPage(Page):
         # Order news items
         news_items = news_items.order_by('-first_published_at')
 
-        # Add items to context
+        # The four boxes are independent, so their queries run side by side
+        listing, featured, breaking, trending = run_concurrently(
+            lambda: paginate_listing(request, news_items),
+            lambda: list(news_items.filter(is_featured=True)[:5]),
+            lambda: list(news_items.filter(is_breaking_news=True)[:5]),
+            lambda: trending_articles('24h', limit=5),
+        )
         context.update({
-            'news_items': news_items,
-            'featured_news': news_items.filter(is_featured=True)[:5],
-            'breaking_news': news_items.filter(is_breaking_news=True)[:5],
-            'trending_news': news_items.order_by('-view_count')[:5],
+            'news_items': listing,
+            'featured_news': featured,
+            'breaking_news': breaking,
+            'trending_news': trending,
         })
 
         return context
@@ -195,10 +242,30 @@ class NewsPage(Page, SEOFields):
         help_text="Number of times this article has been viewed"
     )
 
+    # Plain text extracted from the body on save
+    body_text = models.TextField(
+        blank=True,
+        editable=False,
+        help_text="Plain text of the body, without markup"
+    )
+    word_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of words in the body"
+    )
+    excerpt = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        help_text="Opening of the body, used when no description is set"
+    )
+
+    objects = NewsPageManager()
+
     # Search configuration
     search_fields = Page.search_fields + [
         index.SearchField('intro'),
-        index.SearchField('body'),
+        index.SearchField('body_text'),
         index.FilterField('author'),
         index.FilterField('first_published_at'),
         index.FilterField('view_count'),
@@ -246,29 +313,32 @@ class NewsPage(Page, SEOFields):
     ]
 
     def save(self, *args, **kwargs):
-        # Calculate reading time before saving
-        if self.body:
-            word_count = len(str(self.body).split())
-            self.read_time = max(1, round(word_count / 200))  # Assuming 200 words per minute
+        # Extract body text, word count and reading time from the raw stream
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'body' in update_fields:
+            text.apply(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'body_text', 'word_count', 'excerpt', 'read_time'}
 
         super().save(*args, **kwargs)
 
+    def get_meta_description(self):
+        return self.meta_description or self.search_description or self.intro or self.excerpt
+
     def serve(self, request):
-        # Increment view count on each page view
+        # Buffer the view; the counter flushes aggregated deltas in bulk
         self.view_count += 1
-        self.save(update_fields=['view_count'])
+        view_counter.record(NewsPage, self.pk)
         return super().serve(request)
 
     def get_absolute_url(self):
         return self.url
 
     def get_related_articles(self, limit=3):
-        """Get related articles based on categories and topics."""
-        related = NewsPage.objects.live().filter(
-            models.Q(categories__in=self.categories.all()) |
-            models.Q(topics__in=self.topics.all())
-        ).exclude(id=self.id).distinct()
-        return related[:limit]
+        """Get the most related articles from the precomputed related-articles index."""
+        return NewsPage.objects.listing().filter(
+            neighbour_of__article=self
+        ).order_by('neighbour_of__rank')[:limit]
 
     class Meta:
         verbose_name = "News Article"
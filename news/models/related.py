@@ -0,0 +1,33 @@
+from django.db import models
+
+
+class RelatedArticle(models.Model):
+    """One of the precomputed top-K neighbours of an article"""
+    article = models.ForeignKey(
+        'news.NewsPage',
+        on_delete=models.CASCADE,
+        related_name='related_links'
+    )
+    related = models.ForeignKey(
+        'news.NewsPage',
+        on_delete=models.CASCADE,
+        related_name='neighbour_of'
+    )
+    score = models.FloatField(default=0)
+    rank = models.PositiveSmallIntegerField(
+        help_text="Position of this neighbour, starting at 0 for the most related"
+    )
+
+    class Meta:
+        verbose_name = "Related Article"
+        verbose_name_plural = "Related Articles"
+        ordering = ['article', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'related'], name='unique_related_article'),
+        ]
+        indexes = [
+            models.Index(fields=['article', 'rank']),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} -> {self.related_id} ({self.score:.2f})"
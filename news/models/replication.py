@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class ReplicaHeartbeat(models.Model):
+    """
+    Single row stamped on the primary; comparing a replica's copy with the
+    primary's tells how far behind the replica is.
+    """
+    beat = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Replica Heartbeat"
+        verbose_name_plural = "Replica Heartbeats"
+
+    def __str__(self):
+        return f"Heartbeat at {self.beat:%Y-%m-%d %H:%M:%S}"
@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class SitemapShard(models.Model):
+    """
+    A stored sitemap file listing the live articles and videos first
+    published in a month. Months with more URLs than one sitemap may hold
+    are split into numbered parts.
+    """
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    part = models.PositiveSmallIntegerField(default=1)
+    path = models.CharField(max_length=255)
+    url_count = models.PositiveIntegerField(default=0)
+    lastmod = models.DateTimeField(null=True, blank=True)
+    generated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Sitemap Shard"
+        verbose_name_plural = "Sitemap Shards"
+        ordering = ['-year', '-month', 'part']
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'month', 'part'], name='unique_sitemap_shard'),
+        ]
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d} part {self.part}: {self.url_count} URLs"
@@ -1,13 +1,11 @@
-from datetime import timedelta
-
 from django import forms
 from django.db import models
-from django.utils import timezone
 from django.utils.text import slugify
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.snippets.models import register_snippet
 
 from .base import TimestampedModel, SEOFields
+from ..counters import view_counter
 
 
 @register_snippet
@@ -58,7 +56,7 @@ class NewsTopic(TimestampedModel, SEOFields):
     )
     article_count = models.PositiveIntegerField(
         default=0,
-        help_text="Number of articles tagged with this topic"
+        help_text="Number of live articles tagged with this topic"
     )
 
     # RSS Feed Settings
@@ -111,7 +109,7 @@ class NewsTopic(TimestampedModel, SEOFields):
     def increment_view_count(self):
         """Increment the view count for this topic"""
         self.view_count += 1
-        self.save(update_fields=['view_count'])
+        view_counter.record(NewsTopic, self.pk)
 
     def increment_follower_count(self):
         """Increment the follower count for this topic"""
@@ -127,24 +125,20 @@ class NewsTopic(TimestampedModel, SEOFields):
     def update_article_count(self):
         """Update the count of articles tagged with this topic"""
         from .pages import NewsPage  # Import here to avoid circular import
-        self.article_count = NewsPage.objects.filter(topics=self).count()
+        self.article_count = NewsPage.objects.live().filter(topics=self).count()
         self.save(update_fields=['article_count'])
 
     def get_related_articles(self, limit=5):
         """Get related articles for this topic"""
         from .pages import NewsPage  # Import here to avoid circular import
-        return NewsPage.objects.live().filter(
+        return NewsPage.objects.listing().filter(
             topics=self
         ).order_by('-first_published_at')[:limit]
 
     def get_trending_articles(self, days=7, limit=5):
         """Get trending articles for this topic within specified days"""
-        from .pages import NewsPage
-        start_date = timezone.now() - timedelta(days=days)
-        return NewsPage.objects.live().filter(
-            topics=self,
-            first_published_at__gte=start_date
-        ).order_by('-view_count')[:limit]
+        from ..trending import trending_articles, window_for_days
+        return trending_articles(window_for_days(days), limit=limit, topic=self)
 
     class Meta:
         verbose_name = "News Topic"
@@ -0,0 +1,25 @@
+from django.db import models
+
+
+class ArticleViewBucket(models.Model):
+    """Number of views an article received within one clock hour"""
+    article = models.ForeignKey(
+        'news.NewsPage',
+        on_delete=models.CASCADE,
+        related_name='view_buckets'
+    )
+    hour = models.DateTimeField(
+        db_index=True,
+        help_text="Start of the hour these views were recorded in"
+    )
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Article View Bucket"
+        verbose_name_plural = "Article View Buckets"
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'hour'], name='unique_article_view_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} @ {self.hour:%Y-%m-%d %H:00}: {self.views}"
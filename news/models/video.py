@@ -1,16 +1,34 @@
 from django.db import models
 from django import forms
-from wagtail.models import Page
+from wagtail.models import Page, PageManager, PageQuerySet
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.fields import RichTextField
 from wagtail.search import index
 
-from .base import SEOFields
+from .base import SEOFields, rendition_prefetch
 from .categories import NewsCategory
 from .topics import NewsTopic
+from ..counters import view_counter
 import urllib.parse
 
 
+# Renditions used by the video cards in listing templates
+LISTING_RENDITIONS = ['fill-400x300']
+
+
+class VideoPageQuerySet(PageQuerySet):
+    def listing(self):
+        """Live videos with thumbnail, categories, topics and card renditions loaded up front"""
+        return self.live().select_related('thumbnail').prefetch_related(
+            'categories',
+            'topics',
+            rendition_prefetch('thumbnail', LISTING_RENDITIONS),
+        )
+
+
+VideoPageManager = PageManager.from_queryset(VideoPageQuerySet)
+
+
 class VideoIndexPage(Page):
     """Index page for listing all videos"""
     intro = RichTextField(blank=True)
@@ -22,9 +40,9 @@ class VideoIndexPage(Page):
     def get_context(self, request):
         context = super().get_context(request)
         # Get all videos
-        context['full_videos'] = VideoPage.objects.live().child_of(self).filter(
+        context['full_videos'] = VideoPage.objects.listing().child_of(self).filter(
             video_type='full').order_by('-first_published_at')
-        context['shorts'] = VideoPage.objects.live().child_of(self).filter(
+        context['shorts'] = VideoPage.objects.listing().child_of(self).filter(
             video_type='short').order_by('-first_published_at')
         return context
 
@@ -168,6 +186,8 @@ class VideoPage(Page, SEOFields):
         ], heading="SEO"),
     ]
 
+    objects = VideoPageManager()
+
     # Search config
     search_fields = Page.search_fields + [
         index.SearchField('description'),
@@ -185,4 +205,4 @@ class VideoPage(Page, SEOFields):
 
     def increment_view_count(self):
         self.view_count += 1
-        self.save(update_fields=['view_count'])
\ No newline at end of file
+        view_counter.record(VideoPage, self.pk)
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Full-response cache for anonymous readers of Wagtail pages.
+
+Responses are stored gzip-compressed under the host, path and the query
+parameters that select a variant of a page (pagination and listing filters),
+tagged with the surrogate keys of the page that produced them. Any other
+parameter, such as campaign tracking, shares the cached response and is
+removed before the page renders so that it cannot leak into that response. The
+publish handlers invalidate those keys, which expires exactly the affected
+responses, and the same keys are sent as ``Surrogate-Key``/``Cache-Tag``
+headers so a CDN in front of the site can follow the same purges.
+"""
+import gzip
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpResponse, QueryDict
+from django.utils.cache import patch_vary_headers
+
+from .caching import get_tagged, make_key, set_tagged
+from .counters import view_counter
+
+EXCLUDED_PATH_PREFIXES = ('/admin/', '/django-admin/', '/documents/')
+# Query parameters that Wagtail pages read; every other one is ignored
+VARIANT_PARAMS = ('page', 'cursor', 'descendants', 'category', 'topic', 'date')
+
+
+def surrogate_keys_for(page):
+    """Tags a page response depends on"""
+    from home.models import HomePage
+    from .models import NewsIndexPage, NewsPage, VideoIndexPage, VideoPage
+
+    keys = {f'page:{page.pk}'}
+    if isinstance(page, HomePage):
+        keys.add('homepage')
+    elif isinstance(page, (NewsPage, VideoPage)):
+        keys.update(f'category:{pk}' for pk in page.categories.values_list('pk', flat=True))
+        keys.update(f'topic:{pk}' for pk in page.topics.values_list('pk', flat=True))
+    elif isinstance(page, NewsIndexPage):
+        keys.add('news')
+    elif isinstance(page, VideoIndexPage):
+        keys.add('videos')
+    return keys
+
+
+def set_surrogate_keys(request, page):
+    """Mark the response to this request as cacheable under the page's surrogate keys"""
+    from .models import NewsPage
+
+    if page.get_view_restrictions().exists():
+        # Restricted pages may be served to readers who passed a password check
+        return
+    request.surrogate_keys = surrogate_keys_for(page)
+    if getattr(request, 'page_cache_lookup', False):
+        request.GET = _variant_query(request)
+    if isinstance(page, NewsPage):
+        request.counted_view = (page._meta.label, page.pk)
+
+
+def _variant_query(request):
+    return QueryDict(urlencode(
+        [(name, request.GET.getlist(name)) for name in VARIANT_PARAMS if name in request.GET], doseq=True
+    ))
+
+
+def _header_keys(keys):
+    return [key.replace(':', '-') for key in sorted(keys)]
+
+
+def add_surrogate_headers(response, keys):
+    header_keys = _header_keys(keys)
+    response['Surrogate-Key'] = ' '.join(header_keys)
+    response['Cache-Tag'] = ','.join(header_keys)
+
+
+class AnonymousPageCacheMiddleware:
+    """Serve Wagtail pages to logged-out readers from the tagged response cache"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._is_cacheable_request(request) or request.user.is_authenticated:
+            return self.get_response(request)
+
+        key = self._cache_key(request)
+        entry = get_tagged(key)
+        if entry is not None:
+            return self._cached_response(request, entry)
+
+        response = self.get_response(request)
+        self._store(request, key, response)
+        return response
+
+    async def __acall__(self, request):
+        # Under ASGI the user and cache lookups must not block the event loop
+        if not self._is_cacheable_request(request) or (await request.auser()).is_authenticated:
+            return await self.get_response(request)
+
+        key = self._cache_key(request)
+        entry = await sync_to_async(get_tagged)(key)
+        if entry is not None:
+            return await sync_to_async(self._cached_response)(request, entry)
+
+        response = await self.get_response(request)
+        await sync_to_async(self._store)(request, key, response)
+        return response
+
+    def _cache_key(self, request):
+        request.page_cache_lookup = True
+        return make_key('news:page', request.get_host(), request.path, sorted(_variant_query(request).lists()))
+
+    def _store(self, request, key, response):
+        keys = getattr(request, 'surrogate_keys', None)
+        if keys is None:
+            return
+
+        add_surrogate_headers(response, keys)
+        if self._is_cacheable_response(response):
+            entry = {
+                'status': response.status_code,
+                'headers': [
+                    (name, value) for name, value in response.items()
+                    if name.lower() not in ('content-length', 'content-encoding')
+                ],
+                'body': gzip.compress(response.content),
+                'view': getattr(request, 'counted_view', None),
+            }
+            set_tagged(key, entry, keys, getattr(settings, 'NEWS_PAGE_CACHE_TIMEOUT', 300))
+            response['X-Cache'] = 'MISS'
+
+    def _is_cacheable_request(self, request):
+        return (
+            getattr(settings, 'NEWS_PAGE_CACHE_ENABLED', True) and
+            request.method == 'GET' and
+            not request.path.startswith(EXCLUDED_PATH_PREFIXES)
+        )
+
+    def _is_cacheable_response(self, response):
+        cache_control = response.get('Cache-Control', '')
+        return (
+            response.status_code == 200 and
+            not response.streaming and
+            not response.cookies and
+            'private' not in cache_control and
+            'no-cache' not in cache_control
+        )
+
+    def _cached_response(self, request, entry):
+        if entry['view']:
+            label, pk = entry['view']
+            view_counter.record(apps.get_model(label), pk)
+
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = HttpResponse(entry['body'], status=entry['status'])
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(entry['body']), status=entry['status'])
+        for name, value in entry['headers']:
+            response[name] = value
+        patch_vary_headers(response, ['Accept-Encoding'])
+        response['X-Cache'] = 'HIT'
+        return response
@@ -0,0 +1,135 @@
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+PER_PAGE = 12
+
+
+def encode_cursor(direction, published_at, pk):
+    """Build an opaque cursor token for a (first_published_at, id) position"""
+    raw = f'{direction}|{published_at.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (direction, published_at, pk) or None for a malformed token"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, published_at, pk = base64.urlsafe_b64decode(padded).decode().split('|')
+        if direction not in ('n', 'p'):
+            return None
+        return direction, datetime.fromisoformat(published_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _position(item):
+    """The (first_published_at, id) of a model instance or a ``values()`` row"""
+    if isinstance(item, dict):
+        return item['first_published_at'], item['pk']
+    return item.first_published_at, item.pk
+
+
+class CursorPage:
+    """A page of results addressed by cursor tokens instead of page numbers"""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def approximate_count(self):
+        return self.paginator.approximate_count
+
+
+class CursorPaginator:
+    """
+    Keyset paginator ordered by (-first_published_at, -id), over model or
+    ``values()`` querysets.
+    Every page is a bounded index range scan, so deep pages cost the same as
+    the first one. No COUNT is issued unless an approximate total is asked
+    for, and that is served from a cached counter.
+    """
+
+    def __init__(self, queryset, per_page=PER_PAGE, count_key=None):
+        self.queryset = queryset.filter(first_published_at__isnull=False)
+        self.per_page = per_page
+        self.count_key = count_key
+
+    def get_page(self, cursor=None):
+        position = decode_cursor(cursor) if cursor else None
+
+        if position is None:
+            items = list(self.queryset.order_by('-first_published_at', '-pk')[:self.per_page + 1])
+            has_next, has_previous = len(items) > self.per_page, False
+            items = items[:self.per_page]
+        else:
+            direction, published_at, pk = position
+            if direction == 'n':
+                items = list(self.queryset.filter(
+                    Q(first_published_at__lt=published_at) |
+                    Q(first_published_at=published_at, pk__lt=pk)
+                ).order_by('-first_published_at', '-pk')[:self.per_page + 1])
+                has_next, has_previous = len(items) > self.per_page, True
+                items = items[:self.per_page]
+            else:
+                items = list(self.queryset.filter(
+                    Q(first_published_at__gt=published_at) |
+                    Q(first_published_at=published_at, pk__gt=pk)
+                ).order_by('first_published_at', 'pk')[:self.per_page + 1])
+                has_next, has_previous = True, len(items) > self.per_page
+                items = items[:self.per_page][::-1]
+
+        next_cursor = previous_cursor = None
+        if items:
+            if has_next:
+                next_cursor = encode_cursor('n', *_position(items[-1]))
+            if has_previous:
+                previous_cursor = encode_cursor('p', *_position(items[0]))
+        return CursorPage(items, self, next_cursor, previous_cursor)
+
+    @property
+    def approximate_count(self):
+        """Total number of items, refreshed at most once per timeout"""
+        if not self.count_key:
+            return None
+        timeout = getattr(settings, 'NEWS_LISTING_COUNT_TIMEOUT', 600)
+        return cache.get_or_set(f'news:listing-count:{self.count_key}', self.queryset.count, timeout)
+
+
+def paginate_listing(request, queryset, count_key=None, per_page=PER_PAGE):
+    """
+    Paginate a listing queryset for a request.
+    Cursor pagination is used unless it is disabled or a legacy ``?page=``
+    link is followed, in which case the numbered Paginator is kept.
+    """
+    if getattr(settings, 'NEWS_CURSOR_PAGINATION', True) and 'page' not in request.GET:
+        return CursorPaginator(queryset, per_page, count_key).get_page(request.GET.get('cursor'))
+
+    paginator = Paginator(queryset.order_by('-first_published_at', '-pk'), per_page)
+    return paginator.get_page(request.GET.get('page'))
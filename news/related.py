@@ -0,0 +1,286 @@
+"""
+Precomputed related-articles index.
+
+Candidates are the live articles sharing a category or topic with the
+source article that were published closest to it. Each candidate is scored
+on weighted category and topic overlap, closeness in publication time and,
+optionally, a co-view signal, and the top K are stored as ``RelatedArticle``
+rows so that reading them is a single indexed lookup. Full rebuilds load the
+tag postings of all live articles once instead of querying per article.
+"""
+import heapq
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .write_queue import write_queue
+
+DEFAULT_WEIGHTS = {
+    'category': 1.0,
+    'topic': 2.0,
+    'recency': 1.0,
+    'coview': 0.5,
+}
+RECENCY_HALF_LIFE_DAYS = 7
+CHUNK_SIZE = 2000
+
+
+def _weights():
+    return {**DEFAULT_WEIGHTS, **getattr(settings, 'NEWS_RELATED_WEIGHTS', {})}
+
+
+def _index_size():
+    return getattr(settings, 'NEWS_RELATED_SIZE', 10)
+
+
+def _candidates_per_tag():
+    return getattr(settings, 'NEWS_RELATED_CANDIDATES', 500)
+
+
+def _coview_scores(article_id, candidate_ids):
+    """Optional ``{candidate_id: score}`` from the NEWS_RELATED_COVIEW_PROVIDER callable"""
+    provider = getattr(settings, 'NEWS_RELATED_COVIEW_PROVIDER', None)
+    if not provider:
+        return {}
+    return import_string(provider)(article_id, candidate_ids)
+
+
+def _nearest(times, ids, origin, count):
+    """
+    The ids of the ``count`` entries published closest to ``origin``, from
+    parallel lists sorted by publication time. The nearest entries form a
+    contiguous run, found by a binary search on where it starts.
+    """
+    if len(ids) <= count:
+        return ids
+    low, high = 0, len(ids) - count
+    while low < high:
+        middle = (low + high) // 2
+        if origin - times[middle] > times[middle + count] - origin:
+            low = middle + 1
+        else:
+            high = middle
+    return ids[low:low + count]
+
+
+class _QueriedPostings:
+    """The tags and candidates of a single article, read with a few queries each"""
+
+    def __init__(self, article_id):
+        from .models import NewsPage
+
+        self.links = {
+            'category': (NewsPage.categories.through.objects, 'newscategory_id'),
+            'topic': (NewsPage.topics.through.objects, 'newstopic_id'),
+        }
+        self.published_at = NewsPage.objects.filter(pk=article_id).values_list('first_published_at', flat=True).first()
+        self.origin = self.published_at.timestamp() if self.published_at else None
+        self.tags = {
+            kind: list(links.filter(newspage_id=article_id).values_list(column, flat=True))
+            for kind, (links, column) in self.links.items()
+        }
+
+    def nearest(self, kind, tag_id, count):
+        links, column = self.links[kind]
+        rows = links.filter(**{column: tag_id}, newspage__live=True, newspage__first_published_at__isnull=False)
+        if self.origin is None:
+            return list(rows.order_by('-newspage__first_published_at').values_list('newspage_id', flat=True)[:count])
+        earlier = rows.filter(newspage__first_published_at__lte=self.published_at).order_by(
+            '-newspage__first_published_at', '-newspage_id'
+        ).values_list('newspage__first_published_at', 'newspage_id')[:count]
+        later = rows.filter(newspage__first_published_at__gt=self.published_at).order_by(
+            'newspage__first_published_at', 'newspage_id'
+        ).values_list('newspage__first_published_at', 'newspage_id')[:count]
+        window = [*reversed(earlier), *later]
+        return _nearest([published.timestamp() for published, _ in window], [pk for _, pk in window],
+                        self.origin, count)
+
+    def published(self, article_ids):
+        from .models import NewsPage
+
+        return {
+            pk: published.timestamp()
+            for pk, published in NewsPage.objects.filter(
+                pk__in=article_ids, first_published_at__isnull=False
+            ).values_list('pk', 'first_published_at')
+        }
+
+
+class Postings:
+    """
+    Every live article's tags and, per tag, its articles in publication
+    order, loaded in one pass so that a full rebuild issues no query per
+    article.
+    """
+
+    def __init__(self):
+        from .models import NewsPage
+
+        self.article_ids, self.times = [], {}
+        for pk, published in NewsPage.objects.live().values_list('pk', 'first_published_at').iterator(
+                chunk_size=CHUNK_SIZE):
+            self.article_ids.append(pk)
+            if published:
+                self.times[pk] = published.timestamp()
+        self.article_tags = {'category': defaultdict(list), 'topic': defaultdict(list)}
+        self.postings = {}
+        for kind, through, column in (
+                ('category', NewsPage.categories.through, 'newscategory_id'),
+                ('topic', NewsPage.topics.through, 'newstopic_id')):
+            members = defaultdict(list)
+            for article_id, tag_id in through.objects.values_list('newspage_id', column).iterator(
+                    chunk_size=CHUNK_SIZE):
+                self.article_tags[kind][article_id].append(tag_id)
+                if article_id in self.times:
+                    members[tag_id].append((self.times[article_id], article_id))
+            self.postings[kind] = {}
+            for tag_id, articles in members.items():
+                articles.sort()
+                self.postings[kind][tag_id] = ([time for time, _ in articles], [pk for _, pk in articles])
+
+    def for_article(self, article_id):
+        """Point the postings at the article whose neighbours are computed next"""
+        self.origin = self.times.get(article_id)
+        self.tags = {kind: tags.get(article_id, []) for kind, tags in self.article_tags.items()}
+        return self
+
+    def nearest(self, kind, tag_id, count):
+        times, ids = self.postings[kind].get(tag_id, ([], []))
+        if self.origin is None:
+            return ids[-count:]
+        return _nearest(times, ids, self.origin, count)
+
+    def published(self, article_ids):
+        return self.times
+
+
+def compute_neighbours(article_id, postings=None):
+    """
+    Return the ``[(related_id, score), ...]`` top-K neighbours of an article.
+    The candidates of each shared tag are the articles published closest to
+    it, so an old article is compared with its own period rather than with
+    whatever is newest. ``postings`` is a ``Postings`` loaded by a full
+    rebuild; without one the candidates are queried.
+    """
+    postings = postings.for_article(article_id) if postings else _QueriedPostings(article_id)
+    # One extra, since the article is the closest to itself
+    limit = _candidates_per_tag() + 1
+    weights = _weights()
+
+    # Weighted number of categories and topics each candidate shares with the article
+    overlap = {}
+    for kind, tag_ids in postings.tags.items():
+        shared = Counter()
+        for tag_id in tag_ids:
+            shared.update(postings.nearest(kind, tag_id, limit))
+        for candidate, count in shared.items():
+            overlap[candidate] = overlap.get(candidate, 0) + weights[kind] * count
+    overlap.pop(article_id, None)
+    if not overlap:
+        return []
+
+    candidates = list(overlap)
+    published = postings.published(candidates)
+    origin = postings.origin
+    coview = _coview_scores(article_id, candidates)
+    size = _index_size()
+
+    # Recency adds at most its weight, so once that cannot lift a candidate past
+    # the K-th best score neither can it lift any candidate with less overlap.
+    # Co-view scores have no bound, so they are all scored.
+    ordered = candidates if coview else sorted(candidates, key=overlap.__getitem__, reverse=True)
+    best = []
+    for candidate in ordered:
+        if not coview and len(best) == size and overlap[candidate] + weights['recency'] < best[0][0]:
+            break
+        recency = 0.0
+        if origin is not None and candidate in published:
+            days = abs(origin - published[candidate]) / 86400
+            recency = math.pow(0.5, days / RECENCY_HALF_LIFE_DAYS)
+        score = overlap[candidate] + weights['recency'] * recency + weights['coview'] * coview.get(candidate, 0)
+        if len(best) < size:
+            heapq.heappush(best, (score, candidate))
+        else:
+            heapq.heappushpop(best, (score, candidate))
+
+    return [(candidate, score) for score, candidate in sorted(best, reverse=True)]
+
+
+def store_neighbours(article_id, neighbours):
+    store_many({article_id: neighbours})
+
+
+def store_many(neighbours_by_article):
+    """Replace the stored neighbours of several articles at once"""
+    from .models import RelatedArticle
+
+    with transaction.atomic():
+        RelatedArticle.objects.filter(article_id__in=list(neighbours_by_article)).delete()
+        RelatedArticle.objects.bulk_create([
+            RelatedArticle(article_id=article_id, related_id=related_id, score=score, rank=rank)
+            for article_id, neighbours in neighbours_by_article.items()
+            for rank, (related_id, score) in enumerate(neighbours)
+        ], batch_size=CHUNK_SIZE)
+
+
+def rebuild_article(article_id):
+    """Recompute and store the neighbours of one article, returning them"""
+    neighbours = compute_neighbours(article_id)
+    store_neighbours(article_id, neighbours)
+    return neighbours
+
+
+def rebuild_all(progress=None):
+    """
+    Recompute the neighbours of every live article from one in-memory pass
+    over the tag postings, storing them in chunks. Returns how many articles
+    were processed; ``progress`` is called with the running total.
+    """
+    postings = Postings()
+    article_ids = postings.article_ids
+    for start in range(0, len(article_ids), CHUNK_SIZE):
+        chunk = article_ids[start:start + CHUNK_SIZE]
+        store_many({article_id: compute_neighbours(article_id, postings) for article_id in chunk})
+        if progress:
+            progress(start + len(chunk))
+    return len(article_ids)
+
+
+def update_article(article_id):
+    """
+    Refresh an article after it was published or retagged.
+    Its new neighbours are refreshed as well, since the similarity is
+    symmetric and the article may now belong in their top K.
+    """
+    previous = set(_stored_neighbour_ids(article_id))
+    neighbours = rebuild_article(article_id)
+    for related_id in {related_id for related_id, _ in neighbours} | previous:
+        rebuild_article(related_id)
+
+
+def remove_article(article_id):
+    """
+    Drop an article from every neighbour list, e.g. when it is unpublished,
+    and refill those lists once the removal has committed
+    """
+    from .models import RelatedArticle
+
+    affected = RelatedArticle.objects.filter(related_id=article_id)
+    article_ids = set(affected.values_list('article_id', flat=True))
+    affected.delete()
+    for affected_id in article_ids:
+        schedule_update(affected_id)
+
+
+def _stored_neighbour_ids(article_id):
+    from .models import RelatedArticle
+
+    return RelatedArticle.objects.filter(article_id=article_id).values_list('related_id', flat=True)
+
+
+def schedule_update(article_id):
+    """Update the index for an article on the writer thread once the current transaction commits"""
+    transaction.on_commit(lambda: write_queue.submit(update_article, article_id))
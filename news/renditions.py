@@ -0,0 +1,149 @@
+"""
+Eager rendition generation.
+
+The filter specs each image field needs are discovered by scanning the
+templates for ``{% image obj.field spec %}`` tags. When an image is uploaded
+or a page or snippet pointing at images is saved, the missing renditions are
+generated in a process pool once the transaction commits, so that readers
+never wait on R2 downloads and resizing.
+"""
+import logging
+import multiprocessing
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.db import models, transaction
+from django.template.utils import get_app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+IMAGE_TAG_RE = re.compile(r'{%\s*image\s+[\w.]*?\.?(\w+)\s+([\w-]+(?:\|[\w-]+)*)')
+
+_executor = None
+
+
+def _template_dirs():
+    """Project template directories; third-party apps such as the Wagtail admin are skipped"""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    dirs = []
+    for engine in settings.TEMPLATES:
+        dirs.extend(engine.get('DIRS', []))
+    dirs.extend(
+        directory for directory in get_app_template_dirs('templates')
+        if Path(directory).resolve().is_relative_to(base_dir)
+    )
+    return [Path(directory) for directory in dirs]
+
+
+@lru_cache(maxsize=None)
+def specs_by_field():
+    """Return ``{field_name: {filter_spec, ...}}`` for every image tag in the templates"""
+    specs = defaultdict(set)
+    for directory in _template_dirs():
+        for path in directory.rglob('*.html'):
+            try:
+                source = path.read_text(encoding='utf-8')
+            except (OSError, UnicodeDecodeError):
+                continue
+            for field, spec in IMAGE_TAG_RE.findall(source):
+                if spec not in ('as', 'original'):
+                    specs[field].add(spec)
+    for field, extra in getattr(settings, 'NEWS_RENDITION_EXTRA_SPECS', {}).items():
+        specs[field].update(extra)
+    return {field: frozenset(field_specs) for field, field_specs in specs.items()}
+
+
+def all_specs():
+    """Every spec used by any template, for images that are not attached to anything yet"""
+    return frozenset().union(*specs_by_field().values())
+
+
+def image_fields(model):
+    """Return ``{field_name: specs}`` for the image foreign keys of a model that templates render"""
+    from wagtail.images import get_image_model
+
+    image_model = get_image_model()
+    known = specs_by_field()
+    return {
+        field.name: known[field.name]
+        for field in model._meta.get_fields()
+        if isinstance(field, models.ForeignKey)
+        and field.related_model is image_model
+        and field.name in known
+    }
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def _generate(image_id, specs):
+    """Create the renditions of one image that do not exist yet"""
+    from wagtail.images import get_image_model
+
+    image = get_image_model().objects.filter(pk=image_id).first()
+    if image is None:
+        return image_id, 0
+    return image_id, len(image.get_renditions(*sorted(specs)))
+
+
+def _workers():
+    return getattr(settings, 'NEWS_RENDITION_WORKERS', 2)
+
+
+def get_executor(workers=None):
+    """
+    The shared process pool. Workers are spawned rather than forked so that
+    they do not inherit the web worker's database connections.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=workers or _workers(),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+    return _executor
+
+
+def _log_failure(future):
+    if future.exception():
+        logger.error("Rendition generation failed", exc_info=future.exception())
+
+
+def generate(image_id, specs):
+    """Generate renditions in the pool, or inline when NEWS_RENDITION_WORKERS is 0"""
+    if not specs:
+        return
+    if not _workers():
+        _generate(image_id, specs)
+        return
+    get_executor().submit(_generate, image_id, frozenset(specs)).add_done_callback(_log_failure)
+
+
+def schedule(image_id, specs):
+    """Generate renditions once the current transaction commits"""
+    if image_id:
+        transaction.on_commit(lambda: generate(image_id, specs))
+
+
+def schedule_for_instance(instance):
+    """Schedule the renditions every image field of a page or snippet is rendered with"""
+    for field, specs in image_fields(type(instance)).items():
+        schedule(getattr(instance, f'{field}_id'), specs)
+
+
+def pending_for_model(model):
+    """Return ``{image_id: specs}`` for every image referenced by ``model``"""
+    pending = defaultdict(set)
+    for field, specs in image_fields(model).items():
+        for image_id in model._default_manager.exclude(
+                **{f'{field}__isnull': True}).values_list(f'{field}_id', flat=True).distinct():
+            pending[image_id].update(specs)
+    return pending
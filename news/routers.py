@@ -0,0 +1,202 @@
+"""
+Read-replica routing.
+
+``ReplicaRoutingMiddleware`` marks the public GET and HEAD requests whose
+reads may go to a replica. ``ReplicaRouter`` then sends their reads,
+including those made by template tags and feeds, to a healthy replica
+alias. Everything else stays on ``default``: writes, the admin, requests
+from readers holding the sticky cookie, and the rest of any request that
+has already asked the router for the write database, whether through a
+save, a queryset update or a ``get_or_create``. An authenticated user who
+writes in an unsafe request (an editor publishing, say) gets a short-lived
+cookie that keeps their reads on the primary until replicas have caught up.
+
+Replica health comes from ``ReplicaHeartbeat``. The primary stamps it on
+every publish and whenever the ``replica_heartbeat`` command runs. A
+replica whose copy of the stamp differs from the primary's, or which cannot
+be queried, is skipped until a later check finds it current again. A
+replica that has not received a publish from a moment ago is therefore
+never used to fill caches with the old version of the page.
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = 'news_primary'
+EXCLUDED_PATH_PREFIXES = ('/admin/', '/django-admin/')
+# Sessions and users must never be read stale, e.g. right after logging in
+PRIMARY_APPS = {'sessions', 'auth'}
+
+_routing = contextvars.ContextVar('news_replica_routing', default=None)
+
+
+class _Routing:
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+def replica_aliases():
+    return getattr(settings, 'NEWS_DATABASE_REPLICAS', [])
+
+
+# Lag reported for a replica that is behind by less than the clocks can measure
+MIN_LAG = 0.001
+
+_health_lock = threading.Lock()
+_health = {'healthy': [], 'checked': None}
+
+
+def replica_lag(alias):
+    """
+    Seconds the replica has been missing the primary's latest heartbeat, 0 only
+    when it has that beat. A replica that is behind never reports 0, however
+    recent the beat it is missing.
+    """
+    from .models import ReplicaHeartbeat
+
+    primary = ReplicaHeartbeat.objects.using(DEFAULT_DB_ALIAS).filter(pk=1).values_list('beat', flat=True).first()
+    if primary is None:
+        return 0
+    replica = ReplicaHeartbeat.objects.using(alias).filter(pk=1).values_list('beat', flat=True).first()
+    if replica == primary:
+        return 0
+    # The beat may have been stamped by a host whose clock runs ahead
+    return max((timezone.now() - primary).total_seconds(), MIN_LAG)
+
+
+def healthy_replicas():
+    """Replicas within the lag limit, re-checked at most every NEWS_REPLICA_CHECK_INTERVAL seconds"""
+    now = time.monotonic()
+    interval = getattr(settings, 'NEWS_REPLICA_CHECK_INTERVAL', 5)
+    if _health['checked'] is not None and now - _health['checked'] < interval:
+        return _health['healthy']
+
+    with _health_lock:
+        if _health['checked'] is None or now - _health['checked'] >= interval:
+            max_lag = getattr(settings, 'NEWS_REPLICA_MAX_LAG', 10)
+            healthy = []
+            for alias in replica_aliases():
+                try:
+                    lag = replica_lag(alias)
+                except DatabaseError:
+                    logger.warning('Replica %s is unreachable, reading from the primary', alias, exc_info=True)
+                    continue
+                if lag > max_lag:
+                    logger.warning('Replica %s is %.1fs behind, reading from the primary', alias, lag)
+                    continue
+                if lag:
+                    # Still replaying a recent publish; normal, so not worth a warning
+                    logger.info('Replica %s is catching up (%.1fs), reading from the primary', alias, lag)
+                    continue
+                healthy.append(alias)
+            _health.update(healthy=healthy, checked=now)
+        return _health['healthy']
+
+
+def note_write():
+    """Keep the rest of the current request, and an editor's next requests, on the primary"""
+    routing = _routing.get()
+    if routing is not None:
+        routing.wrote = True
+
+
+def beat():
+    """Stamp the heartbeat on the primary"""
+    from .models import ReplicaHeartbeat
+
+    ReplicaHeartbeat.objects.using(DEFAULT_DB_ALIAS).update_or_create(pk=1, defaults={'beat': timezone.now()})
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or not routing.use_replica or routing.wrote:
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        replicas = healthy_replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        note_write()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """Let safe, public requests read from replicas and make editors sticky to the primary after writing"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        routing = _Routing(use_replica=self._may_use_replica(request))
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+        if self._needs_sticky(request, routing) and request.user.is_authenticated:
+            self._make_sticky(response)
+        return response
+
+    async def __acall__(self, request):
+        # Sync code further down runs in copies of this context, which share the same _Routing
+        routing = _Routing(use_replica=self._may_use_replica(request))
+        token = _routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+        if self._needs_sticky(request, routing) and (await request.auser()).is_authenticated:
+            self._make_sticky(response)
+        return response
+
+    def _needs_sticky(self, request, routing):
+        # Safe requests only touch the writer incidentally, e.g. Wagtail's
+        # get_or_create of the user profile on every admin page
+        return (
+            routing.wrote
+            and request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and hasattr(request, 'auser')
+        )
+
+    def _make_sticky(self, response):
+        response.set_cookie(
+            STICKY_COOKIE, '1',
+            max_age=getattr(settings, 'NEWS_REPLICA_STICKY_SECONDS', 30),
+            httponly=True, samesite='Lax',
+        )
+
+    def _may_use_replica(self, request):
+        return (
+            bool(replica_aliases())
+            and request.method in ('GET', 'HEAD')
+            and not request.path.startswith(EXCLUDED_PATH_PREFIXES)
+            and STICKY_COOKIE not in request.COOKIES
+        )
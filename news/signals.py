@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent after buffered view increments are written to the database.
+# ``sender`` is the model class and ``deltas`` maps primary keys to the
+# number of views that were added in that flush.
+view_counts_flushed = Signal()
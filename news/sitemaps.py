@@ -0,0 +1,299 @@
+"""
+Sharded XML sitemaps.
+
+Articles and videos are listed in one sitemap file per month of first
+publication, split into parts of at most ``URLS_PER_SHARD`` URLs. Shards
+are built from a streamed ``values_list`` projection into stored files, so
+a closed month is generated once. Only the months touched by a publish,
+unpublish, delete or move are rebuilt, which for new stories is the
+current month. The request only marks those months; they are rebuilt on
+the single-writer queue once NEWS_SITEMAP_BUILD_DELAY seconds have passed,
+so a burst of publishes costs one build per month. The sitemap index, the sitemap of the remaining pages and
+the Google News sitemap of the last 48 hours are streamed straight from
+queries. Memory use does not depend on the number of pages.
+"""
+import atexit
+import itertools
+import logging
+import os
+import tempfile
+import threading
+from datetime import timedelta, timezone as dt_timezone
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.urls import reverse
+from django.utils import timezone
+
+from . import archive
+from .feeds import page_url
+from .write_queue import write_queue
+
+logger = logging.getLogger(__name__)
+
+URLS_PER_SHARD = 50000
+NEWS_WINDOW = timedelta(hours=48)
+NEWS_SITEMAP_LIMIT = 1000
+CHUNK_SIZE = 2000
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+NEWS_NS = 'http://www.google.com/schemas/sitemap-news/0.9'
+
+
+def w3c(value):
+    return timezone.localtime(value, dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ') if value else ''
+
+
+def _batched(lines, size=500):
+    """Join lines into larger chunks so a streamed response is not written line by line"""
+    iterator = iter(lines)
+    while chunk := ''.join(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _url(loc, lastmod=None):
+    lastmod = f'<lastmod>{w3c(lastmod)}</lastmod>' if lastmod else ''
+    return f'<url><loc>{escape(loc)}</loc>{lastmod}</url>\n'
+
+
+def urlset(entries):
+    yield XML_HEADER + f'<urlset xmlns="{SITEMAP_NS}">\n'
+    for loc, lastmod in entries:
+        yield _url(loc, lastmod)
+    yield '</urlset>\n'
+
+
+def _models():
+    from .models import NewsPage, VideoPage
+
+    return NewsPage, VideoPage
+
+
+def month_entries(year, month):
+    """``(loc, lastmod)`` of the live articles and videos first published in a month"""
+    start, end = archive.month_range(year, month)
+    for model in _models():
+        rows = model.objects.live().public().filter(
+            first_published_at__gte=start, first_published_at__lt=end
+        ).order_by('first_published_at', 'pk').values_list('url_path', 'last_published_at')
+        for url_path, lastmod in rows.iterator(chunk_size=CHUNK_SIZE):
+            loc = page_url(url_path)
+            if loc:
+                yield loc, lastmod
+
+
+def _write_part(year, month, part, entries):
+    """Store one part; returns ``(path, url_count, lastmod)`` or None if it is empty"""
+    stats = {'count': 0, 'lastmod': None}
+
+    def counted():
+        for loc, lastmod in entries:
+            stats['count'] += 1
+            if lastmod and (stats['lastmod'] is None or lastmod > stats['lastmod']):
+                stats['lastmod'] = lastmod
+            yield loc, lastmod
+
+    with tempfile.TemporaryFile() as handle:
+        for chunk in _batched(urlset(counted())):
+            handle.write(chunk.encode('utf-8'))
+        if not stats['count']:
+            return None
+        handle.seek(0)
+        path = default_storage.save(f'sitemaps/{year}-{month:02d}-{part}.xml', File(handle))
+    return path, stats['count'], stats['lastmod']
+
+
+def build_month(year, month):
+    """Regenerate the shards of a month, returning how many parts it now has"""
+    from .models import SitemapShard
+
+    entries = month_entries(year, month)
+    shards = []
+    for part in itertools.count(1):
+        written = _write_part(year, month, part, itertools.islice(entries, URLS_PER_SHARD))
+        if written is None:
+            break
+        path, url_count, lastmod = written
+        shards.append(SitemapShard(
+            year=year, month=month, part=part, path=path, url_count=url_count, lastmod=lastmod
+        ))
+
+    with transaction.atomic():
+        stale = list(SitemapShard.objects.filter(year=year, month=month).values_list('path', flat=True))
+        SitemapShard.objects.filter(year=year, month=month).delete()
+        SitemapShard.objects.bulk_create(shards)
+        # Old files are removed only once the new rows are visible to readers
+        transaction.on_commit(lambda: [default_storage.delete(path) for path in stale])
+    return len(shards)
+
+
+class DirtyMonths:
+    """
+    Months whose shards are out of date, rebuilt in the background.
+
+    Marking a month only records it in process memory. The first mark starts
+    a timer, and when it fires every month marked meanwhile is built once on
+    the single-writer queue. Months that fail to build are kept for the next
+    round. Marks still pending at interpreter exit are built then, and a
+    forked worker drops the marks it inherited, which its parent builds.
+    """
+
+    def __init__(self, delay=None):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._reset()
+        atexit.register(self.flush)
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._months = set()
+        self._timer = None
+
+    def mark(self, months):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            self._months.update(months)
+            if self._months and self._timer is None:
+                delay = self.delay if self.delay is not None else getattr(settings, 'NEWS_SITEMAP_BUILD_DELAY', 30)
+                self._timer = threading.Timer(delay, write_queue.submit, [self.flush])
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Build every marked month, returning how many were built"""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            months, self._months = self._months, set()
+            # Marks made while these build start a new round
+            self._timer = None
+
+        built = 0
+        for year, month in sorted(months):
+            try:
+                build_month(year, month)
+            except Exception:
+                logger.exception('Building the sitemap of %d-%02d failed', year, month)
+                self.mark({(year, month)})
+            else:
+                built += 1
+        return built
+
+
+dirty_months = DirtyMonths()
+
+
+def _schedule_months(months):
+    if months:
+        transaction.on_commit(lambda: dirty_months.mark(months))
+
+
+def schedule_build(*dates):
+    """Mark the months of the given datetimes for a rebuild once the current transaction commits"""
+    _schedule_months({archive.month_of(value) for value in dates} - {None})
+
+
+def published_months(narrow=None):
+    """``{(year, month)}`` with live articles or videos, optionally within ``narrow(queryset)``"""
+    months = set()
+    for model in _models():
+        queryset = model.objects.live().exclude(first_published_at=None)
+        if narrow is not None:
+            queryset = narrow(queryset)
+        months.update(queryset.annotate(
+            year=ExtractYear('first_published_at'), month=ExtractMonth('first_published_at')
+        ).values_list('year', 'month').distinct())
+    return months
+
+
+def schedule_subtree(page):
+    """Mark every month with articles under a page whose URLs changed, looking them up on the writer"""
+    def mark_subtree():
+        dirty_months.mark(published_months(lambda queryset: queryset.descendant_of(page, inclusive=True)))
+
+    transaction.on_commit(lambda: write_queue.submit(mark_subtree))
+
+
+def build(rebuild_all=False):
+    """
+    Build missing shards and the current month, or every month with
+    ``rebuild_all``. Returns the number of months built.
+    """
+    from .models import SitemapShard
+
+    now = timezone.localtime()
+    months = published_months()
+    stored = set(SitemapShard.objects.values_list('year', 'month').distinct())
+    # Rebuilding everything also empties shards of months that no longer have pages
+    months = months | stored if rebuild_all else months - stored
+    months.add((now.year, now.month))
+    for year, month in sorted(months):
+        build_month(year, month)
+    return len(months)
+
+
+def index_xml(request):
+    """Stream the sitemap index: the page sitemap followed by every stored shard"""
+    from .models import SitemapShard
+
+    shards = SitemapShard.objects.order_by('-year', '-month', 'part').values_list('year', 'month', 'part', 'lastmod')
+
+    def lines():
+        yield XML_HEADER + f'<sitemapindex xmlns="{SITEMAP_NS}">\n'
+        yield f'<sitemap><loc>{escape(request.build_absolute_uri(reverse("sitemap_pages")))}</loc></sitemap>\n'
+        for year, month, part, lastmod in shards.iterator(chunk_size=CHUNK_SIZE):
+            loc = request.build_absolute_uri(reverse('sitemap_shard', args=[year, month, part]))
+            lastmod = f'<lastmod>{w3c(lastmod)}</lastmod>' if lastmod else ''
+            yield f'<sitemap><loc>{escape(loc)}</loc>{lastmod}</sitemap>\n'
+        yield '</sitemapindex>\n'
+
+    return _batched(lines())
+
+
+def pages_xml():
+    """Stream the sitemap of live pages other than articles and videos"""
+    from wagtail.models import Page
+
+    rows = Page.objects.live().public().not_type(*_models()).filter(depth__gt=1).order_by(
+        'path'
+    ).values_list('url_path', 'last_published_at')
+
+    def entries():
+        for url_path, lastmod in rows.iterator(chunk_size=CHUNK_SIZE):
+            loc = page_url(url_path)
+            if loc:
+                yield loc, lastmod
+
+    return _batched(urlset(entries()))
+
+
+def news_xml():
+    """Stream the Google News sitemap of articles published in the last 48 hours"""
+    NewsPage, _ = _models()
+    name = escape(getattr(settings, 'NEWS_SITEMAP_PUBLICATION_NAME', 'Vishwavani'))
+    language = escape(getattr(settings, 'NEWS_SITEMAP_LANGUAGE', 'kn'))
+    rows = NewsPage.objects.live().public().filter(
+        first_published_at__gte=timezone.now() - NEWS_WINDOW
+    ).order_by('-first_published_at').values_list('url_path', 'title', 'first_published_at')[:NEWS_SITEMAP_LIMIT]
+
+    def lines():
+        yield XML_HEADER + f'<urlset xmlns="{SITEMAP_NS}" xmlns:news="{NEWS_NS}">\n'
+        for url_path, title, published in rows.iterator(chunk_size=CHUNK_SIZE):
+            loc = page_url(url_path)
+            if not loc:
+                continue
+            yield (
+                f'<url><loc>{escape(loc)}</loc><news:news>'
+                f'<news:publication><news:name>{name}</news:name><news:language>{language}</news:language>'
+                f'</news:publication><news:publication_date>{w3c(published)}</news:publication_date>'
+                f'<news:title>{escape(title)}</news:title></news:news></url>\n'
+            )
+        yield '</urlset>\n'
+
+    return _batched(lines())
@@ -1,28 +1,27 @@
-from datetime import timedelta
-
 from django import template
-from django.db.models import Count
 from django.utils import timezone
+from django.utils.safestring import mark_safe
 
 from ..models import NewsPage, NewsCategory
 from ..models.authors import Author
+from ..breadcrumbs import get_breadcrumbs as breadcrumbs_for
+from ..caching import cached_fragment
+from ..category_tree import get_tree
+from ..trending import trending_articles
 
 register = template.Library()
 
 
 @register.simple_tag
-def get_trending_news(limit=5):
-    """Get trending news articles based on view count in last 7 days"""
-    seven_days_ago = timezone.now() - timedelta(days=7)
-    return NewsPage.objects.live().filter(
-        first_published_at__gte=seven_days_ago
-    ).order_by('-view_count')[:limit]
+def get_trending_news(limit=5, window='7d'):
+    """Get trending news articles from the precomputed leaderboard"""
+    return trending_articles(window, limit=limit)
 
 
 @register.simple_tag
 def get_breaking_news(limit=5):
     """Get breaking news articles"""
-    return NewsPage.objects.live().filter(
+    return NewsPage.objects.listing().filter(
         is_breaking_news=True
     ).order_by('-first_published_at')[:limit]
 
@@ -30,7 +29,7 @@ def get_breaking_news(limit=5):
 @register.simple_tag
 def get_category_news(category_slug, limit=5):
     """Get news articles from a specific category"""
-    return NewsPage.objects.live().filter(
+    return NewsPage.objects.listing().filter(
         categories__slug=category_slug
     ).order_by('-first_published_at')[:limit]
 
@@ -38,7 +37,7 @@ def get_category_news(category_slug, limit=5):
 @register.simple_tag
 def get_topic_news(topic_slug, limit=5):
     """Get news articles for a specific topic"""
-    return NewsPage.objects.live().filter(
+    return NewsPage.objects.listing().filter(
         topics__slug=topic_slug
     ).order_by('-first_published_at')[:limit]
 
@@ -46,9 +45,13 @@ def get_topic_news(topic_slug, limit=5):
 @register.simple_tag
 def get_popular_categories(limit=10):
     """Get categories with most articles"""
-    return NewsCategory.objects.annotate(
-        article_count=Count('articles')
-    ).order_by('-article_count')[:limit]
+    return NewsCategory.objects.order_by('-article_count', 'order')[:limit]
+
+
+@register.simple_tag
+def get_menu_categories():
+    """Top-level menu categories in display order, from the cached category tree"""
+    return get_tree().menu()
 
 
 @register.simple_tag
@@ -69,14 +72,59 @@ def get_related_articles(article, limit=3):
 def get_breadcrumbs(context):
     """Generate breadcrumbs for current page"""
     page = context.get('page')
-    if not page:
+    if not page or not getattr(page, 'path', None):
         return []
+    return breadcrumbs_for(page, context.get('request'))
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, section, tags):
+        self.nodelist = nodelist
+        self.section = section
+        self.tags = tags
+
+    def render(self, context):
+        section = self.section.resolve(context)
+        tags = [str(tag.resolve(context)) for tag in self.tags]
+        page = context.get('page')
+        vary = (page.pk, page.last_published_at) if page is not None else ()
+        return cached_fragment(section, tags, lambda: self.nodelist.render(context), vary=vary)
+
+
+@register.tag
+def fragment_cache(parser, token):
+    """
+    Cache the enclosed template fragment until one of its tags is invalidated
+    Usage: {% fragment_cache "breaking_news" "breaking" %}...{% endfragment_cache %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a section name")
+    nodelist = parser.parse(('endfragment_cache',))
+    parser.delete_first_token()
+    return FragmentCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
 
-    breadcrumbs = []
-    while page:
-        breadcrumbs.insert(0, page)
-        page = page.get_parent()
-    return breadcrumbs
+
+@register.simple_tag(takes_context=True)
+def cached_block(context, block):
+    """Render a StreamField block, cached under the tags its block type declares"""
+    get_cache_tags = getattr(block.block, 'get_cache_tags', None)
+    if get_cache_tags is None:
+        return block.render_as_block(context=context.flatten())
+
+    page = context.get('page')
+    tags = set(get_cache_tags(block.value))
+    vary = [block.id]
+    if page is not None:
+        tags.add(f'page:{page.pk}')
+        vary += [page.pk, page.last_published_at]
+    return mark_safe(cached_fragment(
+        block.block_type, tags, lambda: block.render_as_block(context=context.flatten()), vary=vary
+    ))
 
 
 @register.filter
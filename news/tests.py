@@ -1,3 +1,181 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from wagtail.models import Site
+
+from . import async_views, closure
+from .caching import get_tagged, set_tagged
+from .models import NewsCategory, NewsIndexPage, NewsPage
+from .pagination import CursorPaginator, encode_cursor, paginate_listing
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'news-tests'}}
+
+
+def add_index(slug='latest'):
+    root = Site.objects.get(is_default_site=True).root_page
+    return root.add_child(instance=NewsIndexPage(title='Latest', slug=slug))
+
+
+def add_article(parent, title, categories=(), **fields):
+    fields.setdefault('first_published_at', timezone.now())
+    article = parent.add_child(instance=NewsPage(title=title, intro=f'{title} intro', body=[], **fields))
+    article.categories.set(categories)
+    return article
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AsyncCategoryViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.index = add_index()
+        cls.state = NewsCategory.objects.create(name='State', slug='state')
+        cls.district = NewsCategory.objects.create(name='Mysuru', slug='mysuru', parent=cls.state)
+        cls.article = add_article(cls.index, 'District article', [cls.district])
+
+    def setUp(self):
+        cache.clear()
+        closure._state['populated'] = False
+
+    async def get(self, slug, **params):
+        request = AsyncRequestFactory().get(f'/news/category/{slug}/', params)
+        return await async_views.category_view(request, slug)
+
+    async def test_descendants_before_closure_is_filled(self):
+        response = await self.get('state', descendants='1')
+        self.assertContains(response, 'District article')
+
+    async def test_descendants_from_closure(self):
+        await sync_to_async(closure.rebuild)()
+        response = await self.get('state', descendants='1')
+        self.assertContains(response, 'District article')
+
+    async def test_exact_category(self):
+        response = await self.get('state', descendants='0')
+        self.assertNotContains(response, 'District article')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AsyncListingViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        index = add_index()
+        cls.article = add_article(index, 'Listed article', first_published_at=timezone.now() - timedelta(days=40))
+
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+
+    async def test_news_index(self):
+        response = await async_views.news_index(self.factory.get('/news/'))
+        self.assertContains(response, 'Listed article')
+
+    async def test_author_view(self):
+        author = await sync_to_async(lambda: self.article.author)()
+        response = await async_views.author_view(self.factory.get(f'/news/author/{author.slug}/'), author.slug)
+        self.assertContains(response, 'Listed article')
+
+    async def test_archive_view(self):
+        published = timezone.localtime(self.article.first_published_at)
+        response = await async_views.archive_view(
+            self.factory.get('/news/archive/', {'year': published.year, 'month': published.month})
+        )
+        self.assertContains(response, 'Listed article')
+
+    async def test_archive_view_ignores_unrepresentable_year(self):
+        response = await async_views.archive_view(self.factory.get('/news/archive/', {'year': 10000}))
+        self.assertEqual(response.status_code, 200)
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        index = add_index()
+        start = timezone.now()
+        # Pairs of articles share a timestamp, so pages must break ties on the id
+        for number in range(23):
+            add_article(index, f'Article {number}', first_published_at=start - timedelta(hours=number // 2))
+        cls.expected = list(NewsPage.objects.order_by('-first_published_at', '-pk').values_list('pk', flat=True))
+
+    def walk(self, queryset):
+        paginator = CursorPaginator(queryset, per_page=5)
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        return paginator, pages
+
+    def ids(self, page):
+        return [item['pk'] if isinstance(item, dict) else item.pk for item in page]
+
+    def test_forward_walk_visits_every_article_once_in_order(self):
+        _, pages = self.walk(NewsPage.objects.live())
+        self.assertEqual([pk for page in pages for pk in self.ids(page)], self.expected)
+        self.assertEqual([len(page) for page in pages], [5, 5, 5, 5, 3])
+        self.assertFalse(pages[0].has_previous())
+
+    def test_backward_walk_returns_the_same_pages(self):
+        paginator, pages = self.walk(NewsPage.objects.live())
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = paginator.get_page(page.previous_cursor)
+            self.assertEqual(self.ids(page), self.ids(expected))
+        self.assertFalse(page.has_previous())
+
+    def test_values_queryset(self):
+        _, pages = self.walk(NewsPage.objects.live().values('pk', 'first_published_at'))
+        self.assertEqual([pk for page in pages for pk in self.ids(page)], self.expected)
+
+    def test_malformed_cursor_starts_over(self):
+        page = CursorPaginator(NewsPage.objects.live(), per_page=5).get_page('not-a-cursor')
+        self.assertEqual(self.ids(page), self.expected[:5])
+
+    def test_cursor_past_the_end(self):
+        oldest = NewsPage.objects.get(pk=self.expected[-1])
+        page = CursorPaginator(NewsPage.objects.live(), per_page=5).get_page(
+            encode_cursor('n', oldest.first_published_at, oldest.pk)
+        )
+        self.assertEqual(len(page), 0)
+        self.assertFalse(page.has_next())
+
+    def test_legacy_page_links_keep_numbered_pages(self):
+        request = RequestFactory().get('/news/', {'page': 2})
+        page = paginate_listing(request, NewsPage.objects.live(), per_page=5)
+        self.assertEqual(page.number, 2)
+        self.assertEqual([article.pk for article in page], self.expected[5:10])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CacheInvalidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.index = add_index()
+        add_article(cls.index, 'Earlier story')
+
+    def setUp(self):
+        cache.clear()
+
+    def publish(self, title):
+        article = add_article(self.index, title, live=False)
+        article.save_revision().publish()
+        return article
+
+    def test_publishing_expires_the_cached_index_page(self):
+        self.assertEqual(self.client.get('/latest/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/latest/')['X-Cache'], 'HIT')
+
+        self.publish('Fresh story')
+
+        response = self.client.get('/latest/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'Fresh story')
+
+    def test_publishing_keeps_entries_of_other_tags(self):
+        set_tagged('news-tests:news', 'news', ['news'])
+        set_tagged('news-tests:videos', 'videos', ['videos'])
+
+        self.publish('Fresh story')
+
+        self.assertIsNone(get_tagged('news-tests:news'))
+        self.assertEqual(get_tagged('news-tests:videos'), 'videos')
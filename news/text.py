@@ -0,0 +1,98 @@
+"""
+Plain text of article bodies.
+
+``extract`` walks a ``ContentBlock`` stream's raw JSON once, without
+rendering it. Rich text paragraphs are stripped of markup, and quotes
+contribute their text and attribution. Images and embeds add nothing, so
+no embed lookups or image queries happen. The result is stored on the page
+at save time as ``body_text``, ``word_count`` and ``excerpt``. Read time,
+search indexing, feed summaries and meta description fallbacks reuse it
+from there.
+"""
+import html
+import re
+import unicodedata
+from collections import namedtuple
+
+from django.utils.html import strip_tags
+
+from search.analysis import TOKEN_RE
+
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 200
+
+WHITESPACE_RE = re.compile(r'\s+')
+# Block-level tags whose boundaries separate words once the markup is gone
+BLOCK_TAG_RE = re.compile(r'<(?:/?(?:p|div|h[1-6]|li|ul|ol|blockquote)\b[^>]*|br\s*/?)>', re.IGNORECASE)
+
+BodyText = namedtuple('BodyText', ['text', 'word_count', 'excerpt'])
+
+
+def clean(value):
+    """Plain, NFC-normalised, single-spaced text from a rich text or plain string"""
+    value = BLOCK_TAG_RE.sub(' ', value or '')
+    value = html.unescape(strip_tags(value))
+    return WHITESPACE_RE.sub(' ', unicodedata.normalize('NFC', value)).strip()
+
+
+def _block_text(block_type, value):
+    if block_type == 'paragraph':
+        return [clean(value)]
+    if block_type == 'quote' and isinstance(value, dict):
+        return [clean(value.get('quote')), clean(value.get('attribution'))]
+    return []
+
+
+def paragraphs(raw_data):
+    """Text of each text-bearing block in stream order"""
+    for block in raw_data or []:
+        for text in _block_text(block.get('type'), block.get('value')):
+            if text:
+                yield text
+
+
+def count_words(text):
+    # Kannada vowel signs and the virama are not \w, so a plain split or \w+ miscounts
+    return len(TOKEN_RE.findall(text))
+
+
+def excerpt(text, length=EXCERPT_LENGTH):
+    """Cut at the last word boundary within ``length`` characters"""
+    if len(text) <= length:
+        return text
+    cut = text[:length + 1].rsplit(' ', 1)[0] if ' ' in text[:length + 1] else text[:length]
+    return cut.rstrip(' ,;:.-') + '…'
+
+
+def extract(raw_data):
+    text = '\n'.join(paragraphs(raw_data))
+    return BodyText(text=text, word_count=count_words(text), excerpt=excerpt(text.replace('\n', ' ')))
+
+
+def read_time(word_count):
+    return max(1, round(word_count / WORDS_PER_MINUTE)) if word_count else 0
+
+
+def apply(page):
+    """Set the stored text fields of an article from its current body"""
+    extracted = extract(page.body.raw_data if page.body else [])
+    page.body_text = extracted.text
+    page.word_count = extracted.word_count
+    page.excerpt = extracted.excerpt
+    page.read_time = read_time(extracted.word_count)
+    return extracted
+
+
+def rebuild(chunk_size=500):
+    """Re-extract every article, writing only the text fields; returns how many changed"""
+    from .models import NewsPage
+
+    fields = ['body_text', 'word_count', 'excerpt', 'read_time']
+    changed = []
+    for article in NewsPage.objects.only('pk', 'body', *fields).iterator(chunk_size=chunk_size):
+        before = [getattr(article, field) for field in fields]
+        apply(article)
+        if [getattr(article, field) for field in fields] != before:
+            changed.append(article)
+    NewsPage.objects.bulk_update(changed, fields, batch_size=chunk_size)
+    return len(changed)
@@ -0,0 +1,176 @@
+"""
+Time-decayed trending scores.
+
+Flushed view deltas are added to hourly ``ArticleViewBucket`` rows. A refresh
+folds the buckets of the last week into exponentially decayed scores and
+materialises the top articles per window, globally and per category and
+topic, in the shared cache. Refreshes only happen in the scheduled
+``refresh_trending`` command. Readers never recompute: they fetch the short
+id list the last refresh left behind and load those articles by primary key.
+"""
+import heapq
+import math
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+# window name -> (length in hours, score half-life in hours)
+WINDOWS = {
+    '1h': (1, 0.5),
+    '24h': (24, 6),
+    '7d': (168, 48),
+}
+
+CACHE_PREFIX = 'news:trending'
+REFRESHED_KEY = f'{CACHE_PREFIX}:refreshed'
+CHUNK_SIZE = 5000
+
+
+def _leaderboard_size():
+    return getattr(settings, 'NEWS_TRENDING_SIZE', 50)
+
+
+def _leaderboard_key(window, scope='all'):
+    return f'{CACHE_PREFIX}:{window}:{scope}'
+
+
+def current_hour(now=None):
+    return (now or timezone.now()).replace(minute=0, second=0, microsecond=0)
+
+
+def record_views(deltas, now=None):
+    """Add ``{article_id: views}`` to the current hour's buckets"""
+    from .models import ArticleViewBucket
+
+    if not deltas:
+        return
+    hour = current_hour(now)
+    ArticleViewBucket.objects.bulk_create(
+        [ArticleViewBucket(article_id=pk, hour=hour) for pk in deltas],
+        ignore_conflicts=True,
+    )
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        ArticleViewBucket.objects.filter(hour=hour, article_id__in=pks).update(views=F('views') + delta)
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def compute_scores(now=None):
+    """Return ``{window: {article_id: score}}`` from the buckets inside the longest window"""
+    from .models import ArticleViewBucket
+
+    now = now or timezone.now()
+    longest = max(hours for hours, _ in WINDOWS.values())
+    scores = {window: defaultdict(float) for window in WINDOWS}
+
+    buckets = ArticleViewBucket.objects.filter(
+        hour__gt=current_hour(now) - timedelta(hours=longest)
+    ).values_list('article_id', 'hour', 'views')
+
+    for article_id, hour, views in buckets.iterator(chunk_size=CHUNK_SIZE):
+        # Age of the bucket's midpoint, so the current hour is not over-weighted
+        age = max((now - hour).total_seconds() / 3600 - 0.5, 0)
+        for window, (hours, half_life) in WINDOWS.items():
+            if age < hours:
+                scores[window][article_id] += views * math.pow(0.5, age / half_life)
+    return scores
+
+
+def refresh_leaderboards(now=None):
+    """Recompute and cache every leaderboard, returning the number of boards written"""
+    from .models import ArticleViewBucket, NewsPage
+
+    now = now or timezone.now()
+    size = _leaderboard_size()
+    scores = compute_scores(now)
+
+    candidates = set().union(*(window_scores.keys() for window_scores in scores.values()))
+    live_ids = set()
+    categories = defaultdict(list)
+    topics = defaultdict(list)
+    for chunk in _chunks(candidates):
+        live_ids.update(NewsPage.objects.live().filter(pk__in=chunk).values_list('pk', flat=True))
+        for article_id, category_id in NewsPage.categories.through.objects.filter(
+                newspage_id__in=chunk).values_list('newspage_id', 'newscategory_id'):
+            categories[article_id].append(category_id)
+        for article_id, topic_id in NewsPage.topics.through.objects.filter(
+                newspage_id__in=chunk).values_list('newspage_id', 'newstopic_id'):
+            topics[article_id].append(topic_id)
+
+    boards = {}
+    for window, window_scores in scores.items():
+        scoped = defaultdict(list)
+        for article_id, score in window_scores.items():
+            if article_id not in live_ids:
+                continue
+            entry = (score, article_id)
+            scoped['all'].append(entry)
+            for category_id in categories[article_id]:
+                scoped[f'category:{category_id}'].append(entry)
+            for topic_id in topics[article_id]:
+                scoped[f'topic:{topic_id}'].append(entry)
+        for scope, entries in scoped.items():
+            boards[_leaderboard_key(window, scope)] = [
+                (article_id, round(score, 3)) for score, article_id in heapq.nlargest(size, entries)
+            ]
+
+    # Scopes that dropped out of every window must not keep serving stale boards
+    previous = cache.get(f'{CACHE_PREFIX}:keys') or []
+    stale = set(previous) - set(boards)
+    if stale:
+        cache.delete_many(list(stale))
+
+    # No timeout: if a scheduled refresh is missed, readers keep the previous boards
+    cache.set_many(boards, None)
+    cache.set(f'{CACHE_PREFIX}:keys', list(boards), None)
+    cache.set(REFRESHED_KEY, time.time(), None)
+
+    # Buckets older than the longest window no longer contribute to any score
+    longest = max(hours for hours, _ in WINDOWS.values())
+    ArticleViewBucket.objects.filter(hour__lt=current_hour(now) - timedelta(hours=longest)).delete()
+    return len(boards)
+
+
+def get_leaderboard(window='24h', category=None, topic=None):
+    """Return the ``[(article_id, score), ...]`` leaderboard for a window and optional scope"""
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown trending window: {window}")
+    scope = 'all'
+    if category is not None:
+        scope = f'category:{getattr(category, "pk", category)}'
+    elif topic is not None:
+        scope = f'topic:{getattr(topic, "pk", topic)}'
+    return cache.get(_leaderboard_key(window, scope)) or []
+
+
+def window_for_days(days):
+    """Pick the smallest window that covers the given number of days"""
+    for window, (hours, _) in sorted(WINDOWS.items(), key=lambda item: item[1][0]):
+        if hours >= days * 24:
+            return window
+    return '7d'
+
+
+def trending_articles(window='24h', limit=5, category=None, topic=None, queryset=None):
+    """Return the top trending articles as a list, in leaderboard order"""
+    from .models import NewsPage
+
+    ids = [article_id for article_id, _ in get_leaderboard(window, category, topic)[:limit]]
+    if not ids:
+        return []
+    if queryset is None:
+        queryset = NewsPage.objects.listing()
+    articles = queryset.in_bulk(ids)
+    return [articles[pk] for pk in ids if pk in articles]
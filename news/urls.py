@@ -1,17 +1,31 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
 
 app_name = 'news'
 
+# Listing views run as coroutines in the ASGI deployment
+listing_views = async_views if settings.NEWS_ASYNC_VIEWS else views
+
 urlpatterns = [
-    path('', views.news_index, name='news_index'),
-    path('videos/', views.video_index, name='video_index'),
-    path('category/<slug:category_slug>/', views.category_view, name='category_view'),
-    path('topic/<slug:topic_slug>/', views.topic_view, name='topic_view'),
-    path('author/<slug:author_slug>/', views.author_view, name='author_view'),
-    path('archive/', views.archive_view, name='archive'),
-    path('search/', views.search_view, name='search'),
-    path('breaking/', views.breaking_news_view, name='breaking_news'),
-    path('trending/', views.trending_news_view, name='trending_news'),
+    path('', listing_views.news_index, name='news_index'),
+    path('videos/', listing_views.video_index, name='video_index'),
+    path('category/<slug:category_slug>/', listing_views.category_view, name='category_view'),
+    path('topic/<slug:topic_slug>/', listing_views.topic_view, name='topic_view'),
+    path('author/<slug:author_slug>/', listing_views.author_view, name='author_view'),
+    path('archive/', listing_views.archive_view, name='archive'),
+    path('search/', listing_views.search_view, name='search'),
+    path('search/suggest/', listing_views.search_suggest_view, name='search_suggest'),
+    path('breaking/', listing_views.breaking_news_view, name='breaking_news'),
+    path('trending/', listing_views.trending_news_view, name='trending_news'),
+    path('feeds/topic/<slug:topic_slug>/', views.topic_feed, name='topic_feed'),
+    path('feeds/topic/<slug:topic_slug>/atom/', views.topic_feed, {'feed_format': 'atom'}, name='topic_feed_atom'),
+    path('feeds/category/<slug:category_slug>/', views.category_feed, name='category_feed'),
+    path('feeds/category/<slug:category_slug>/atom/', views.category_feed, {'feed_format': 'atom'},
+         name='category_feed_atom'),
+    path('feeds/author/<slug:author_slug>/', views.author_feed, name='author_feed'),
+    path('feeds/author/<slug:author_slug>/atom/', views.author_feed, {'feed_format': 'atom'}, name='author_feed_atom'),
+    path('feeds/breaking/', views.breaking_news_feed, name='breaking_news_feed'),
+    path('feeds/breaking/atom/', views.breaking_news_feed, {'feed_format': 'atom'}, name='breaking_news_feed_atom'),
 ]
@@ -1,17 +1,35 @@
-from django.core.paginator import Paginator
-from django.shortcuts import render, get_object_or_404
+import datetime
 
-from .models import NewsCategory, NewsTopic, NewsPage, VideoPage
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from search.results import paginate_results
+from search.suggest import suggester
+
+from . import archive, sitemaps
+from .category_tree import get_tree
+from .concurrency import run_concurrently
+from .feeds import FeedSpec, feed_response
+from .models import NewsCategory, NewsTopic, NewsPage, SitemapShard, VideoPage
 from .models.authors import Author
+from .pagination import PER_PAGE, paginate_listing
+from .trending import trending_articles
 
 
 def category_view(request, category_slug):
     category = get_object_or_404(NewsCategory, slug=category_slug)
-    news_list = NewsPage.objects.live().filter(categories=category).order_by('-first_published_at')
-
-    paginator = Paginator(news_list, 12)  # Show 12 news items per page
-    page = request.GET.get('page')
-    news_items = paginator.get_page(page)
+    include_descendants = request.GET.get(
+        'descendants', '1' if getattr(settings, 'NEWS_CATEGORY_INCLUDE_DESCENDANTS', True) else '0'
+    ) != '0'
+    news_list = NewsPage.objects.listing().in_category(category, include_descendants)
+    news_items = paginate_listing(
+        request, news_list, count_key=f"category:{category.pk}:{'tree' if include_descendants else 'exact'}"
+    )
 
     return render(request, 'news/category_page.html', {
         'category': category,
@@ -21,11 +39,8 @@ def category_view(request, category_slug):
 
 def topic_view(request, topic_slug):
     topic = get_object_or_404(NewsTopic, slug=topic_slug)
-    news_list = NewsPage.objects.live().filter(topics=topic).order_by('-first_published_at')
-
-    paginator = Paginator(news_list, 12)
-    page = request.GET.get('page')
-    news_items = paginator.get_page(page)
+    news_list = NewsPage.objects.listing().filter(topics=topic)
+    news_items = paginate_listing(request, news_list, count_key=f'topic:{topic.pk}')
 
     return render(request, 'news/topic_page.html', {
         'topic': topic,
@@ -35,11 +50,8 @@ def topic_view(request, topic_slug):
 
 def author_view(request, author_slug):
     author = get_object_or_404(Author, slug=author_slug)
-    news_list = NewsPage.objects.live().filter(author=author).order_by('-first_published_at')
-
-    paginator = Paginator(news_list, 12)
-    page = request.GET.get('page')
-    news_items = paginator.get_page(page)
+    news_list = NewsPage.objects.listing().filter(author=author)
+    news_items = paginate_listing(request, news_list, count_key=f'author:{author.pk}')
 
     return render(request, 'news/author_page.html', {
         'author': author,
@@ -47,32 +59,48 @@ def author_view(request, author_slug):
     })
 
 
+def _int_param(request, name):
+    try:
+        return int(request.GET.get(name, ''))
+    except ValueError:
+        return None
+
+
+def _archive_period(request):
+    """The requested year and month, dropping values the date range arithmetic cannot represent"""
+    year = _int_param(request, 'year')
+    if year is not None and not datetime.MINYEAR <= year <= datetime.MAXYEAR - 1:
+        year = None
+    month = _int_param(request, 'month')
+    if month is not None and not 1 <= month <= 12:
+        month = None
+    return year, month
+
+
 def archive_view(request):
     # Filter parameters
-    year = request.GET.get('year')
-    month = request.GET.get('month')
+    year, month = _archive_period(request)
     category = request.GET.get('category')
 
-    news_list = NewsPage.objects.live()
-
-    if year:
-        news_list = news_list.filter(first_published_at__year=year)
-    if month:
-        news_list = news_list.filter(first_published_at__month=month)
+    news_list = archive.filter_published(NewsPage.objects.listing(), year, month)
     if category:
         news_list = news_list.filter(categories__slug=category)
 
-    news_list = news_list.order_by('-first_published_at')
-
-    paginator = Paginator(news_list, 12)
-    page = request.GET.get('page')
-    news_items = paginator.get_page(page)
+    news_items, years, months, categories = run_concurrently(
+        lambda: paginate_listing(request, news_list, count_key=f'archive:{year}:{month}:{category}'),
+        archive.available_years,
+        lambda: archive.available_months(year),
+        lambda: list(archive.available_categories(year, month)),
+    )
 
     return render(request, 'news/archive_page.html', {
         'news_items': news_items,
         'selected_year': year,
         'selected_month': month,
         'selected_category': category,
+        'available_years': years,
+        'available_months': months,
+        'available_categories': categories,
     })
 
 
@@ -81,7 +109,7 @@ def search_view(request):
     news_items = []
 
     if query:
-        news_items = NewsPage.objects.live().search(query)
+        news_items = paginate_results(query, request.GET.get('page'), PER_PAGE, models=[NewsPage])
 
     return render(request, 'news/search_results.html', {
         'query': query,
@@ -89,12 +117,24 @@ def search_view(request):
     })
 
 
-def breaking_news_view(request):
-    news_items = NewsPage.objects.live().filter(is_breaking_news=True).order_by('-first_published_at')
+def search_suggest_view(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 8)), 20))
+    except ValueError:
+        limit = 8
+
+    response = JsonResponse({
+        'query': query,
+        'suggestions': suggester.suggest(query, limit=limit) if len(query) >= 2 else [],
+    })
+    patch_cache_control(response, public=True, max_age=60)
+    return response
 
-    paginator = Paginator(news_items, 12)
-    page = request.GET.get('page')
-    news_items = paginator.get_page(page)
+
+def breaking_news_view(request):
+    news_list = NewsPage.objects.listing().filter(is_breaking_news=True)
+    news_items = paginate_listing(request, news_list, count_key='breaking')
 
     return render(request, 'news/breaking_news_page.html', {
         'news_items': news_items,
@@ -102,19 +142,64 @@ def breaking_news_view(request):
 
 
 def trending_news_view(request):
-    news_items = NewsPage.objects.live().order_by('-view_count')[:30]  # Top 30 trending articles
+    news_items = trending_articles('24h', limit=30)  # Top 30 trending articles
 
     return render(request, 'news/trending_news_page.html', {
         'news_items': news_items,
     })
 
 
-def news_index(request):
-    news_list = NewsPage.objects.live().order_by('-first_published_at')
+def topic_feed(request, topic_slug, feed_format='rss'):
+    topic = get_object_or_404(NewsTopic, slug=topic_slug, include_in_feed=True)
+    return feed_response(request, FeedSpec(
+        key=f'topic:{topic.pk}',
+        title=topic.name,
+        link=reverse('news:topic_view', args=[topic.slug]),
+        description=topic.feed_description or topic.description,
+        articles=NewsPage.objects.live().filter(topics=topic),
+        tags={f'topic:{topic.pk}'},
+    ), feed_format)
+
+
+def category_feed(request, category_slug, feed_format='rss'):
+    category = get_object_or_404(NewsCategory, slug=category_slug)
+    subtree = [category.pk, *get_tree().descendant_ids(category.pk)]
+    return feed_response(request, FeedSpec(
+        key=f'category:{category.pk}',
+        title=category.name,
+        link=reverse('news:category_view', args=[category.slug]),
+        description=category.description,
+        articles=NewsPage.objects.live().in_category(category, include_descendants=True),
+        tags={'categories', *(f'category:{pk}' for pk in subtree)},
+    ), feed_format)
+
+
+def author_feed(request, author_slug, feed_format='rss'):
+    author = get_object_or_404(Author, slug=author_slug)
+    return feed_response(request, FeedSpec(
+        key=f'author:{author.pk}',
+        title=author.name,
+        link=reverse('news:author_view', args=[author.slug]),
+        description=author.bio,
+        articles=NewsPage.objects.live().filter(author=author),
+        tags={f'author:{author.pk}'},
+    ), feed_format)
+
+
+def breaking_news_feed(request, feed_format='rss'):
+    return feed_response(request, FeedSpec(
+        key='breaking',
+        title='Breaking News',
+        link=reverse('news:breaking_news'),
+        description='',
+        articles=NewsPage.objects.live().filter(is_breaking_news=True),
+        tags={'breaking'},
+    ), feed_format)
+
 
-    paginator = Paginator(news_list, 12)
-    page = request.GET.get('page')
-    news_items = paginator.get_page(page)
+def news_index(request):
+    news_list = NewsPage.objects.listing()
+    news_items = paginate_listing(request, news_list, count_key='all')
 
     return render(request, 'news/news_index_page.html', {
         'news_items': news_items,
@@ -122,12 +207,31 @@ def news_index(request):
 
 
 def video_index(request):
-    videos = VideoPage.objects.live().order_by('-first_published_at')
-
-    paginator = Paginator(videos, 12)  # 12 videos per page
-    page = request.GET.get('page')
-    video_items = paginator.get_page(page)
+    videos = VideoPage.objects.listing()
+    video_items = paginate_listing(request, videos, count_key='videos')
 
     return render(request, 'news/video_index_page.html', {
         'video_items': video_items,
     })
+
+
+def sitemap_index(request):
+    return StreamingHttpResponse(sitemaps.index_xml(request), content_type='application/xml')
+
+
+def sitemap_shard(request, year, month, part):
+    shard = get_object_or_404(SitemapShard, year=year, month=month, part=part)
+    last_modified = int(shard.generated_at.timestamp())
+    response = get_conditional_response(request, last_modified=last_modified)
+    if response is None:
+        response = FileResponse(default_storage.open(shard.path), content_type='application/xml')
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def sitemap_pages(request):
+    return StreamingHttpResponse(sitemaps.pages_xml(), content_type='application/xml')
+
+
+def news_sitemap(request):
+    return StreamingHttpResponse(sitemaps.news_xml(), content_type='application/xml')
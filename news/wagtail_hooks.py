@@ -0,0 +1,9 @@
+from wagtail import hooks
+
+from .page_cache import set_surrogate_keys
+
+
+@hooks.register('before_serve_page')
+def tag_page_response(page, request, serve_args, serve_kwargs):
+    """Record the surrogate keys of a Wagtail-served page for the page cache"""
+    set_surrogate_keys(request, page)
@@ -0,0 +1,122 @@
+"""
+Single-writer queue for background writes.
+
+SQLite allows one writer at a time. Background writes such as view count
+flushes and index updates are therefore funnelled through one writer
+thread per process instead of racing each other from request threads. When
+NEWS_WRITE_LOCK_FILE is set, the writer threads of all worker processes
+also take an exclusive lock on that file around each job, so at most one
+background write is in flight on the host. Readers are never queued: with
+WAL they keep reading the last committed snapshot while the writer works.
+
+The queue is on when NEWS_WRITE_QUEUE is set. Otherwise, and during
+interpreter shutdown, jobs run inline in the caller's thread.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class WriteQueue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._executor = None
+        self._lock_file = None
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'waited': 0.0}
+
+    def enabled(self):
+        return getattr(settings, 'NEWS_WRITE_QUEUE', True)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked: the parent's writer thread does not exist here
+                self._reset()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='news-writer')
+            return self._executor
+
+    def submit(self, func, *args, **kwargs):
+        """Queue ``func(*args, **kwargs)`` for the writer thread and return its ``Future``"""
+        if self.enabled() and not self.in_writer():
+            with self._lock:
+                self._stats['submitted'] += 1
+            try:
+                return self._get_executor().submit(self._run, func, args, kwargs, time.monotonic())
+            except RuntimeError:
+                # The interpreter is shutting down and the writer thread is gone
+                pass
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def in_writer(self):
+        return threading.current_thread().name.startswith('news-writer')
+
+    def _run(self, func, args, kwargs, queued_at):
+        waited = time.monotonic() - queued_at
+        close_old_connections()
+        try:
+            with self._host_lock():
+                result = func(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._stats['failed'] += 1
+            logger.exception('Background write %s failed', getattr(func, '__qualname__', func))
+            raise
+        finally:
+            close_old_connections()
+        with self._lock:
+            self._stats['completed'] += 1
+            self._stats['waited'] += waited
+        return result
+
+    @contextmanager
+    def _host_lock(self):
+        path = getattr(settings, 'NEWS_WRITE_LOCK_FILE', None)
+        if not path or fcntl is None:
+            yield
+            return
+        if self._lock_file is None:
+            self._lock_file = open(path, 'a')
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def drain(self):
+        """Wait for every job queued so far to finish"""
+        if self._executor is not None and self._pid == os.getpid():
+            self.submit(lambda: None).exception()
+
+    def stats(self):
+        """Counters for this process: jobs submitted, completed, failed, still queued and mean queue wait"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queued'] = stats['submitted'] - stats['completed'] - stats['failed']
+        stats['mean_wait'] = stats.pop('waited') / stats['completed'] if stats['completed'] else 0.0
+        return stats
+
+
+write_queue = WriteQueue()
@@ -0,0 +1,77 @@
+"""
+Tokenizer and normaliser for Kannada and English text.
+
+Kannada words are written with combining vowel signs, the virama and, in
+some conjuncts, zero width joiners. None of those count as word characters
+for ``\\w``, so a naive tokenizer splits every word into fragments. Tokens
+here are runs of letters, digits and Kannada marks. Each token is
+normalised to NFC, stripped of joiners and common case and plural suffixes,
+and then stripped of a trailing vowel sign or virama. This makes
+"ಬೆಂಗಳೂರು", "ಬೆಂಗಳೂರಿನಲ್ಲಿ" and "ಬೆಂಗಳೂರಿಗೆ" share one term.
+"""
+import re
+import unicodedata
+
+TOKEN_RE = re.compile(r"[\w\u0c80-\u0cff\u200c\u200d]+")
+
+JOINERS = str.maketrans("", "", "\u200c\u200d")
+KANNADA_DIGITS = str.maketrans("೦೧೨೩೪೫೬೭೮೯", "0123456789")
+
+# Dependent vowel signs, anusvara/visarga and the virama
+KANNADA_SIGNS = set(
+    "\u0c81\u0c82\u0c83\u0cbc\u0cbe\u0cbf\u0cc0\u0cc1\u0cc2\u0cc3\u0cc4"
+    "\u0cc6\u0cc7\u0cc8\u0cca\u0ccb\u0ccc\u0ccd\u0cd5\u0cd6\u0ce2\u0ce3"
+)
+
+# Plural and case endings, tried longest first
+KANNADA_SUFFIXES = sorted(
+    [
+        "ಗಳನ್ನು", "ಗಳಲ್ಲಿ", "ಗಳಿಂದ", "ಗಳಿಗಾಗಿ", "ಗಳಿಗೆ", "ಗಳಿಗೂ", "ಗಳೂ", "ಗಳು", "ಗಳ",
+        "ಿನಲ್ಲಿ", "ದಲ್ಲಿ", "ಯಲ್ಲಿ", "ನಲ್ಲಿ", "ಲ್ಲಿ",
+        "ವನ್ನು", "ಯನ್ನು", "ನ್ನು",
+        "ದಿಂದ", "ಯಿಂದ", "ನಿಂದ", "ಿಂದ",
+        "ಕ್ಕಾಗಿ", "ಗಾಗಿ", "ಕ್ಕೆ", "ಕ್ಕೂ", "ಿಗೆ", "ಗೆ", "ಗೂ",
+        "ಿನ", "ವು", "ವೂ", "ದ", "ಯ",
+    ],
+    key=len,
+    reverse=True,
+)
+
+# Code points a stripped suffix must leave behind; single-letter endings
+# such as the genitive "ದ" additionally need a word of at least four
+MIN_STEM_LENGTH = 2
+
+
+def is_kannada(token):
+    return any("\u0c80" <= char <= "\u0cff" for char in token)
+
+
+def stem_kannada(token):
+    for suffix in KANNADA_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+            if len(suffix) == 1 and len(token) < MIN_STEM_LENGTH + 2:
+                continue
+            token = token[:-len(suffix)]
+            break
+    while len(token) > 1 and token[-1] in KANNADA_SIGNS:
+        token = token[:-1]
+    return token
+
+
+def normalise(token):
+    token = unicodedata.normalize("NFC", token).translate(JOINERS).translate(KANNADA_DIGITS)
+    if is_kannada(token):
+        return stem_kannada(token)
+    return token.casefold()
+
+
+def tokenize(text):
+    """Return the normalised terms of ``text`` in order, duplicates included"""
+    if not text:
+        return []
+    terms = []
+    for match in TOKEN_RE.finditer(text):
+        term = normalise(match.group())
+        if term and term != "_":
+            terms.append(term)
+    return terms
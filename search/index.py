@@ -0,0 +1,365 @@
+"""
+Local inverted index with BM25F ranking.
+
+The index lives in its own SQLite file (SEARCH_INDEX_PATH), so it needs no
+search service and does not contend with the main database. Terms are
+interned to integers. Postings are ``(term, document, field) -> frequency``
+rows in a WITHOUT ROWID table clustered on the term, so looking up a term is
+a single range scan. Documents are live pages. A document stores its content
+type, publication time and per-field token counts, which BM25 length
+normalisation needs. Document counts are also kept per content type, so that
+a search restricted to some types weighs terms against those types only.
+
+A search does not score every posting of its terms. SQLite picks each term's
+SEARCH_TERM_CANDIDATES highest-impact documents, and only those candidates
+are scored, exactly, on all of the query's terms.
+"""
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+from news.caching import invalidate_tags
+from news.write_queue import write_queue
+
+from .analysis import tokenize
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("title", "intro", "body", "transcript")
+
+# Model fields that feed each index field
+SOURCE_FIELDS = {
+    "title": ("title",),
+    "intro": ("intro", "description", "search_description"),
+    "body": ("body_text",),
+    "transcript": ("transcript",),
+}
+
+DEFAULT_BOOSTS = {"title": 3.0, "intro": 2.0, "body": 1.0, "transcript": 1.0}
+
+INDEXED_MODELS = ("news.NewsPage", "news.VideoPage")
+
+K1 = 1.2
+B = 0.75
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    content_type INTEGER NOT NULL,
+    published REAL,
+    title_length INTEGER NOT NULL DEFAULT 0,
+    intro_length INTEGER NOT NULL DEFAULT 0,
+    body_length INTEGER NOT NULL DEFAULT 0,
+    transcript_length INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    field INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term_id, doc_id, field)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+CREATE TABLE IF NOT EXISTS stats (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def index_path():
+    return getattr(settings, "SEARCH_INDEX_PATH", os.path.join(settings.BASE_DIR, "search_index.sqlite3"))
+
+
+def boosts():
+    return {**DEFAULT_BOOSTS, **getattr(settings, "SEARCH_FIELD_BOOSTS", {})}
+
+
+def indexed_models():
+    return [apps.get_model(label) for label in INDEXED_MODELS]
+
+
+def is_indexed(page):
+    return isinstance(page, tuple(indexed_models()))
+
+
+def _field_text(page, name):
+    try:
+        field = page._meta.get_field(name)
+    except Exception:
+        return ""
+    value = getattr(page, name, None)
+    if not value:
+        return ""
+    if hasattr(field, "get_searchable_content"):
+        return " ".join(str(part) for part in field.get_searchable_content(value))
+    return str(value)
+
+
+def document_terms(page):
+    """Return ``{field: Counter(term -> frequency)}`` for a page"""
+    return {
+        field: Counter(tokenize(" ".join(_field_text(page, name) for name in sources)))
+        for field, sources in SOURCE_FIELDS.items()
+    }
+
+
+class SearchIndex:
+    def __init__(self, path=None):
+        self.path = path or index_path()
+        self._local = threading.local()
+
+    def connect(self):
+        """A connection per thread; WAL lets searches run while a write is in progress"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _term_ids(self, connection, terms):
+        connection.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)", [(term,) for term in terms])
+        return self._lookup_terms(connection, terms)
+
+    @staticmethod
+    def _lookup_terms(connection, terms):
+        ids = {}
+        terms = list(terms)
+        for start in range(0, len(terms), 500):
+            chunk = terms[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            ids.update(connection.execute(
+                f"SELECT term, id FROM terms WHERE term IN ({placeholders})", chunk
+            ).fetchall())
+        return ids
+
+    @staticmethod
+    def _add_stats(connection, deltas):
+        connection.executemany(
+            "INSERT INTO stats (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+            list(deltas.items()),
+        )
+
+    def _remove(self, connection, doc_id):
+        row = connection.execute(
+            "SELECT content_type, title_length, intro_length, body_length, transcript_length "
+            "FROM documents WHERE id = ?",
+            (doc_id,),
+        ).fetchone()
+        if row is None:
+            return
+        content_type, *lengths = row
+        connection.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        connection.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+        deltas = {f"length:{field}": -length for field, length in zip(FIELDS, lengths)}
+        deltas["documents"] = -1
+        deltas[f"documents:{content_type}"] = -1
+        self._add_stats(connection, deltas)
+
+    def _add(self, connection, page):
+        fields = document_terms(page)
+        term_ids = self._term_ids(connection, set().union(*fields.values()))
+        lengths = [sum(fields[field].values()) for field in FIELDS]
+        published = page.first_published_at.timestamp() if page.first_published_at else None
+
+        connection.execute(
+            "INSERT INTO documents (id, content_type, published, title_length, intro_length, body_length, "
+            "transcript_length) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (page.pk, page.content_type_id, published, *lengths),
+        )
+        connection.executemany(
+            "INSERT INTO postings (term_id, doc_id, field, tf) VALUES (?, ?, ?, ?)",
+            [
+                (term_ids[term], page.pk, position, tf)
+                for position, field in enumerate(FIELDS)
+                for term, tf in fields[field].items()
+            ],
+        )
+        deltas = {f"length:{field}": length for field, length in zip(FIELDS, lengths)}
+        deltas["documents"] = 1
+        deltas[f"documents:{page.content_type_id}"] = 1
+        self._add_stats(connection, deltas)
+
+    def index_page(self, page):
+        """Add or replace a single page"""
+        connection = self.connect()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            self._remove(connection, page.pk)
+            self._add(connection, page)
+
+    def remove_page(self, page_id):
+        connection = self.connect()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            self._remove(connection, page_id)
+
+    def _stats(self, connection, content_types=None):
+        """The number of documents of the given content types (all by default) and the average field lengths"""
+        stats = dict(connection.execute("SELECT key, value FROM stats").fetchall())
+        total = stats.get("documents", 0)
+        average = {
+            field: (stats.get(f"length:{field}", 0) / total if total else 0) or 1
+            for field in FIELDS
+        }
+        if not content_types:
+            return total, average
+        keys = [f"documents:{content_type}" for content_type in content_types]
+        if any(key in stats for key in keys):
+            documents = sum(stats.get(key, 0) for key in keys)
+        else:
+            # Indexes built before counts were kept per content type
+            documents = connection.execute(
+                f"SELECT COUNT(*) FROM documents WHERE content_type IN ({','.join('?' * len(content_types))})",
+                list(content_types),
+            ).fetchone()[0]
+        return documents, average
+
+    @staticmethod
+    def _frequency_sql(average, weights):
+        """The boosted, length-normalised frequency of posting ``p`` in document ``d``"""
+        cases = " ".join(
+            f"WHEN {position} THEN {float(weights[field])!r} * p.tf / "
+            f"({1 - B!r} + {B / average[field]!r} * d.{field}_length)"
+            for position, field in enumerate(FIELDS)
+        )
+        return f"CASE p.field {cases} END"
+
+    def search(self, query, limit=None, content_types=None):
+        """
+        Return ``[(page_id, content_type_id, score), ...]`` best first.
+        Field frequencies are length-normalised and boosted per field, summed into one
+        pseudo-frequency per term, and then saturated once, as in BM25F.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        connection = self.connect()
+        term_ids = self._lookup_terms(connection, terms)
+        if not term_ids:
+            return []
+
+        documents, average = self._stats(connection, content_types)
+        frequency = self._frequency_sql(average, boosts())
+        type_filter, type_params = "", []
+        if content_types:
+            type_filter = f" AND d.content_type IN ({','.join('?' * len(content_types))})"
+            type_params = list(content_types)
+        per_term = max(limit or 0, candidates_per_term())
+
+        # term -> doc -> boosted, length-normalised frequency
+        frequencies = defaultdict(dict)
+        doc_counts = {}
+        doc_types = {}
+        # Frequency order within a term is score order, since idf is constant per term.
+        # COUNT(*) OVER () is the term's document frequency before the LIMIT.
+        candidate_sql = (
+            f"SELECT p.doc_id, d.content_type, SUM({frequency}) AS frequency, COUNT(*) OVER () "
+            "FROM postings p JOIN documents d ON d.id = p.doc_id "
+            f"WHERE p.term_id = ?{type_filter} "
+            "GROUP BY p.doc_id ORDER BY frequency DESC, p.doc_id DESC LIMIT ?"
+        )
+        for term_id in term_ids.values():
+            doc_counts[term_id] = 0
+            for doc_id, content_type, value, count in connection.execute(
+                    candidate_sql, [term_id, *type_params, per_term]):
+                frequencies[term_id][doc_id] = value
+                doc_types[doc_id] = content_type
+                doc_counts[term_id] = count
+
+        if len(term_ids) > 1 and doc_types:
+            # A candidate of one term may contain another term below that term's cut-off
+            placeholders = ",".join("?" * len(term_ids))
+            rows = connection.execute(
+                f"SELECT p.term_id, p.doc_id, SUM({frequency}) "
+                "FROM postings p JOIN documents d ON d.id = p.doc_id "
+                f"WHERE p.term_id IN ({placeholders}) AND p.doc_id IN (SELECT value FROM json_each(?)) "
+                "GROUP BY p.term_id, p.doc_id",
+                [*term_ids.values(), json.dumps(list(doc_types))],
+            )
+            for term_id, doc_id, value in rows:
+                frequencies[term_id][doc_id] = value
+
+        scores = defaultdict(float)
+        for term_id, docs in frequencies.items():
+            count = doc_counts[term_id]
+            idf = math.log(1 + (documents - count + 0.5) / (count + 0.5))
+            for doc_id, value in docs.items():
+                scores[doc_id] += idf * value * (K1 + 1) / (value + K1)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(doc_id, doc_types[doc_id], round(score, 4)) for doc_id, score in ranked]
+
+
+search_index = SearchIndex()
+
+
+def max_results():
+    return getattr(settings, "SEARCH_MAX_RESULTS", 1000)
+
+
+def candidates_per_term():
+    return getattr(settings, "SEARCH_TERM_CANDIDATES", 2000)
+
+
+def _safely(operation, *args):
+    # A failed index update must not break publishing; rebuild_search_index repairs it
+    try:
+        operation(*args)
+    except sqlite3.Error:
+        logger.exception("Search index update failed")
+    invalidate_tags("search")
+
+
+def schedule_index(page):
+    transaction.on_commit(lambda: write_queue.submit(_safely, search_index.index_page, page))
+
+
+def schedule_remove(page_id):
+    transaction.on_commit(lambda: write_queue.submit(_safely, search_index.remove_page, page_id))
+
+
+def rebuild(batch_size=500, stdout=None):
+    """
+    Re-index every live page in a single transaction. Searches keep reading
+    the previous snapshot until it commits.
+    """
+    connection = search_index.connect()
+    total = 0
+    with connection:
+        connection.execute("BEGIN IMMEDIATE")
+        for table in ("postings", "documents", "terms", "stats"):
+            connection.execute(f"DELETE FROM {table}")
+        for model in indexed_models():
+            for page in model.objects.live().order_by("pk").iterator(chunk_size=batch_size):
+                search_index._add(connection, page)
+                total += 1
+                if stdout and total % batch_size == 0:
+                    stdout.write(f"Indexed {total} pages")
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    invalidate_tags("search")
+    return total
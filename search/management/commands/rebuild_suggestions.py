@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from search.suggest import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search suggestion snapshot shared by all workers"
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        total = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {total} suggestions in {time.monotonic() - start:.2f}s"
+        ))
@@ -0,0 +1,72 @@
+"""
+Cached, paginated search results.
+
+The ranked ``(page_id, content_type_id)`` list for a query is cached under the
+``search`` tag. The cache key is the query's normalised terms, so spelling or
+word-order variants of a popular query share one entry. Every index update
+invalidates the tag. A results page is sliced from the cached list, and its
+pages are loaded with one query per content type.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.paginator import Paginator
+
+from news.caching import get_tagged, make_key, set_tagged
+
+from .analysis import tokenize
+from .index import max_results, search_index
+
+CACHE_TAGS = ("search",)
+
+
+def normalised_query(query):
+    return " ".join(sorted(set(tokenize(query))))
+
+
+def ranked_results(query, content_types=None):
+    """Return the cached ``[(page_id, content_type_id), ...]`` ranking for a query"""
+    normalised = normalised_query(query)
+    if not normalised:
+        return []
+    content_types = sorted(content_types or ())
+    key = make_key("search:results", normalised, content_types)
+    results = get_tagged(key, CACHE_TAGS)
+    if results is None:
+        results = [
+            (page_id, content_type)
+            for page_id, content_type, _ in search_index.search(
+                normalised, limit=max_results(), content_types=content_types
+            )
+        ]
+        set_tagged(key, results, CACHE_TAGS, getattr(settings, "SEARCH_RESULTS_CACHE_TIMEOUT", 60))
+    return results
+
+
+def load_pages(results):
+    """Load the specific pages for ``[(page_id, content_type_id), ...]`` in the given order"""
+    by_type = defaultdict(list)
+    for page_id, content_type in results:
+        by_type[content_type].append(page_id)
+
+    pages = {}
+    for content_type, page_ids in by_type.items():
+        model = ContentType.objects.get_for_id(content_type).model_class()
+        manager = model._default_manager
+        queryset = manager.listing() if hasattr(manager, "listing") else manager.live()
+        pages.update(queryset.in_bulk(page_ids))
+    return [pages[page_id] for page_id, _ in results if page_id in pages]
+
+
+def paginate_results(query, page_number, per_page, models=None):
+    """
+    A paginator page over the ranked results, whose ``object_list`` holds
+    the specific pages of that page only.
+    """
+    content_types = None
+    if models:
+        content_types = [content_type.pk for content_type in ContentType.objects.get_for_models(*models).values()]
+    page = Paginator(ranked_results(query, content_types), per_page).get_page(page_number)
+    page.object_list = load_pages(page.object_list)
+    return page
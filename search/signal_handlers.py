@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished
+
+from news.models import NewsCategory, NewsPage, NewsTopic
+from news.models.authors import Author
+
+from . import suggest
+from .index import is_indexed, schedule_index, schedule_remove
+
+
+@receiver(page_published)
+def index_on_publish(sender, instance, **kwargs):
+    if is_indexed(instance):
+        schedule_index(instance)
+
+
+@receiver(page_unpublished)
+def remove_on_unpublish(sender, instance, **kwargs):
+    if is_indexed(instance):
+        schedule_remove(instance.pk)
+
+
+@receiver(post_delete)
+def remove_on_delete(sender, instance, **kwargs):
+    if isinstance(instance, Page) and is_indexed(instance):
+        schedule_remove(instance.pk)
+
+
+@receiver(page_published, sender=NewsPage)
+def suggest_on_publish(sender, instance, **kwargs):
+    suggest.schedule_update(suggest.article_entry(instance))
+
+
+@receiver(page_unpublished, sender=NewsPage)
+@receiver(post_delete, sender=NewsPage)
+def unsuggest_article(sender, instance, **kwargs):
+    suggest.schedule_remove(f"page:{instance.pk}")
+
+
+@receiver(post_save, sender=NewsTopic)
+def suggest_topic(sender, instance, **kwargs):
+    suggest.schedule_update(suggest.topic_entry(instance))
+
+
+@receiver(post_save, sender=NewsCategory)
+def suggest_category(sender, instance, **kwargs):
+    suggest.schedule_update(suggest.category_entry(instance))
+
+
+@receiver(post_save, sender=Author)
+def suggest_author(sender, instance, **kwargs):
+    suggest.schedule_update(suggest.author_entry(instance))
+
+
+@receiver(post_delete, sender=NewsTopic)
+@receiver(post_delete, sender=NewsCategory)
+@receiver(post_delete, sender=Author)
+def unsuggest_snippet(sender, instance, **kwargs):
+    kind = {NewsTopic: "topic", NewsCategory: "category", Author: "author"}[sender]
+    suggest.schedule_remove(f"{kind}:{instance.pk}")
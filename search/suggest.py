@@ -0,0 +1,501 @@
+"""
+Search-as-you-type suggestions.
+
+Suggestions come from article titles and topic, category and author names.
+They are stored in a snapshot file that every worker memory-maps, so the
+operating system shares a single copy between the gunicorn workers. The file
+holds a sorted array of UTF-8 keys (the label from every word start onwards)
+and, for each key, the entry it points to. A prefix lookup is two binary
+searches over the key array. Entries are ranked by a precomputed popularity
+and recency score.
+
+Short prefixes match a large share of all keys, so every prefix matching
+more than SCAN_LIMIT keys has its best HOT_PREFIX_SIZE entries precomputed
+in the snapshot. A lookup therefore either reads such a list or scans at
+most SCAN_LIMIT keys, however large the archive.
+
+Publishing between rebuilds appends to a small delta log next to the
+snapshot. Workers replay the log on top of the snapshot. Rebuilds run in
+rebuild_suggestions or on the background writer, never in a request: once
+the log grows past SEARCH_SUGGEST_DELTA_LIMIT records, or when a host has
+no snapshot yet. A rebuild trims only the records it has read, so records
+appended while it collects are kept.
+"""
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import unicodedata
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from news.write_queue import write_queue
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"VVSG0002"
+HEADER = struct.Struct("<8sIII")
+OFFSET = struct.Struct("<I")
+ENTRY_REF = struct.Struct("<I")
+SCORE = struct.Struct("<f")
+
+WORD_STARTS = 8
+# Prefixes matching more keys than this get a precomputed list of their best entries
+SCAN_LIMIT = 256
+HOT_PREFIX_SIZE = 64
+RECENCY_HALF_LIFE_DAYS = 7
+REBUILD_LOCK_KEY = "search:suggest:rebuild"
+DELTA_COUNT_KEY = "search:suggest:delta-records"
+
+SEPARATORS_RE = re.compile(r"[^\w\u0c80-\u0cff]+")
+
+
+def snapshot_path():
+    return getattr(settings, "SEARCH_SUGGEST_PATH", os.path.join(settings.BASE_DIR, "search_suggest.bin"))
+
+
+def delta_path():
+    return f"{snapshot_path()}.delta"
+
+
+def normalise(text):
+    """Fold case, joiners and punctuation, without stemming, so that partial words still match"""
+    text = unicodedata.normalize("NFC", text or "").replace("\u200c", "").replace("\u200d", "").casefold()
+    return SEPARATORS_RE.sub(" ", text).strip()
+
+
+def keys_for(label):
+    """The label from each of its first few word starts onwards"""
+    words = normalise(label).split(" ")
+    return {" ".join(words[start:]) for start in range(min(len(words), WORD_STARTS)) if words[start]}
+
+
+def _recency(published, now):
+    if not published:
+        return 0.0
+    days = max((now - published).total_seconds() / 86400, 0)
+    return math.pow(0.5, days / RECENCY_HALF_LIFE_DAYS)
+
+
+def article_entry(page, now=None):
+    now = now or timezone.now()
+    return {
+        "id": f"page:{page.pk}",
+        "label": page.title,
+        "url": page.get_url(),
+        "type": "article",
+        "score": math.log1p(page.view_count) + 2 * _recency(page.first_published_at, now),
+    }
+
+
+def topic_entry(topic):
+    return {
+        "id": f"topic:{topic.pk}",
+        "label": topic.name,
+        "url": topic.get_absolute_url(),
+        "type": "topic",
+        "score": math.log1p(topic.view_count) + (1 if topic.is_trending else 0),
+    }
+
+
+def category_entry(category):
+    return {
+        "id": f"category:{category.pk}",
+        "label": category.name,
+        "url": reverse("news:category_view", args=[category.slug]),
+        "type": "category",
+        "score": math.log1p(category.article_count),
+    }
+
+
+def author_entry(author):
+    return {
+        "id": f"author:{author.pk}",
+        "label": author.name,
+        "url": author.get_absolute_url(),
+        "type": "author",
+        "score": math.log1p(author.article_count),
+    }
+
+
+def collect_entries():
+    from news.models import NewsCategory, NewsPage, NewsTopic
+    from news.models.authors import Author
+
+    now = timezone.now()
+    pages = NewsPage.objects.live().defer_streamfields().only(
+        "pk", "title", "url_path", "view_count", "first_published_at"
+    )
+    for page in pages.iterator(chunk_size=2000):
+        yield article_entry(page, now)
+    for topic in NewsTopic.objects.all():
+        yield topic_entry(topic)
+    for category in NewsCategory.objects.all():
+        yield category_entry(category)
+    for author in Author.objects.all():
+        yield author_entry(author)
+
+
+def hot_prefixes(keys, scores):
+    """
+    ``(prefix, entry indexes best first)`` for every prefix of the sorted
+    ``(key, entry index)`` pairs that matches more than SCAN_LIMIT keys.
+    The key ranges are split one character deeper until they are small
+    enough to scan.
+    """
+    hot = []
+    ranges = [(0, len(keys), 0)]
+    while ranges:
+        start, end, depth = ranges.pop()
+        if end - start <= SCAN_LIMIT:
+            continue
+        if depth:
+            matching = {index for _, index in keys[start:end]}
+            hot.append((keys[start][0][:depth], heapq.nlargest(HOT_PREFIX_SIZE, matching, key=scores.__getitem__)))
+        # Keys no longer than the prefix sort first and have no deeper prefix
+        position = start
+        while position < end and len(keys[position][0]) <= depth:
+            position += 1
+        while position < end:
+            character = keys[position][0][depth]
+            stop = position + 1
+            while stop < end and keys[stop][0][depth] == character:
+                stop += 1
+            ranges.append((position, stop, depth + 1))
+            position = stop
+    hot.sort()
+    return hot
+
+
+def write_snapshot(entries, path):
+    """
+    Layout: header, key offsets, key blob, key -> entry refs, entry scores,
+    entry offsets, entry blob (JSON), hot prefix offsets, hot prefix blob,
+    hot list offsets, hot list entry refs. All integers are little-endian
+    uint32.
+    """
+    entries = list(entries)
+    # UTF-8 preserves code point order, so the keys sort the same as their encoding
+    keys = sorted((key, index) for index, entry in enumerate(entries) for key in keys_for(entry["label"]))
+    hot = hot_prefixes(keys, [entry["score"] for entry in entries])
+    keys = [(key.encode(), index) for key, index in keys]
+    blobs = [json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode() for entry in entries]
+
+    def offsets(items):
+        position, result = 0, []
+        for item in items:
+            result.append(position)
+            position += len(item)
+        result.append(position)
+        return b"".join(OFFSET.pack(offset) for offset in result)
+
+    hot_keys = [prefix.encode() for prefix, _ in hot]
+    hot_lists = [b"".join(ENTRY_REF.pack(index) for index in best) for _, best in hot]
+
+    # A unique name, so that concurrent rebuilds never write into each other's file
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as output:
+            output.write(HEADER.pack(MAGIC, len(keys), len(entries), len(hot)))
+            output.write(offsets([key for key, _ in keys]))
+            output.write(b"".join(key for key, _ in keys))
+            output.write(b"".join(ENTRY_REF.pack(index) for _, index in keys))
+            output.write(b"".join(SCORE.pack(entry["score"]) for entry in entries))
+            output.write(offsets(blobs))
+            output.write(b"".join(blobs))
+            output.write(offsets(hot_keys))
+            output.write(b"".join(hot_keys))
+            output.write(offsets(hot_lists))
+            output.write(b"".join(hot_lists))
+        # mkstemp creates the file private to its owner; every worker must be able to map it
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return len(entries)
+
+
+class Snapshot:
+    """Read-only view of a snapshot file"""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.stat = os.fstat(self.file.fileno())
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.key_count, self.entry_count, self.hot_count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a suggestion snapshot")
+
+        self.key_offsets = HEADER.size
+        self.key_blob = self.key_offsets + OFFSET.size * (self.key_count + 1)
+        key_blob_size = self._offset(self.key_offsets, self.key_count)
+        self.entry_refs = self.key_blob + key_blob_size
+        self.scores = self.entry_refs + ENTRY_REF.size * self.key_count
+        self.entry_offsets = self.scores + SCORE.size * self.entry_count
+        self.entry_blob = self.entry_offsets + OFFSET.size * (self.entry_count + 1)
+        self.hot_offsets = self.entry_blob + self._offset(self.entry_offsets, self.entry_count)
+        self.hot_blob = self.hot_offsets + OFFSET.size * (self.hot_count + 1)
+        self.hot_list_offsets = self.hot_blob + self._offset(self.hot_offsets, self.hot_count)
+        self.hot_lists = self.hot_list_offsets + OFFSET.size * (self.hot_count + 1)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def _offset(self, table, index):
+        return OFFSET.unpack_from(self.data, table + OFFSET.size * index)[0]
+
+    def key(self, index):
+        start = self._offset(self.key_offsets, index)
+        end = self._offset(self.key_offsets, index + 1)
+        return self.data[self.key_blob + start:self.key_blob + end]
+
+    def entry_ref(self, index):
+        return ENTRY_REF.unpack_from(self.data, self.entry_refs + ENTRY_REF.size * index)[0]
+
+    def score(self, entry):
+        return SCORE.unpack_from(self.data, self.scores + SCORE.size * entry)[0]
+
+    def entry(self, entry):
+        start = self._offset(self.entry_offsets, entry)
+        end = self._offset(self.entry_offsets, entry + 1)
+        return json.loads(self.data[self.entry_blob + start:self.entry_blob + end])
+
+    def hot_prefix(self, index):
+        start = self._offset(self.hot_offsets, index)
+        end = self._offset(self.hot_offsets, index + 1)
+        return self.data[self.hot_blob + start:self.hot_blob + end]
+
+    def hot_list(self, index):
+        start = self.hot_lists + self._offset(self.hot_list_offsets, index)
+        end = self.hot_lists + self._offset(self.hot_list_offsets, index + 1)
+        return [ref for ref, in ENTRY_REF.iter_unpack(self.data[start:end])]
+
+    def _lower_bound(self, prefix, item, count):
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if item(middle) < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def top(self, prefix, count):
+        """
+        Indexes of the ``count`` best-scoring entries with a key starting with
+        ``prefix``, best first. A prefix matching many keys has its list
+        precomputed. Any other prefix matches at most SCAN_LIMIT keys, which
+        are scanned into a heap of at most ``count`` entries.
+        """
+        encoded = prefix.encode()
+        hot = self._lower_bound(encoded, self.hot_prefix, self.hot_count)
+        if hot < self.hot_count and self.hot_prefix(hot) == encoded:
+            best = self.hot_list(hot)
+            # A full list may have been cut short, so asking for more than it holds falls back to the scan
+            if count <= len(best) or len(best) < HOT_PREFIX_SIZE:
+                return best[:count]
+
+        start = self._lower_bound(encoded, self.key, self.key_count)
+        # The first byte string greater than every key that starts with the prefix
+        end = self._lower_bound(encoded + b"\xff", self.key, self.key_count)
+        heap, chosen = [], set()
+        for index in range(start, end):
+            entry = self.entry_ref(index)
+            if entry in chosen:
+                # An entry has a key per word start and may match more than once
+                continue
+            score = self.score(entry)
+            if len(heap) < count:
+                heapq.heappush(heap, (score, entry))
+                chosen.add(entry)
+            elif score > heap[0][0]:
+                _, dropped = heapq.heapreplace(heap, (score, entry))
+                chosen.discard(dropped)
+                chosen.add(entry)
+        return [entry for _, entry in sorted(heap, reverse=True)]
+
+
+class Suggester:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._delta_inode = None
+        self._delta_position = 0
+        self._delta = {}
+
+    def _refresh(self):
+        """Remap the snapshot if it was rebuilt and replay new delta records"""
+        path = snapshot_path()
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            # First use on this host; suggestions come from the delta log until the snapshot exists
+            stat = None
+            schedule_rebuild()
+        current = self._snapshot
+        if stat and (current is None or (stat.st_ino, stat.st_mtime_ns) != (current.stat.st_ino, current.stat.st_mtime_ns)):
+            try:
+                snapshot = Snapshot(path)
+            except ValueError:
+                # Written by an older release; rebuild_suggestions replaces it
+                logger.warning("Ignoring suggestion snapshot %s in an old format", path)
+                schedule_rebuild()
+            else:
+                # The old mapping is left to the garbage collector, since a request may still be reading it
+                self._snapshot = snapshot
+                self._delta_position = 0
+                self._delta = {}
+
+        try:
+            with open(delta_path(), "rb") as log:
+                inode = os.fstat(log.fileno()).st_ino
+                if inode != self._delta_inode:
+                    # Trimmed by a rebuild: what it dropped is already in the snapshot
+                    self._delta_inode = inode
+                    self._delta_position = 0
+                    self._delta = {}
+                log.seek(self._delta_position)
+                for line in log:
+                    if not line.endswith(b"\n"):
+                        break
+                    record = json.loads(line)
+                    self._delta[record["id"]] = record
+                    self._delta_position += len(line)
+        except FileNotFoundError:
+            pass
+
+    def suggest(self, query, limit=8):
+        prefix = normalise(query)
+        if not prefix:
+            return []
+        with self._lock:
+            self._refresh()
+            snapshot, delta = self._snapshot, dict(self._delta)
+
+        # Delta records replace or remove snapshot entries with the same id, so
+        # ask for more entries until enough of them survive
+        candidates, count = [], limit
+        while snapshot is not None:
+            entries = [snapshot.entry(entry) for entry in snapshot.top(prefix, count)]
+            candidates = [entry for entry in entries if entry["id"] not in delta]
+            if len(candidates) >= limit or len(entries) < count:
+                break
+            count = limit + len(entries) - len(candidates)
+        candidates.extend(
+            record for record in delta.values()
+            if not record.get("removed") and any(key.startswith(prefix) for key in keys_for(record["label"]))
+        )
+        candidates.sort(key=lambda entry: -entry["score"])
+        return [
+            {"label": entry["label"], "url": entry["url"], "type": entry["type"]}
+            for entry in candidates[:limit]
+        ]
+
+
+suggester = Suggester()
+
+
+@contextmanager
+def _locked_delta():
+    """
+    The delta log opened for appending, under an exclusive lock shared with
+    the trim in rebuild(). If a rebuild replaced the file while this waited
+    for the lock, the new file is opened instead.
+    """
+    while True:
+        log = open(delta_path(), "ab")
+        if fcntl is not None:
+            fcntl.flock(log, fcntl.LOCK_EX)
+        try:
+            current = os.stat(delta_path()).st_ino == os.fstat(log.fileno()).st_ino
+        except FileNotFoundError:
+            current = False
+        if current:
+            break
+        log.close()
+    try:
+        yield log
+    finally:
+        log.close()
+
+
+def rebuild():
+    """Write a fresh snapshot and drop the delta records it supersedes"""
+    path = snapshot_path()
+    with _locked_delta() as log:
+        # Every record below this offset was appended after its commit, so the collection sees it
+        covered = os.fstat(log.fileno()).st_size
+    count = write_snapshot(collect_entries(), path)
+
+    with _locked_delta():
+        with open(delta_path(), "rb") as current:
+            current.seek(covered)
+            remaining = current.read()
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as output:
+                output.write(remaining)
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, delta_path())
+        except BaseException:
+            os.unlink(temporary)
+            raise
+    cache.set(DELTA_COUNT_KEY, remaining.count(b"\n"), timeout=None)
+    return count
+
+
+def _rebuild_and_unlock():
+    try:
+        rebuild()
+    finally:
+        cache.delete(REBUILD_LOCK_KEY)
+
+
+def schedule_rebuild():
+    """Rebuild the snapshot on the background writer, unless a rebuild is already under way"""
+    if cache.add(REBUILD_LOCK_KEY, True, timeout=300):
+        write_queue.submit(_rebuild_and_unlock)
+
+
+def _delta_limit():
+    return getattr(settings, "SEARCH_SUGGEST_DELTA_LIMIT", 500)
+
+
+def append_delta(record):
+    """Record an added, changed or removed entry; schedules a rebuild when the log is long"""
+    line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+    with _locked_delta() as log:
+        log.write(line.encode())
+    if not cache.add(DELTA_COUNT_KEY, 1, timeout=None):
+        try:
+            cache.incr(DELTA_COUNT_KEY)
+        except ValueError:
+            cache.set(DELTA_COUNT_KEY, 1, timeout=None)
+    if cache.get(DELTA_COUNT_KEY, 0) > _delta_limit():
+        schedule_rebuild()
+
+
+def schedule_update(record):
+    transaction.on_commit(lambda: append_delta(record))
+
+
+def schedule_remove(entry_id):
+    transaction.on_commit(lambda: append_delta({"id": entry_id, "removed": True}))
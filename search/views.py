@@ -1,7 +1,8 @@
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from asgiref.sync import sync_to_async
+from django.core.paginator import Paginator
 from django.template.response import TemplateResponse
 
-from wagtail.models import Page
+from .results import paginate_results
 
 # To enable logging of search queries for use with the "Promoted search results" module
 # <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
@@ -17,7 +18,7 @@ def search(request):
 
     # Search
     if search_query:
-        search_results = Page.objects.live().search(search_query)
+        search_results = paginate_results(search_query, page, 10)
 
         # To log this query for use with the "Promoted search results" module:
 
@@ -25,16 +26,27 @@ def search(request):
         # query.add_hit()
 
     else:
-        search_results = Page.objects.none()
-
-    # Pagination
-    paginator = Paginator(search_results, 10)
-    try:
-        search_results = paginator.page(page)
-    except PageNotAnInteger:
-        search_results = paginator.page(1)
-    except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
+        search_results = Paginator([], 10).get_page(1)
+
+    return TemplateResponse(
+        request,
+        "search/search.html",
+        {
+            "search_query": search_query,
+            "search_results": search_results,
+        },
+    )
+
+
+async def async_search(request):
+    """The search view for the ASGI deployment; the index lookup runs off the event loop"""
+    search_query = request.GET.get("query", None)
+    page = request.GET.get("page", 1)
+
+    if search_query:
+        search_results = await sync_to_async(paginate_results)(search_query, page, 10)
+    else:
+        search_results = Paginator([], 10).get_page(1)
 
     return TemplateResponse(
         request,
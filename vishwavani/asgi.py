@@ -0,0 +1,20 @@
+"""
+ASGI config for vishwavani project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serving through it also enables the async listing and search views, e.g.
+
+    gunicorn vishwavani.asgi:application -k uvicorn.workers.UvicornWorker
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vishwavani.settings.dev")
+os.environ.setdefault("NEWS_ASYNC_VIEWS", "True")
+
+application = get_asgi_application()
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     # third party apps
     "storages",
+    "rest_framework",
     # local apps
     'news',
     'home',
@@ -43,10 +44,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "news.routers.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "news.page_cache.AnonymousPageCacheMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django.middleware.security.SecurityMiddleware",
@@ -85,6 +88,83 @@ DATABASES = {
     }
 }
 
+# SQLite production profile. WAL lets readers carry on while a write commits,
+# synchronous=NORMAL is durable in WAL mode across application crashes, and
+# writers wait up to busy_timeout milliseconds for the lock instead of failing.
+# Transactions start IMMEDIATE so that a read-then-write transaction takes the
+# write lock up front rather than failing with "database is locked" on upgrade.
+NEWS_SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    # Negative sizes are in KiB: 64 MiB of page cache per connection
+    "cache_size": -64000,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+if config("NEWS_SQLITE_TUNED", default=True, cast=bool):
+    DATABASES["default"]["OPTIONS"] = {
+        "init_command": ";".join(f"PRAGMA {name}={value}" for name, value in NEWS_SQLITE_PRAGMAS.items()),
+        "transaction_mode": "IMMEDIATE",
+    }
+
+# Background writes (view count flushes, search and related-article index
+# updates) go through one writer thread per process. The lock file extends
+# that to one background writer across all worker processes on the host.
+NEWS_WRITE_QUEUE = config("NEWS_WRITE_QUEUE", default=True, cast=bool)
+NEWS_WRITE_LOCK_FILE = os.path.join(BASE_DIR, "db.sqlite3.write-lock")
+
+# Public reads can be served from replicas: every alias other than "default"
+# is treated as one. NEWS_LOCAL_REPLICA adds a second SQLite file to try this
+# locally; copy the primary into it with the sync_local_replica command.
+if config("NEWS_LOCAL_REPLICA", default=False, cast=bool):
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "db_replica.sqlite3"),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["news.routers.ReplicaRouter"]
+NEWS_DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+# Reads fall back to the primary while a replica is missing the primary's
+# latest heartbeat; past NEWS_REPLICA_MAX_LAG seconds that is logged as a
+# warning. Also how often replicas are checked, and how long an editor's reads
+# stay on the primary after a write.
+NEWS_REPLICA_MAX_LAG = 10
+NEWS_REPLICA_CHECK_INTERVAL = 5
+NEWS_REPLICA_STICKY_SECONDS = 30
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/ref/settings/#caches
+#
+# Tag versions, fragment statistics, feed and API ETags, trending boards and
+# the category tree must be seen by every worker process, so the cache has to
+# be shared; Django's per-process default would let each worker keep serving
+# what it cached before another worker invalidated it. REDIS_URL selects Redis
+# (requires the redis package); otherwise entries live in a directory shared
+# by all workers on the host, which suits the single-host SQLite deployment.
+REDIS_URL = config("REDIS_URL", default="")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "vishwavani",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": config("NEWS_CACHE_DIR", default=os.path.join(BASE_DIR, "cache")),
+            "OPTIONS": {
+                # Tag stamps are stored without a timeout; keep room for them
+                # next to rendered fragments and pages before culling starts.
+                "MAX_ENTRIES": 20000,
+            },
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -190,3 +270,113 @@ WAGTAILADMIN_BASE_URL = "http://example.com"
 WAGTAILDOCS_EXTENSIONS = ['csv', 'docx', 'key', 'odt', 'pdf', 'pptx', 'rtf', 'txt', 'xlsx', 'zip']
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# News listings
+# Listings are paged by (first_published_at, id) cursors. Legacy ?page= links
+# still fall back to numbered pagination. Approximate totals are cached for
+# NEWS_LISTING_COUNT_TIMEOUT seconds instead of counting on every request.
+NEWS_CURSOR_PAGINATION = True
+NEWS_LISTING_COUNT_TIMEOUT = 600
+
+
+# View counts are buffered in process and written back in bulk at least every
+# NEWS_VIEW_COUNT_FLUSH_INTERVAL seconds, or once NEWS_VIEW_COUNT_MAX_PENDING
+# distinct rows are waiting.
+NEWS_VIEW_COUNT_FLUSH_INTERVAL = 10
+NEWS_VIEW_COUNT_MAX_PENDING = 1000
+
+# Trending leaderboards hold the top NEWS_TRENDING_SIZE articles per window
+# and scope. Requests never recompute them: schedule the refresh_trending
+# command every NEWS_TRENDING_REFRESH_INTERVAL seconds, or run it with --loop.
+NEWS_TRENDING_SIZE = 50
+NEWS_TRENDING_REFRESH_INTERVAL = 60
+# Related articles keep the top NEWS_RELATED_SIZE neighbours per article,
+# chosen from the NEWS_RELATED_CANDIDATES articles published closest to it in
+# each shared category or topic. NEWS_RELATED_WEIGHTS and
+# NEWS_RELATED_COVIEW_PROVIDER (a dotted path to a callable) can tune the
+# scoring.
+NEWS_RELATED_SIZE = 10
+NEWS_RELATED_CANDIDATES = 500
+
+# Cached homepage fragments are invalidated by publish and snippet signals;
+# NEWS_FRAGMENT_CACHE_TIMEOUT bounds staleness of view-count driven sections.
+NEWS_FRAGMENT_CACHE_TIMEOUT = 300
+
+# Anonymous GETs of Wagtail pages are served from a full-response cache that
+# is purged by surrogate key on publish. NEWS_CACHE_PURGE_HANDLER may name a
+# callable that receives the purged keys, e.g. to purge a CDN.
+NEWS_PAGE_CACHE_ENABLED = True
+NEWS_PAGE_CACHE_TIMEOUT = 300
+
+# Renditions used by the templates are generated ahead of time in
+# NEWS_RENDITION_WORKERS processes when an image is uploaded or a page is
+# published (0 generates them inline). NEWS_RENDITION_EXTRA_SPECS maps image
+# field names to specs used outside the templates.
+NEWS_RENDITION_WORKERS = 2
+NEWS_RENDITION_EXTRA_SPECS = {
+    'thumbnail': ['fill-400x300'],
+}
+
+# Category pages list articles from the whole subtree of the category
+# (?descendants=0 restricts a page to the exact category).
+NEWS_CATEGORY_INCLUDE_DESCENDANTS = True
+
+# Site search uses a local BM25 index stored in its own SQLite file, kept up
+# to date on publish and rebuilt with the rebuild_search_index command.
+# SEARCH_FIELD_BOOSTS overrides the title/intro/body/transcript weights.
+SEARCH_INDEX_PATH = os.path.join(BASE_DIR, "search_index.sqlite3")
+SEARCH_MAX_RESULTS = 1000
+# Each query term nominates at most this many of its highest-scoring documents
+# (and never fewer than the results asked for); only those are scored.
+SEARCH_TERM_CANDIDATES = 2000
+# Ranked result lists are cached per normalised query for this many seconds,
+# and dropped whenever the index changes.
+SEARCH_RESULTS_CACHE_TIMEOUT = 60
+
+# Search suggestions are served from a memory-mapped snapshot shared by all
+# workers. Publishing appends to a delta log, and the background writer
+# rebuilds the snapshot once the log holds SEARCH_SUGGEST_DELTA_LIMIT records.
+# Run rebuild_suggestions after deploying and on a schedule.
+SEARCH_SUGGEST_PATH = os.path.join(BASE_DIR, "search_suggest.bin")
+SEARCH_SUGGEST_DELTA_LIMIT = 500
+
+# RSS/Atom feeds for topics, categories, authors and breaking news carry the
+# NEWS_FEED_ITEMS latest articles. The XML is cached until a relevant publish
+# and clients may revalidate after NEWS_FEED_MAX_AGE seconds.
+NEWS_FEED_ITEMS = 30
+NEWS_FEED_MAX_AGE = 60
+
+# Sitemaps: one stored shard per month of articles and videos (built with the
+# build_sitemaps command and refreshed on publish) plus a Google News sitemap
+# of the last 48 hours. Months touched by publishing are rebuilt in the
+# background NEWS_SITEMAP_BUILD_DELAY seconds after the first change.
+NEWS_SITEMAP_PUBLICATION_NAME = 'ವಿಶ್ವವಾಣಿ'
+NEWS_SITEMAP_LANGUAGE = 'kn'
+NEWS_SITEMAP_BUILD_DELAY = 30
+
+# Read-only JSON API under /api/v1/. It is anonymous and JSON only, so DRF's
+# session authentication and browsable renderer are left out. Responses are
+# cached until the collection changes and revalidate with ETags.
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+    "DEFAULT_PARSER_CLASSES": ["rest_framework.parsers.JSONParser"],
+    "DEFAULT_AUTHENTICATION_CLASSES": [],
+    "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.AllowAny"],
+    "UNAUTHENTICATED_USER": None,
+}
+NEWS_API_PAGE_SIZE = 20
+NEWS_API_CACHE_TIMEOUT = 300
+NEWS_API_MAX_AGE = 60
+
+# The ASGI entry point (vishwavani/asgi.py) turns on NEWS_ASYNC_VIEWS, which
+# serves the listing and search views as coroutines. Independent queries of
+# a view run side by side on up to NEWS_QUERY_THREADS pooled connections.
+NEWS_ASYNC_VIEWS = config('NEWS_ASYNC_VIEWS', default=False, cast=bool)
+NEWS_CONCURRENT_QUERIES = True
+NEWS_QUERY_THREADS = 8
+
+# benchmark_urls: dataset sizes in articles, and how much worse a route may get
+# against an earlier results file before it is reported as a regression (see
+# DEFAULT_THRESHOLDS in that command for the keys).
+NEWS_BENCHMARK_SIZES = [1000, 50000, 500000]
+NEWS_BENCHMARK_THRESHOLDS = {}
@@ -5,14 +5,24 @@ from wagtail import urls as wagtail_urls
 from wagtail.admin import urls as wagtailadmin_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
+from news import views as news_views
 from search import views as search_views
 
 urlpatterns = [
     path("django-admin/", admin.site.urls),
     path("admin/", include(wagtailadmin_urls)),
     path("documents/", include(wagtaildocs_urls)),
-    path("search/", search_views.search, name="search"),
+    path(
+        "search/",
+        search_views.async_search if settings.NEWS_ASYNC_VIEWS else search_views.search,
+        name="search",
+    ),
     path("news/", include("news.urls")),
+    path("api/v1/", include("news.api.urls")),
+    path("sitemap.xml", news_views.sitemap_index, name="sitemap"),
+    path("sitemaps/pages.xml", news_views.sitemap_pages, name="sitemap_pages"),
+    path("sitemaps/<int:year>-<int:month>-<int:part>.xml", news_views.sitemap_shard, name="sitemap_shard"),
+    path("news-sitemap.xml", news_views.news_sitemap, name="news_sitemap"),
 ]
 
 if settings.DEBUG: